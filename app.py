@@ -1,102 +1,503 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g, send_file, abort, url_for
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
+from werkzeug.utils import safe_join
+from flask.json.provider import DefaultJSONProvider
 import joblib
 import numpy as np
 import os
+import io
+import csv
+import json
+import mimetypes
+import random
+import hashlib
+import hmac
+import sqlite3
+import functools
+import threading
+import time
+from itertools import islice
 from models.prediction_models import PredictionModels
+from models.model_reload import ModelWatcher, install_reload_signal
+from models.metrics import METRICS, stage
+from models.history_index import HistoryIndex
+from models.community_store import CommunityStore, COMMUNITY_DB
+from models.search_index import SearchIndex
+from models.static_assets import AssetManifest, compress_response, encodings, negotiate
+from models.page_cache import PageCache
+from models.forum_events import ForumBroadcaster, HEARTBEAT, parse_cursor
+from models.farmer_registry import FarmerRegistry, FARMER_REGISTRY_DIR, resolve_location
+from models.weather_table import check_year as check_weather_year
+from models.crop_suitability import (
+    CROP_DATABASE, CROP_NAMES, score_crops, recommendation_level, suitability_details
+)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
+app.config['YIELD_BATCH_MAX_ROWS'] = int(os.environ.get('YIELD_BATCH_MAX_ROWS', 50000))
+# Room for one JSON object per row with long numbers; CSV rows are far smaller
+app.config['YIELD_BATCH_MAX_BYTES'] = int(os.environ.get('YIELD_BATCH_MAX_BYTES',
+                                                          app.config['YIELD_BATCH_MAX_ROWS'] * 128))
+app.config['DISEASE_BACKEND'] = os.environ.get('DISEASE_BACKEND', 'sklearn')
+app.config['DISEASE_MICROBATCH'] = os.environ.get('DISEASE_MICROBATCH', '0') == '1'
+app.config['DISEASE_MICROBATCH_WAIT_MS'] = float(os.environ.get('DISEASE_MICROBATCH_WAIT_MS', 2.0))
+app.config['DISEASE_MICROBATCH_SIZE'] = int(os.environ.get('DISEASE_MICROBATCH_SIZE', 64))
+app.config['DETERMINISTIC_FALLBACK'] = os.environ.get('DETERMINISTIC_FALLBACK', '0') == '1'
+app.config['FALLBACK_SEED'] = os.environ.get('FALLBACK_SEED', '0')
+app.config['API_CACHE_MAX_AGE'] = int(os.environ.get('API_CACHE_MAX_AGE', 3600))
+app.config['CROP_BATCH_CHUNK_SIZE'] = int(os.environ.get('CROP_BATCH_CHUNK_SIZE', 2048))
+app.config['LAZY_MODELS'] = os.environ.get('LAZY_MODELS', '0') == '1'
+app.config['MODEL_WARMUP'] = os.environ.get('MODEL_WARMUP', '0') == '1'
+app.config['PREDICTION_CACHE'] = os.environ.get('PREDICTION_CACHE', '0') == '1'
+app.config['PREDICTION_CACHE_TTL'] = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+# Per-model cache size and input resolution (rainfall mm, pesticide tonnes, temperature °C, year)
+app.config['PREDICTION_CACHE_MODELS'] = {
+    'yield': {'max_size': 20000, 'resolution': (1.0, 1.0, 0.1)},
+    'disease': {'max_size': 20000, 'resolution': (1.0, 0.1, 1.0)},
+    'weather': {'max_size': 500, 'resolution': 1}
+}
+app.config['DATA_STORE_DIR'] = os.environ.get('DATA_STORE_DIR', 'dataset/store')
+app.config['HISTORY_TOP_K_MAX'] = int(os.environ.get('HISTORY_TOP_K_MAX', 100))
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '0') == '1'
+app.config['COMMUNITY_DB'] = os.environ.get('COMMUNITY_DB', COMMUNITY_DB)
+app.config['COMMUNITY_PAGE_SIZE'] = int(os.environ.get('COMMUNITY_PAGE_SIZE', 20))
+app.config['COMMUNITY_PAGE_MAX'] = int(os.environ.get('COMMUNITY_PAGE_MAX', 100))
+app.config['FORUM_EVENTS_POLL_INTERVAL'] = float(os.environ.get('FORUM_EVENTS_POLL_INTERVAL', 1.0))
+app.config['FORUM_STREAM_HEARTBEAT'] = float(os.environ.get('FORUM_STREAM_HEARTBEAT', 15.0))
+app.config['REQUEST_THREADS'] = int(os.environ.get('REQUEST_THREADS', 8))
+# Under WSGI each open /api/forum/stream holds a request thread: by default streams may take
+# all but two of them, so every tab a visitor opens still gets one. Serving through asgi.py
+# (python serve.py) answers streams on the event loop and ignores this cap.
+app.config['FORUM_STREAM_MAX_THREADS'] = int(os.environ.get('FORUM_STREAM_MAX_THREADS',
+                                                            max(1, app.config['REQUEST_THREADS'] - 2)))
+app.config['SEARCH_PAGE_SIZE'] = int(os.environ.get('SEARCH_PAGE_SIZE', 10))
+app.config['SEARCH_PAGE_MAX'] = int(os.environ.get('SEARCH_PAGE_MAX', 50))
+app.config['FARMER_REGISTRY_DIR'] = os.environ.get('FARMER_REGISTRY_DIR', FARMER_REGISTRY_DIR)
+app.config['FARMER_REGISTRY_SIZE'] = int(os.environ.get('FARMER_REGISTRY_SIZE', 100000))
+app.config['FARMER_SEARCH_RADIUS_KM'] = float(os.environ.get('FARMER_SEARCH_RADIUS_KM', 50))
+app.config['FARMER_SEARCH_MAX_RADIUS_KM'] = float(os.environ.get('FARMER_SEARCH_MAX_RADIUS_KM', 500))
+app.config['FARMER_SEARCH_MAX_K'] = int(os.environ.get('FARMER_SEARCH_MAX_K', 50))
+app.config['INFERENCE_WORKERS'] = int(os.environ.get('INFERENCE_WORKERS', 0))
+app.config['MODEL_RELOAD_WATCH'] = os.environ.get('MODEL_RELOAD_WATCH', '0') == '1'
+app.config['MODEL_RELOAD_INTERVAL'] = float(os.environ.get('MODEL_RELOAD_INTERVAL', 2.0))
+app.config['MODEL_RELOAD_SIGNAL'] = os.environ.get('MODEL_RELOAD_SIGNAL', '1') == '1'
+app.config['MODEL_ADMIN_TOKEN'] = os.environ.get('MODEL_ADMIN_TOKEN', '')
+# Off by default: behind a reverse proxy on the same host every request comes from 127.0.0.1
+app.config['MODEL_ADMIN_ALLOW_LOCAL'] = os.environ.get('MODEL_ADMIN_ALLOW_LOCAL', '0') == '1'
+app.config['STATIC_ASSET_MAX_AGE'] = int(os.environ.get('STATIC_ASSET_MAX_AGE', 31536000))
+app.config['COMPRESS_RESPONSES'] = os.environ.get('COMPRESS_RESPONSES', '1') == '1'
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 5))
+app.config['PAGE_CACHE'] = os.environ.get('PAGE_CACHE', '1') == '1'
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that times request body parsing and response serialization"""
+    def loads(self, s, **kwargs):
+        with stage('json_parse'):
+            return super().loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        with stage('jsonify'):
+            return super().response(*args, **kwargs)
+
+# Instrumentation hooks are only installed when enabled, so switching it off costs nothing per request
+if app.config['METRICS_ENABLED']:
+    METRICS.enabled = True
+    METRICS.server_timing = app.config['SERVER_TIMING']
+    app.json = TimedJSONProvider(app)
+    
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        METRICS.begin_request()
+    
+    @app.after_request
+    def record_request_time(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        total = time.perf_counter() - started
+        timings = METRICS.end_request(request.endpoint or 'unmatched', total)
+        if app.config['SERVER_TIMING']:
+            entries = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in timings]
+            entries.append(f'total;dur={total * 1000:.3f}')
+            response.headers['Server-Timing'] = ', '.join(entries)
+        return response
 
 # Initialize prediction models
 try:
-    prediction_models = PredictionModels()
+    prediction_models = PredictionModels(
+        disease_backend=app.config['DISEASE_BACKEND'],
+        lazy=app.config['LAZY_MODELS']
+    )
     models_loaded = True
+    if app.config['INFERENCE_WORKERS']:
+        prediction_models.enable_inference_pool(workers=app.config['INFERENCE_WORKERS'])
+    if app.config['PREDICTION_CACHE']:
+        for model_name, cache_config in app.config['PREDICTION_CACHE_MODELS'].items():
+            prediction_models.enable_cache(
+                model_name,
+                ttl_seconds=app.config['PREDICTION_CACHE_TTL'],
+                **cache_config
+            )
+    if not app.config['LAZY_MODELS']:
+        print(f"Model load report:\n{prediction_models.startup_report()}")
+    elif app.config['MODEL_WARMUP']:
+        # Load models in the background so the first request does not pay for it
+        threading.Thread(target=prediction_models.warm_up, name='model-warmup', daemon=True).start()
+    if app.config['DISEASE_MICROBATCH']:
+        prediction_models.enable_disease_batching(
+            max_wait_ms=app.config['DISEASE_MICROBATCH_WAIT_MS'],
+            max_batch_size=app.config['DISEASE_MICROBATCH_SIZE']
+        )
+    if app.config['MODEL_RELOAD_SIGNAL']:
+        install_reload_signal(prediction_models)
+    if app.config['MODEL_RELOAD_WATCH']:
+        model_watcher = ModelWatcher(prediction_models, interval=app.config['MODEL_RELOAD_INTERVAL']).start()
 except Exception as e:
     print(f"Error loading models: {e}")
     models_loaded = False
 
+# Index over the historical yields table (built by python -m models.ingest_data)
+try:
+    history_index = HistoryIndex.from_store(app.config['DATA_STORE_DIR'])
+except Exception as e:
+    print(f"Error loading historical data: {e}")
+    history_index = None
+
+# Forum questions and marketplace listings
+try:
+    community_store = CommunityStore(app.config['COMMUNITY_DB'])
+except Exception as e:
+    print(f"Error opening community database: {e}")
+    community_store = None
+
+# Farmer registry (a synthetic one until python -m models.farmer_registry writes a bundle)
+try:
+    farmer_registry = FarmerRegistry.load_or_synthetic(app.config['FARMER_REGISTRY_DIR'],
+                                                       size=app.config['FARMER_REGISTRY_SIZE'])
+except Exception as e:
+    print(f"Error loading farmer registry: {e}")
+    farmer_registry = None
+
+def fallback_rng(*inputs):
+    """
+    Random source for fallback estimates. In deterministic mode it is seeded
+    from a hash of the inputs and FALLBACK_SEED, so identical requests get
+    identical responses.
+    """
+    if not app.config['DETERMINISTIC_FALLBACK']:
+        return random
+    key = repr((app.config['FALLBACK_SEED'],) + inputs).encode('utf-8')
+    return random.Random(int.from_bytes(hashlib.sha256(key).digest()[:8], 'big'))
+
+def request_params():
+    """JSON body for POST requests, query string for GET requests"""
+    if request.method == 'GET':
+        return request.args.to_dict()
+    return request.json
+
+def client_error(e):
+    """400 with a JSON error for input a route cannot use; HTTP errors (415, 413...) keep their own status"""
+    if isinstance(e, HTTPException):
+        return jsonify({'success': False, 'error': e.description}), e.code
+    if isinstance(e, KeyError):
+        return jsonify({'success': False, 'error': f'Missing field: {e.args[0]}'}), 400
+    return jsonify({'success': False, 'error': str(e)}), 400
+
+def as_bool(value):
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+def admin_authorized():
+    """
+    With MODEL_ADMIN_TOKEN set, require it in X-Admin-Token. Without a token,
+    deny unless MODEL_ADMIN_ALLOW_LOCAL opts in to trusting local requests.
+    """
+    token = app.config['MODEL_ADMIN_TOKEN']
+    if token:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+    return app.config['MODEL_ADMIN_ALLOW_LOCAL'] and request.remote_addr in ('127.0.0.1', '::1')
+
+def cacheable(view=None, static=False):
+    """
+    Add an ETag to successful JSON responses and answer matching
+    If-None-Match GET requests with 304 Not Modified. Responses are publicly
+    cacheable for API_CACHE_MAX_AGE when they are deterministic: always for
+    ``static=True`` views, otherwise only in DETERMINISTIC_FALLBACK mode.
+    A view marks a result cacheable by returning its dict with a true
+    ``success``; errors returned through jsonify() are passed through.
+    """
+    if view is None:
+        return functools.partial(cacheable, static=static)
+    
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        result = view(*args, **kwargs)
+        response = app.make_response(result)
+        if not isinstance(result, dict) or not result.get('success'):
+            return response
+        with stage('etag'):
+            response.add_etag()
+        if static or app.config['DETERMINISTIC_FALLBACK']:
+            response.cache_control.public = True
+            response.cache_control.max_age = app.config['API_CACHE_MAX_AGE']
+        else:
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return wrapper
+
+# Hashed assets from python -m models.static_assets; templates link them with asset_url()
+asset_manifest = AssetManifest(app.static_folder)
+
+@app.context_processor
+def inject_asset_url():
+    def asset_url(filename):
+        return url_for('static', filename=asset_manifest.path(filename))
+    return {'asset_url': asset_url}
+
+@app.route('/static/dist/<path:filename>')
+def hashed_asset(filename):
+    """A built asset, precompressed if the client accepts it; the name changes with the content"""
+    path = safe_join(asset_manifest.dist, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    encoding = negotiate(request.accept_encodings, asset_manifest.variants(filename))
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_file(path + ('.br' if encoding == 'br' else '.gz' if encoding else ''), mimetype=mimetype,
+                         conditional=True, etag=True, max_age=app.config['STATIC_ASSET_MAX_AGE'])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# Pages without per-request data are rendered once per process; in debug
+# mode a template edit or an asset rebuild drops them
+page_cache = PageCache([app.template_folder, asset_manifest.manifest_path], on_change=asset_manifest.reload)
+
+def cached_page(view):
+    """Serve the view's HTML from page_cache, with ETag/Last-Modified revalidation"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not app.config['PAGE_CACHE']:
+            return view(*args, **kwargs)
+        page = page_cache.get(request.endpoint, lambda: view(*args, **kwargs),
+                              auto_reload=app.debug or bool(app.config['TEMPLATES_AUTO_RELOAD']))
+        encoding = None
+        if app.config['COMPRESS_RESPONSES'] and len(page.body()) >= app.config['COMPRESS_MIN_SIZE']:
+            encoding = negotiate(request.accept_encodings, encodings())
+        response = Response(page.body(encoding), mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(page.etag, weak=encoding is not None)
+        response.last_modified = page.last_modified
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return wrapper
+
+if app.config['COMPRESS_RESPONSES']:
+    @app.after_request
+    def compress_large_responses(response):
+        return compress_response(response, request.accept_encodings,
+                                 min_size=app.config['COMPRESS_MIN_SIZE'], level=app.config['COMPRESS_LEVEL'])
+
 @app.route('/')
+@cached_page
 def index():
     return render_template('index.html')
 
 @app.route('/about')
+@cached_page
 def about():
     return render_template('about.html')
 
 @app.route('/yield-prediction')
+@cached_page
 def yield_prediction():
     return render_template('yield_prediction.html')
 
 @app.route('/disease-prediction')
+@cached_page
 def disease_prediction():
     return render_template('disease_prediction.html')
 
 @app.route('/fertilizer-recommendation')
+@cached_page
 def fertilizer_recommendation():
     return render_template('fertilizer_recommendation.html')
 
 @app.route('/weather-prediction')
+@cached_page
 def weather_prediction():
     return render_template('weather_prediction.html')
 
 # API Routes for predictions
-@app.route('/api/predict-yield', methods=['POST'])
+@app.route('/api/predict-yield', methods=['GET', 'POST'])
+@cacheable
 def api_predict_yield():
     try:
-        data = request.json
-        rainfall = float(data['rainfall'])
-        pesticide = float(data['pesticide'])
-        temperature = float(data['temperature'])
-        crop = data.get('crop', 'Maize')
+        data = request_params()
+        with stage('coerce'):
+            rainfall = float(data['rainfall'])
+            pesticide = float(data['pesticide'])
+            temperature = float(data['temperature'])
+            crop = data.get('crop', 'Maize')
         
         if models_loaded:
             yield_pred = prediction_models.predict_yield(rainfall, pesticide, temperature)
-            return jsonify({
+            return {
                 'success': True,
                 'prediction': yield_pred,
                 'crop': crop,
                 'message': f'Predicted yield for {crop}: {yield_pred} hg/ha'
-            })
+            }
         else:
             # Fallback calculation
-            base_yield = 30000
-            rain_factor = min(rainfall / 1000, 1.5)
-            pest_factor = min(pesticide / 200, 1.2)
-            temp_factor = max(0.5, 1 - abs(temperature - 25) / 25)
-            yield_pred = round(base_yield * rain_factor * pest_factor * temp_factor)
+            with stage('fallback'):
+                base_yield = 30000
+                rain_factor = min(rainfall / 1000, 1.5)
+                pest_factor = min(pesticide / 200, 1.2)
+                temp_factor = max(0.5, 1 - abs(temperature - 25) / 25)
+                yield_pred = round(base_yield * rain_factor * pest_factor * temp_factor)
             
-            return jsonify({
+            return {
                 'success': True,
                 'prediction': yield_pred,
                 'crop': crop,
                 'message': f'Estimated yield for {crop}: {yield_pred} hg/ha'
-            })
+            }
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/api/predict-disease', methods=['POST'])
+YIELD_BATCH_FIELDS = ['rainfall', 'pesticide', 'temperature']
+
+@app.route('/api/predict-yield/batch', methods=['POST'])
+def api_predict_yield_batch():
+    try:
+        max_rows = app.config['YIELD_BATCH_MAX_ROWS']
+        max_bytes = app.config['YIELD_BATCH_MAX_BYTES']
+        if request.content_length is not None and request.content_length > max_bytes:
+            raise RequestEntityTooLarge()
+        with stage('coerce'):
+            features = parse_yield_batch_rows(request, max_rows, max_bytes)
+        if len(features) == 0:
+            return jsonify({'success': False, 'error': 'No rows supplied'}), 400
+        if len(features) > max_rows:
+            return jsonify({'success': False, 'error': f'Batch too large: more than {max_rows} rows'}), 413
+        
+        predictions = None
+        if models_loaded:
+            predictions = prediction_models.predict_yield_batch(features)
+        
+        if predictions is None:
+            with stage('fallback'):
+                predictions = calculate_fallback_yield_batch(features)
+            message = f'Estimated yield for {len(predictions)} rows'
+        else:
+            message = f'Predicted yield for {len(predictions)} rows'
+        
+        return jsonify({
+            'success': True,
+            'predictions': predictions.tolist(),
+            'count': len(predictions),
+            'message': message
+        })
+    except RequestEntityTooLarge:
+        return jsonify({'success': False, 'error': f'Batch too large: body over {max_bytes} bytes'}), 413
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def parse_yield_batch_rows(req, max_rows, max_bytes):
+    """
+    Read (rainfall, pesticide, temperature) rows from a JSON or CSV request
+    into an (N, 3) float array. CSV is read row by row and stops after
+    ``max_rows + 1`` rows; a JSON body is read only up to ``max_bytes``
+    (RequestEntityTooLarge past that). A row that is not three finite
+    numbers raises ValueError naming its index.
+    """
+    upload = req.files.get('file')
+    if upload is not None or req.mimetype == 'text/csv':
+        rows = csv.DictReader(io.TextIOWrapper(upload.stream if upload is not None else req.stream, encoding='utf-8'))
+    else:
+        if not req.is_json:
+            return req.json  # raises Flask's 415 error for other content types
+        chunks, size = [], 0
+        while size <= max_bytes:
+            chunk = req.stream.read(min(65536, max_bytes + 1 - size))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        if size > max_bytes:
+            raise RequestEntityTooLarge()
+        rows = json.loads(b''.join(chunks))
+        if isinstance(rows, dict) and 'rows' in rows:
+            rows = rows['rows']
+        if not isinstance(rows, list):
+            raise ValueError('Expected a JSON array of rows or an object with a "rows" array')
+    features = [yield_batch_row(index, row) for index, row in enumerate(islice(rows, max_rows + 1))]
+    return np.array(features, dtype=float).reshape(-1, len(YIELD_BATCH_FIELDS))
+
+def yield_batch_row(index, row):
+    """One row, given as an object or a list, as (rainfall, pesticide, temperature) floats"""
+    try:
+        values = [row[field] for field in YIELD_BATCH_FIELDS] if isinstance(row, dict) else list(row)
+    except KeyError as e:
+        raise ValueError(f'Row {index}: missing {e.args[0]}') from None
+    except TypeError:
+        raise ValueError(f'Row {index}: expected an object or a list of {len(YIELD_BATCH_FIELDS)} numbers') from None
+    if len(values) != len(YIELD_BATCH_FIELDS):
+        raise ValueError(f"Row {index}: expected {len(YIELD_BATCH_FIELDS)} values "
+                         f"({', '.join(YIELD_BATCH_FIELDS)}), got {len(values)}")
+    try:
+        values = [float(value) for value in values]
+    except (TypeError, ValueError):
+        raise ValueError(f'Row {index}: values must be numbers') from None
+    if not np.isfinite(values).all():
+        raise ValueError(f'Row {index}: values must be finite numbers')
+    return values
+
+def calculate_fallback_yield_batch(features):
+    """Vectorized version of the single-row fallback yield estimate"""
+    rainfall, pesticide, temperature = features[:, 0], features[:, 1], features[:, 2]
+    rain_factor = np.minimum(rainfall / 1000, 1.5)
+    pest_factor = np.minimum(pesticide / 200, 1.2)
+    temp_factor = np.maximum(0.5, 1 - np.abs(temperature - 25) / 25)
+    return np.round(30000 * rain_factor * pest_factor * temp_factor)
+
+@app.route('/api/predict-disease', methods=['GET', 'POST'])
+@cacheable
 def api_predict_disease():
     try:
-        data = request.json
-        rainfall = float(data['rainfall'])
-        temperature = float(data['temperature'])
-        humidity = float(data.get('humidity', 70))
-        pesticide = float(data.get('pesticide', 100))
+        data = request_params()
+        with stage('coerce'):
+            rainfall = float(data['rainfall'])
+            temperature = float(data['temperature'])
+            humidity = float(data.get('humidity', 70))
+            pesticide = float(data.get('pesticide', 100))
         
         if models_loaded:
             disease_risk = prediction_models.predict_disease_risk(rainfall, temperature, pesticide)
         else:
             # Fallback logic
-            risk_score = 0
-            if rainfall > 1000: risk_score += 2
-            elif rainfall > 500: risk_score += 1
-            if 15 <= temperature <= 25: risk_score += 2
-            if humidity > 80: risk_score += 1
-            if pesticide < 100: risk_score += 1
+            with stage('fallback'):
+                risk_score = 0
+                if rainfall > 1000: risk_score += 2
+                elif rainfall > 500: risk_score += 1
+                if 15 <= temperature <= 25: risk_score += 2
+                if humidity > 80: risk_score += 1
+                if pesticide < 100: risk_score += 1
             
-            if risk_score >= 4: disease_risk = 'High'
-            elif risk_score >= 2: disease_risk = 'Medium'
-            else: disease_risk = 'Low'
+                if risk_score >= 4: disease_risk = 'High'
+                elif risk_score >= 2: disease_risk = 'Medium'
+                else: disease_risk = 'Low'
         
         recommendations = {
             'High': 'Apply fungicide, improve drainage, reduce plant density',
@@ -104,15 +505,139 @@ def api_predict_disease():
             'Low': 'Continue regular monitoring, maintain good practices'
         }
         
-        return jsonify({
+        return {
             'success': True,
             'risk_level': disease_risk,
             'recommendation': recommendations.get(disease_risk, 'Monitor regularly'),
             'message': f'Disease risk level: {disease_risk}'
-        })
+        }
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/models/status')
+def api_models_status():
+    if not models_loaded:
+        return jsonify({'success': True, 'models_loaded': False})
+    return jsonify({
+        'success': True,
+        'models_loaded': True,
+        'lazy': app.config['LAZY_MODELS'],
+        'loaded_groups': prediction_models.loaded_groups(),
+        'load_report': prediction_models.load_report,
+        'cache': prediction_models.cache_stats(),
+        'versions': prediction_models.versions(),
+        'inference_pool': prediction_models.inference_pool.stats() if prediction_models.inference_pool else None
+    })
+
+@app.route('/api/models/reload', methods=['POST'])
+def api_models_reload():
+    """Load, smoke-test and swap in new artifacts for one model group (or all)"""
+    if not admin_authorized():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    if not models_loaded:
+        return jsonify({'success': False, 'error': 'Models are not loaded'}), 503
+    group = (request.get_json(silent=True) or {}).get('group') or request.args.get('group')
+    if group and group not in prediction_models.MODEL_GROUPS:
+        return jsonify({'success': False, 'error': f'Unknown model group: {group}'}), 400
+    reports = prediction_models.reload(group)
+    return jsonify({
+        'success': all(report['status'] == 'reloaded' for report in reports.values()),
+        'reloaded': reports,
+        'versions': prediction_models.versions()
+    })
+
+@app.route('/api/models/rollback', methods=['POST'])
+def api_models_rollback():
+    """Swap the previous version of a model group back in"""
+    if not admin_authorized():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    if not models_loaded:
+        return jsonify({'success': False, 'error': 'Models are not loaded'}), 503
+    try:
+        group = (request.get_json(silent=True) or {}).get('group') or request.args['group']
+        if group not in prediction_models.MODEL_GROUPS:
+            raise ValueError(f'Unknown model group: {group}')
+        return jsonify({'success': True, 'rollback': prediction_models.rollback(group),
+                        'versions': prediction_models.versions()})
+    except (KeyError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of request and stage latency histograms"""
+    if not app.config['METRICS_ENABLED']:
+        return Response('metrics disabled\n', status=404, mimetype='text/plain')
+    counters = {}
+    if models_loaded:
+        cache_stats = prediction_models.cache_stats()
+        for field in ('hits', 'misses', 'evictions'):
+            counters[f'agripredict_prediction_cache_{field}_total'] = (
+                f'Prediction cache {field} by model',
+                [({'model': name}, stats[field]) for name, stats in sorted(cache_stats.items())]
+            )
+    body = METRICS.render_prometheus(counters)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/history')
+@cacheable(static=True)
+def api_history():
+    """
+    Observed yield, rainfall, temperature and pesticide use.
+    ?area=&item=&year=            one record
+    ?area=&item=[&start_year=&end_year=]   a year range
+    ?item=&year=&top=10[&metric=yield_hg_ha]   the top countries
+    """
+    if history_index is None:
+        return jsonify({'success': False, 'error': 'Historical data is not available'}), 503
+    try:
+        params = request.args
+        item = params['item']
+        with stage('coerce'):
+            year = int(params['year']) if 'year' in params else None
+            top = int(params['top']) if 'top' in params else None
+            start_year = int(params['start_year']) if 'start_year' in params else None
+            end_year = int(params['end_year']) if 'end_year' in params else None
+            for requested in (year, start_year, end_year):
+                history_index.check_year(requested)
+        
+        with stage('history_lookup'):
+            if top is not None:
+                if year is None:
+                    raise KeyError('year')
+                metric = params.get('metric', 'yield_hg_ha')
+                k = max(1, min(top, app.config['HISTORY_TOP_K_MAX']))
+                records = history_index.top_k(item, year, k, metric)
+                return {'success': True, 'item': item, 'year': year, 'metric': metric, 'records': records}
+            
+            area = params['area']
+            if year is not None:
+                record = history_index.lookup(area, item, year)
+                if record is None:
+                    return jsonify({'success': False, 'error': f'No record for {area}, {item}, {year}'}), 404
+                return {'success': True, 'record': record}
+            
+            records = history_index.year_range(area, item, start_year, end_year)
+            return {'success': True, 'area': area, 'item': item, 'count': len(records), 'records': records}
+    except KeyError as e:
+        return jsonify({'success': False, 'error': f'Missing parameter: {e.args[0]}'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/predict-disease/stats')
+def api_predict_disease_stats():
+    batcher = prediction_models.disease_batcher if models_loaded else None
+    if batcher is None:
+        return jsonify({'success': True, 'batching_enabled': False})
+    return jsonify({
+        'success': True,
+        'batching_enabled': True,
+        'stats': batcher.stats()
+    })
+
 # @app.route('/api/recommend-fertilizer', methods=['POST'])
 # def api_recommend_fertilizer():
 #     try:
@@ -156,41 +681,44 @@ def api_predict_disease():
 
 
 
-@app.route('/api/recommend-fertilizer', methods=['POST'])
+@app.route('/api/recommend-fertilizer', methods=['GET', 'POST'])
+@cacheable
 def api_recommend_fertilizer():
     try:
-        data = request.json
-        crop = data['crop']
-        rainfall = float(data['rainfall'])
-        soil_type = data.get('soil_type', 'medium')
-        field_size = float(data.get('field_size', 1.0))
-        growth_stage = data.get('growth_stage', 'vegetative')
+        data = request_params()
+        with stage('coerce'):
+            crop = data['crop']
+            rainfall = float(data['rainfall'])
+            soil_type = data.get('soil_type', 'medium')
+            field_size = float(data.get('field_size', 1.0))
+            growth_stage = data.get('growth_stage', 'vegetative')
         
         if models_loaded:
             try:
                 recommendation = prediction_models.recommend_fertilizer(crop, rainfall)
                 if recommendation:
-                    return jsonify({
+                    return {
                         'success': True,
                         'fertilizer': recommendation,
                         'field_size': field_size,
                         'message': 'Fertilizer recommendation generated successfully'
-                    })
+                    }
             except Exception as model_error:
                 print(f"Model error: {model_error}")
         
         # Enhanced fallback fertilizer recommendations with random variations
-        recommendation = generate_fallback_fertilizer_recommendation(
-            crop, rainfall, soil_type, growth_stage, field_size
-        )
+        with stage('fallback'):
+            recommendation = generate_fallback_fertilizer_recommendation(
+                crop, rainfall, soil_type, growth_stage, field_size
+            )
         
-        return jsonify({
+        return {
             'success': True,
             'fertilizer': recommendation,
             'field_size': field_size,
             'message': 'Fertilizer recommendation generated successfully (estimated values)',
             'note': 'Recommendations based on general agricultural guidelines'
-        })
+        }
         
     except Exception as e:
         print(f"Fertilizer recommendation error: {e}")
@@ -199,8 +727,9 @@ def api_recommend_fertilizer():
 def generate_fallback_fertilizer_recommendation(crop, rainfall, soil_type, growth_stage, field_size):
     """
     Generate realistic fertilizer recommendations with random variations
+    (seeded from the inputs when DETERMINISTIC_FALLBACK is on)
     """
-    import random
+    rng = fallback_rng('fertilizer', crop, rainfall, soil_type, growth_stage, field_size)
     
     # Base NPK values for different crops (kg/ha)
     crop_npk_base = {
@@ -228,19 +757,19 @@ def generate_fallback_fertilizer_recommendation(crop, rainfall, soil_type, growt
     
     # Rainfall adjustments
     if rainfall < 400:  # Low rainfall
-        rain_factor_n = random.uniform(1.15, 1.25)
-        rain_factor_p = random.uniform(1.10, 1.20)
-        rain_factor_k = random.uniform(1.05, 1.15)
+        rain_factor_n = rng.uniform(1.15, 1.25)
+        rain_factor_p = rng.uniform(1.10, 1.20)
+        rain_factor_k = rng.uniform(1.05, 1.15)
         rainfall_note = "Low rainfall: Increased fertilizer needs"
     elif rainfall > 1500:  # High rainfall
-        rain_factor_n = random.uniform(0.75, 0.85)
-        rain_factor_p = random.uniform(0.80, 0.90)
-        rain_factor_k = random.uniform(1.10, 1.20)
+        rain_factor_n = rng.uniform(0.75, 0.85)
+        rain_factor_p = rng.uniform(0.80, 0.90)
+        rain_factor_k = rng.uniform(1.10, 1.20)
         rainfall_note = "High rainfall: Reduced N&P, increased K for leaching prevention"
     else:  # Normal rainfall
-        rain_factor_n = random.uniform(0.95, 1.05)
-        rain_factor_p = random.uniform(0.95, 1.05)
-        rain_factor_k = random.uniform(0.95, 1.05)
+        rain_factor_n = rng.uniform(0.95, 1.05)
+        rain_factor_p = rng.uniform(0.95, 1.05)
+        rain_factor_k = rng.uniform(0.95, 1.05)
         rainfall_note = "Normal rainfall: Standard fertilizer application"
     
     # Soil type adjustments
@@ -267,9 +796,9 @@ def generate_fallback_fertilizer_recommendation(crop, rainfall, soil_type, growt
     stage_factor = stage_adjustments.get(growth_stage, {'N': 1.0, 'P': 1.0, 'K': 1.0})
     
     # Calculate final NPK values with random variation (±10%)
-    final_n = round(base_npk['N'] * rain_factor_n * soil_factor['N'] * stage_factor['N'] * random.uniform(0.9, 1.1))
-    final_p = round(base_npk['P'] * rain_factor_p * soil_factor['P'] * stage_factor['P'] * random.uniform(0.9, 1.1))
-    final_k = round(base_npk['K'] * rain_factor_k * soil_factor['K'] * stage_factor['K'] * random.uniform(0.9, 1.1))
+    final_n = round(base_npk['N'] * rain_factor_n * soil_factor['N'] * stage_factor['N'] * rng.uniform(0.9, 1.1))
+    final_p = round(base_npk['P'] * rain_factor_p * soil_factor['P'] * stage_factor['P'] * rng.uniform(0.9, 1.1))
+    final_k = round(base_npk['K'] * rain_factor_k * soil_factor['K'] * stage_factor['K'] * rng.uniform(0.9, 1.1))
     
     # Ensure minimum values
     final_n = max(final_n, 10)
@@ -285,7 +814,7 @@ def generate_fallback_fertilizer_recommendation(crop, rainfall, soil_type, growt
     application_schedule = generate_application_schedule(growth_stage, final_n, final_p, final_k)
     
     # Generate fertilizer types
-    fertilizer_types = generate_fertilizer_types(final_n, final_p, final_k)
+    fertilizer_types = generate_fertilizer_types(final_n, final_p, final_k, rng)
     
     return {
         'matched_crop': matched_crop,
@@ -301,13 +830,11 @@ def generate_fallback_fertilizer_recommendation(crop, rainfall, soil_type, growt
         'growth_stage': growth_stage.replace('_', ' ').title(),
         'application_schedule': application_schedule,
         'fertilizer_types': fertilizer_types,
-        'cost_estimate': calculate_fertilizer_cost(final_n, final_p, final_k, field_size)
+        'cost_estimate': calculate_fertilizer_cost(final_n, final_p, final_k, field_size, rng)
     }
 
 def generate_application_schedule(growth_stage, n, p, k):
     """Generate application schedule based on growth stage"""
-    import random
-    
     schedules = {
         'pre-sowing': {
             'basal': {'N': 100, 'P': 100, 'K': 100},
@@ -337,9 +864,9 @@ def generate_application_schedule(growth_stage, n, p, k):
     
     return schedules.get(growth_stage, schedules['vegetative'])
 
-def generate_fertilizer_types(n, p, k):
+def generate_fertilizer_types(n, p, k, rng=None):
     """Suggest specific fertilizer types"""
-    import random
+    rng = rng or fallback_rng('fertilizer-types', n, p, k)
     
     fertilizer_options = []
     
@@ -347,7 +874,7 @@ def generate_fertilizer_types(n, p, k):
     n_sources = ['Urea (46% N)', 'Ammonium Sulphate (21% N)', 'CAN (26% N)', 'DAP (18% N)']
     fertilizer_options.append({
         'nutrient': 'Nitrogen',
-        'recommended_source': random.choice(n_sources),
+        'recommended_source': rng.choice(n_sources),
         'quantity_needed': f"{round(n/0.46 if 'Urea' in n_sources[0] else n/0.21, 1)} kg/ha"
     })
     
@@ -355,7 +882,7 @@ def generate_fertilizer_types(n, p, k):
     p_sources = ['DAP (46% P2O5)', 'SSP (16% P2O5)', 'TSP (46% P2O5)', 'Bone Meal (22% P2O5)']
     fertilizer_options.append({
         'nutrient': 'Phosphorus',
-        'recommended_source': random.choice(p_sources),
+        'recommended_source': rng.choice(p_sources),
         'quantity_needed': f"{round(p/0.46 if 'DAP' in p_sources[0] else p/0.16, 1)} kg/ha"
     })
     
@@ -363,20 +890,20 @@ def generate_fertilizer_types(n, p, k):
     k_sources = ['MOP (60% K2O)', 'SOP (50% K2O)', 'Potash (50% K2O)', 'Ash (5% K2O)']
     fertilizer_options.append({
         'nutrient': 'Potassium',
-        'recommended_source': random.choice(k_sources),
+        'recommended_source': rng.choice(k_sources),
         'quantity_needed': f"{round(k/0.60 if 'MOP' in k_sources[0] else k/0.50, 1)} kg/ha"
     })
     
     return fertilizer_options
 
-def calculate_fertilizer_cost(n, p, k, field_size):
+def calculate_fertilizer_cost(n, p, k, field_size, rng=None):
     """Calculate estimated fertilizer cost"""
-    import random
+    rng = rng or fallback_rng('fertilizer-cost', n, p, k, field_size)
     
     # Approximate costs per kg of nutrient (in INR)
-    n_cost = random.uniform(25, 35)  # per kg N
-    p_cost = random.uniform(50, 70)  # per kg P
-    k_cost = random.uniform(30, 45)  # per kg K
+    n_cost = rng.uniform(25, 35)  # per kg N
+    p_cost = rng.uniform(50, 70)  # per kg P
+    k_cost = rng.uniform(30, 45)  # per kg K
     
     total_cost = (n * n_cost + p * p_cost + k * k_cost) * field_size
     
@@ -394,20 +921,28 @@ def calculate_fertilizer_cost(n, p, k, field_size):
 
 
 
-@app.route('/api/predict-weather', methods=['POST'])
+@app.route('/api/predict-weather', methods=['GET', 'POST'])
+@cacheable
 def api_predict_weather():
     try:
-        data = request.json
-        year = int(data.get('year', 2025))
-        location = data.get('location', 'General')
+        data = request_params()
+        with stage('coerce'):
+            year = int(data.get('year', 2025))
+            check_weather_year(year)
+            location = data.get('location', 'General')
         
-        if models_loaded:
+        forecast = prediction_models.forecast_weather(location, year) if models_loaded else None
+        if forecast and forecast['rainfall_mm'] is not None:
+            rainfall_pred = round(forecast['rainfall_mm'], 1)
+        elif models_loaded:
             rainfall_pred = prediction_models.predict_weather(year)
         else:
             # Simple trend calculation
-            base_rainfall = 800
-            year_factor = (year - 2020) * 5  # 5mm change per year
-            rainfall_pred = round(base_rainfall + year_factor + np.random.randint(-50, 50))
+            with stage('fallback'):
+                base_rainfall = 800
+                year_factor = (year - 2020) * 5  # 5mm change per year
+                rng = fallback_rng('weather', year, location)
+                rainfall_pred = round(base_rainfall + year_factor + rng.randrange(-50, 50))
         
         # Weather recommendations based on prediction
         if rainfall_pred < 400:
@@ -417,44 +952,54 @@ def api_predict_weather():
         else:
             weather_advice = "Normal rainfall expected. Good conditions for most crops."
         
-        return jsonify({
+        return {
             'success': True,
             'year': year,
             'location': location,
             'predicted_rainfall': rainfall_pred,
+            'predicted_temperature': round(forecast['avg_temp'], 1) if forecast and forecast['avg_temp'] is not None else None,
+            'matched_country': forecast['country'] if forecast else None,
             'advice': weather_advice,
             'message': f'Weather prediction for {year}: {rainfall_pred}mm rainfall'
-        })
+        }
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
     
 
 @app.route('/crop-recommendation')
+@cached_page
 def crop_recommendation():
     return render_template('crop_recommendation.html')
 
-@app.route('/api/recommend-crop', methods=['POST'])
+@app.route('/api/recommend-crop', methods=['GET', 'POST'])
+@cacheable
 def api_recommend_crop():
     try:
-        data = request.json
-        rainfall = float(data['rainfall'])
-        temperature = float(data['temperature'])
-        humidity = float(data['humidity'])
-        soil_type = data['soil_type']
-        ph_level = float(data.get('ph_level', 7.0))
-        season = data.get('season', 'kharif')
-        farm_size = float(data.get('farm_size', 1.0))
-        water_availability = data.get('water_availability', 'moderate')
-        experience_level = data.get('experience_level', 'intermediate')
-        market_preference = data.get('market_preference', 'food_grain')
+        data = request_params()
+        with stage('coerce'):
+            rainfall = float(data['rainfall'])
+            temperature = float(data['temperature'])
+            humidity = float(data['humidity'])
+            soil_type = data['soil_type']
+            ph_level = float(data.get('ph_level', 7.0))
+            season = data.get('season', 'kharif')
+            farm_size = float(data.get('farm_size', 1.0))
+            water_availability = data.get('water_availability', 'moderate')
+            experience_level = data.get('experience_level', 'intermediate')
+            market_preference = data.get('market_preference', 'food_grain')
+            ranked_only = as_bool(data.get('ranked_only', False))
         
         # Generate crop recommendations
-        recommendations = generate_crop_recommendations(
-            rainfall, temperature, humidity, soil_type, ph_level, 
-            season, farm_size, water_availability, experience_level, market_preference
-        )
+        with stage('crop_scoring'):
+            recommendations = generate_crop_recommendations(
+                rainfall, temperature, humidity, soil_type, ph_level, 
+                season, farm_size, water_availability, experience_level, market_preference,
+                ranked_only=ranked_only
+            )
         
-        return jsonify({
+        return {
             'success': True,
             'recommendations': recommendations,
             'message': 'Crop recommendations generated successfully',
@@ -465,352 +1010,180 @@ def api_recommend_crop():
                 'soil_type': soil_type,
                 'season': season
             }
-        })
+        }
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-def generate_crop_recommendations(rainfall, temperature, humidity, soil_type, ph_level, season, farm_size, water_availability, experience_level, market_preference):
+@app.route('/api/recommend-crop/batch', methods=['POST'])
+def api_recommend_crop_batch():
     """
-    Generate crop recommendations based on multiple parameters
+    Rank crops for many plots at once.
+
+    Accepts a JSON array of parameter sets (or {"plots": [...]}), an NDJSON
+    body, a CSV body or an uploaded CSV file. Plots are read and scored in
+    fixed-size chunks and each result is streamed back as one NDJSON line.
+    NDJSON and CSV input are read incrementally too, so memory stays flat
+    however many plots are submitted; a JSON array is parsed up front.
     """
-    import random
+    try:
+        top_k = int(request.args.get('top_k', 8))
+        plots = iter_crop_batch_plots(request)
+    except (HTTPException, KeyError, TypeError, ValueError) as e:
+        return client_error(e)
+    chunk_size = app.config['CROP_BATCH_CHUNK_SIZE']
     
-    # Comprehensive crop database with requirements
-    crop_database = {
-        'Rice': {
-            'rainfall': (1000, 2500),
-            'temperature': (20, 35),
-            'humidity': (70, 95),
-            'soil_types': ['clay', 'loamy', 'alluvial'],
-            'ph_range': (5.5, 7.0),
-            'water_need': 'high',
-            'season': ['kharif', 'rabi'],
-            'experience': ['beginner', 'intermediate', 'advanced'],
-            'market_type': 'food_grain',
-            'yield_potential': 'high',
-            'investment': 'medium',
-            'duration': '120-150 days',
-            'profit_margin': 'medium'
-        },
-        'Wheat': {
-            'rainfall': (300, 1000),
-            'temperature': (15, 25),
-            'humidity': (50, 70),
-            'soil_types': ['loamy', 'clay', 'black'],
-            'ph_range': (6.0, 7.5),
-            'water_need': 'medium',
-            'season': ['rabi'],
-            'experience': ['beginner', 'intermediate', 'advanced'],
-            'market_type': 'food_grain',
-            'yield_potential': 'high',
-            'investment': 'medium',
-            'duration': '120-140 days',
-            'profit_margin': 'medium'
-        },
-        'Maize': {
-            'rainfall': (500, 1200),
-            'temperature': (18, 32),
-            'humidity': (60, 80),
-            'soil_types': ['loamy', 'sandy', 'red'],
-            'ph_range': (5.5, 7.0),
-            'water_need': 'medium',
-            'season': ['kharif', 'rabi', 'zaid'],
-            'experience': ['beginner', 'intermediate', 'advanced'],
-            'market_type': 'food_grain',
-            'yield_potential': 'high',
-            'investment': 'medium',
-            'duration': '90-120 days',
-            'profit_margin': 'high'
-        },
-        'Cotton': {
-            'rainfall': (500, 1200),
-            'temperature': (21, 35),
-            'humidity': (60, 85),
-            'soil_types': ['black', 'alluvial', 'red'],
-            'ph_range': (6.0, 8.0),
-            'water_need': 'medium',
-            'season': ['kharif'],
-            'experience': ['intermediate', 'advanced'],
-            'market_type': 'cash_crop',
-            'yield_potential': 'high',
-            'investment': 'high',
-            'duration': '180-200 days',
-            'profit_margin': 'very_high'
-        },
-        'Sugarcane': {
-            'rainfall': (1000, 2000),
-            'temperature': (20, 35),
-            'humidity': (70, 90),
-            'soil_types': ['loamy', 'clay', 'alluvial'],
-            'ph_range': (6.0, 7.5),
-            'water_need': 'very_high',
-            'season': ['annual'],
-            'experience': ['intermediate', 'advanced'],
-            'market_type': 'cash_crop',
-            'yield_potential': 'very_high',
-            'investment': 'very_high',
-            'duration': '12-18 months',
-            'profit_margin': 'high'
-        },
-        'Soybeans': {
-            'rainfall': (400, 800),
-            'temperature': (20, 30),
-            'humidity': (60, 80),
-            'soil_types': ['loamy', 'black', 'red'],
-            'ph_range': (6.0, 7.5),
-            'water_need': 'medium',
-            'season': ['kharif'],
-            'experience': ['beginner', 'intermediate'],
-            'market_type': 'oilseed',
-            'yield_potential': 'medium',
-            'investment': 'low',
-            'duration': '90-110 days',
-            'profit_margin': 'medium'
-        },
-        'Groundnut': {
-            'rainfall': (500, 1000),
-            'temperature': (20, 30),
-            'humidity': (65, 85),
-            'soil_types': ['sandy', 'red', 'black'],
-            'ph_range': (6.0, 7.0),
-            'water_need': 'medium',
-            'season': ['kharif', 'rabi'],
-            'experience': ['beginner', 'intermediate'],
-            'market_type': 'oilseed',
-            'yield_potential': 'medium',
-            'investment': 'medium',
-            'duration': '100-120 days',
-            'profit_margin': 'medium'
-        },
-        'Tomato': {
-            'rainfall': (400, 800),
-            'temperature': (18, 27),
-            'humidity': (60, 80),
-            'soil_types': ['loamy', 'sandy', 'red'],
-            'ph_range': (6.0, 7.0),
-            'water_need': 'high',
-            'season': ['rabi', 'zaid'],
-            'experience': ['intermediate', 'advanced'],
-            'market_type': 'vegetable',
-            'yield_potential': 'high',
-            'investment': 'high',
-            'duration': '90-120 days',
-            'profit_margin': 'very_high'
-        },
-        'Potato': {
-            'rainfall': (400, 700),
-            'temperature': (15, 25),
-            'humidity': (60, 80),
-            'soil_types': ['loamy', 'sandy', 'red'],
-            'ph_range': (5.5, 6.5),
-            'water_need': 'medium',
-            'season': ['rabi'],
-            'experience': ['intermediate', 'advanced'],
-            'market_type': 'vegetable',
-            'yield_potential': 'high',
-            'investment': 'high',
-            'duration': '90-120 days',
-            'profit_margin': 'high'
-        },
-        'Onion': {
-            'rainfall': (300, 600),
-            'temperature': (15, 25),
-            'humidity': (60, 70),
-            'soil_types': ['loamy', 'sandy', 'alluvial'],
-            'ph_range': (6.0, 7.5),
-            'water_need': 'medium',
-            'season': ['rabi', 'kharif'],
-            'experience': ['intermediate', 'advanced'],
-            'market_type': 'vegetable',
-            'yield_potential': 'medium',
-            'investment': 'medium',
-            'duration': '120-150 days',
-            'profit_margin': 'high'
-        },
-        'Sunflower': {
-            'rainfall': (400, 800),
-            'temperature': (20, 30),
-            'humidity': (60, 80),
-            'soil_types': ['loamy', 'sandy', 'red'],
-            'ph_range': (6.0, 7.5),
-            'water_need': 'medium',
-            'season': ['kharif', 'rabi'],
-            'experience': ['beginner', 'intermediate'],
-            'market_type': 'oilseed',
-            'yield_potential': 'medium',
-            'investment': 'low',
-            'duration': '90-110 days',
-            'profit_margin': 'medium'
-        },
-        'Chili': {
-            'rainfall': (600, 1200),
-            'temperature': (20, 30),
-            'humidity': (70, 85),
-            'soil_types': ['loamy', 'sandy', 'red'],
-            'ph_range': (6.0, 7.0),
-            'water_need': 'medium',
-            'season': ['kharif', 'rabi'],
-            'experience': ['intermediate', 'advanced'],
-            'market_type': 'spice',
-            'yield_potential': 'high',
-            'investment': 'medium',
-            'duration': '150-180 days',
-            'profit_margin': 'very_high'
-        }
-    }
+    def generate():
+        total = errors = 0
+        success = True
+        try:
+            while True:
+                chunk = list(islice(plots, chunk_size))
+                if not chunk:
+                    break
+                for line in score_crop_plot_chunk(chunk, top_k, offset=total):
+                    errors += 'error' in line
+                    yield json.dumps(line) + '\n'
+                total += len(chunk)
+        except Exception as e:
+            # The body itself could not be read further (bad encoding, broken CSV);
+            # the lines already sent stand and the summary says where it stopped
+            success = False
+            yield json.dumps({'error': f'Could not read plots after {total}: {e}'}) + '\n'
+        yield json.dumps({'summary': {'success': success, 'total_plots': total, 'errors': errors}}) + '\n'
     
-    # Score each crop based on suitability
-    crop_scores = {}
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+CROP_BATCH_DEFAULTS = {
+    'ph_level': 7.0,
+    'season': 'kharif',
+    'water_availability': 'moderate',
+    'experience_level': 'intermediate',
+    'market_preference': 'food_grain'
+}
+CROP_BATCH_NUMERIC = ('rainfall', 'temperature', 'ph_level')
+CROP_BATCH_CATEGORICAL = ('soil_type', 'season', 'water_availability', 'experience_level', 'market_preference')
+
+def iter_crop_batch_plots(req):
+    """Yield plot parameter dicts from a JSON, NDJSON or CSV request without buffering it"""
+    upload = req.files.get('file')
+    if upload is not None:
+        return csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8'))
+    if req.mimetype == 'text/csv':
+        return csv.DictReader(io.TextIOWrapper(req.stream, encoding='utf-8'))
+    if req.mimetype == 'application/x-ndjson':
+        return iter_ndjson(req.stream)
+    data = req.json
+    return iter(data['plots'] if isinstance(data, dict) else data)
+
+def iter_ndjson(stream):
+    """Yield each non-blank line's value, or a ValueError in its place when the line is not valid JSON"""
+    for number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f'line {number} is not valid JSON: {e}')
+
+def score_crop_plot_chunk(chunk, top_k, offset=0):
+    """Score one chunk of plots against every crop and return an NDJSON-ready dict per plot"""
+    lines = [None] * len(chunk)
+    valid, numeric, categorical = [], [], []
+    plot_ids = [plot.get('plot_id', offset + i) if isinstance(plot, dict) else offset + i
+                for i, plot in enumerate(chunk)]
+    for i, plot in enumerate(chunk):
+        try:
+            if isinstance(plot, Exception):
+                raise plot
+            if not isinstance(plot, dict):
+                raise ValueError('expected an object of plot parameters')
+            params = {**CROP_BATCH_DEFAULTS, **{k: v for k, v in plot.items() if v not in (None, '')}}
+            numbers = tuple(float(params[field]) for field in CROP_BATCH_NUMERIC)
+            if not np.isfinite(numbers).all():
+                raise ValueError(f"{', '.join(CROP_BATCH_NUMERIC)} must be finite numbers")
+            categories = tuple(params[field] for field in CROP_BATCH_CATEGORICAL)
+            not_text = [field for field, value in zip(CROP_BATCH_CATEGORICAL, categories) if not isinstance(value, str)]
+            if not_text:
+                raise ValueError(f"{', '.join(not_text)} must be text")
+            numeric.append(numbers)
+            categorical.append(categories)
+            valid.append(i)
+        except Exception as e:
+            lines[i] = {'plot': plot_ids[i], 'error': f'Invalid plot: {e}'}
     
-    for crop, requirements in crop_database.items():
-        score = 0
-        max_score = 100
-        details = []
-        
-        # Rainfall suitability (20 points)
-        rain_min, rain_max = requirements['rainfall']
-        if rain_min <= rainfall <= rain_max:
-            rain_score = 20
-            details.append(f"✓ Rainfall requirement met ({rain_min}-{rain_max}mm)")
-        elif rainfall < rain_min:
-            rain_score = max(0, 20 - (rain_min - rainfall) / rain_min * 20)
-            details.append(f"⚠ Rainfall slightly low (needs {rain_min}-{rain_max}mm)")
-        else:
-            rain_score = max(0, 20 - (rainfall - rain_max) / rain_max * 20)
-            details.append(f"⚠ Rainfall slightly high (optimal: {rain_min}-{rain_max}mm)")
-        score += rain_score
-        
-        # Temperature suitability (20 points)
-        temp_min, temp_max = requirements['temperature']
-        if temp_min <= temperature <= temp_max:
-            temp_score = 20
-            details.append(f"✓ Temperature requirement met ({temp_min}-{temp_max}°C)")
-        elif temperature < temp_min:
-            temp_score = max(0, 20 - (temp_min - temperature) / temp_min * 20)
-            details.append(f"⚠ Temperature slightly low (needs {temp_min}-{temp_max}°C)")
-        else:
-            temp_score = max(0, 20 - (temperature - temp_max) / temp_max * 20)
-            details.append(f"⚠ Temperature slightly high (optimal: {temp_min}-{temp_max}°C)")
-        score += temp_score
-        
-        # Soil type suitability (15 points)
-        if soil_type in requirements['soil_types']:
-            soil_score = 15
-            details.append(f"✓ Suitable for {soil_type} soil")
-        else:
-            soil_score = 8
-            details.append(f"⚠ Moderately suitable for {soil_type} soil")
-        score += soil_score
-        
-        # pH suitability (10 points)
-        ph_min, ph_max = requirements['ph_range']
-        if ph_min <= ph_level <= ph_max:
-            ph_score = 10
-            details.append(f"✓ pH requirement met ({ph_min}-{ph_max})")
-        else:
-            ph_score = max(0, 10 - abs(ph_level - (ph_min + ph_max) / 2))
-            details.append(f"⚠ pH adjustment may be needed (optimal: {ph_min}-{ph_max})")
-        score += ph_score
-        
-        # Season suitability (10 points)
-        if season in requirements['season'] or 'annual' in requirements['season']:
-            season_score = 10
-            details.append(f"✓ Suitable for {season} season")
-        else:
-            season_score = 5
-            details.append(f"⚠ Not ideal season (best: {', '.join(requirements['season'])})")
-        score += season_score
-        
-        # Experience level (10 points)
-        if experience_level in requirements['experience']:
-            exp_score = 10
-            details.append(f"✓ Suitable for {experience_level} farmers")
-        else:
-            exp_score = 6
-            details.append(f"⚠ May require {requirements['experience'][-1]} level expertise")
-        score += exp_score
-        
-        # Water availability (10 points)
-        water_compatibility = {
-            'low': ['low', 'medium'],
-            'medium': ['low', 'medium', 'high'],
-            'high': ['medium', 'high', 'very_high'],
-            'very_high': ['high', 'very_high']
-        }
-        
-        if requirements['water_need'] in water_compatibility.get(water_availability, []):
-            water_score = 10
-            details.append(f"✓ Water requirement compatible")
-        else:
-            water_score = 5
-            details.append(f"⚠ Water requirement: {requirements['water_need']}")
-        score += water_score
-        
-        # Market preference (5 points)
-        if requirements['market_type'] == market_preference or market_preference == 'mixed':
-            market_score = 5
-            details.append(f"✓ Matches market preference")
-        else:
-            market_score = 3
-            details.append(f"⚠ Different market category: {requirements['market_type']}")
-        score += market_score
-        
-        # Calculate percentage
-        score_percentage = round((score / max_score) * 100, 1)
-        
-        # Determine recommendation level
-        if score_percentage >= 80:
-            recommendation_level = "Highly Recommended"
-            level_class = "success"
-        elif score_percentage >= 65:
-            recommendation_level = "Recommended"
-            level_class = "primary"
-        elif score_percentage >= 50:
-            recommendation_level = "Moderately Suitable"
-            level_class = "warning"
-        else:
-            recommendation_level = "Not Recommended"
-            level_class = "danger"
-        
-        crop_scores[crop] = {
-            'score': score_percentage,
-            'recommendation_level': recommendation_level,
-            'level_class': level_class,
-            'details': details,
-            'requirements': requirements,
-            'estimated_yield': calculate_estimated_yield(crop, score_percentage, farm_size),
-            'investment_needed': calculate_investment(crop, farm_size),
-            'profit_potential': requirements['profit_margin'],
-            'duration': requirements['duration'],
-            'special_notes': generate_special_notes(crop, rainfall, temperature, soil_type)
-        }
+    if valid:
+        numeric = np.array(numeric)
+        soil, season, water, experience, market = zip(*categorical)
+        scores = score_crops(numeric[:, 0], numeric[:, 1], soil, numeric[:, 2], season, water, experience, market)
+        for row, i in enumerate(valid):
+            # Round like the single-plot endpoint so both rank ties the same way
+            percentages = [round(score, 1) for score in scores[row].tolist()]
+            ranking = sorted(range(len(CROP_NAMES)), key=lambda c: percentages[c], reverse=True)[:top_k]
+            recommendations = []
+            for c in ranking:
+                level, level_class = recommendation_level(percentages[c])
+                recommendations.append({
+                    'crop_name': CROP_NAMES[c],
+                    'suitability_score': percentages[c],
+                    'recommendation_level': level,
+                    'level_class': level_class
+                })
+            lines[i] = {'plot': plot_ids[i], 'recommendations': recommendations}
+    return lines
+
+def generate_crop_recommendations(rainfall, temperature, humidity, soil_type, ph_level, season, farm_size, water_availability, experience_level, market_preference, ranked_only=False):
+    """
+    Generate crop recommendations based on multiple parameters
+    """
+    # Score every crop at once against the precomputed suitability index. The
+    # categoricals go in as one-plot columns, so a list sent as soil_type is a
+    # value that matches nothing rather than a column of plots
+    scores = score_crops(
+        rainfall, temperature, (soil_type,), ph_level, (season,),
+        (water_availability,), (experience_level,), (market_preference,)
+    )[0]
+    score_percentages = [round(float(score), 1) for score in scores]
     
-    # Sort crops by score
-    sorted_crops = sorted(crop_scores.items(), key=lambda x: x[1]['score'], reverse=True)
+    # Sort crops by score and keep the top 8 recommendations
+    ranking = sorted(range(len(CROP_NAMES)), key=lambda i: score_percentages[i], reverse=True)[:8]
     
-    # Return top recommendations
-    return [
-        {
+    rng = fallback_rng(
+        'crop', rainfall, temperature, humidity, soil_type, ph_level, season,
+        farm_size, water_availability, experience_level, market_preference
+    )
+    recommendations = []
+    for i in ranking:
+        crop = CROP_NAMES[i]
+        score_percentage = score_percentages[i]
+        level, level_class = recommendation_level(score_percentage)
+        entry = {
             'crop_name': crop,
-            'suitability_score': data['score'],
-            'recommendation_level': data['recommendation_level'],
-            'level_class': data['level_class'],
-            'details': data['details'],
-            'estimated_yield': data['estimated_yield'],
-            'investment_needed': data['investment_needed'],
-            'profit_potential': data['profit_potential'],
-            'duration': data['duration'],
-            'special_notes': data['special_notes'],
-            'market_type': data['requirements']['market_type'].replace('_', ' ').title(),
-            'water_requirement': data['requirements']['water_need'].title()
+            'suitability_score': score_percentage,
+            'recommendation_level': level,
+            'level_class': level_class
         }
-        for crop, data in sorted_crops[:8]  # Top 8 recommendations
-    ]
+        if not ranked_only:
+            requirements = CROP_DATABASE[crop]
+            entry.update({
+                'details': suitability_details(
+                    crop, rainfall, temperature, soil_type, ph_level, season,
+                    water_availability, experience_level, market_preference
+                ),
+                'estimated_yield': calculate_estimated_yield(crop, score_percentage, farm_size, rng),
+                'investment_needed': calculate_investment(crop, farm_size, rng),
+                'profit_potential': requirements['profit_margin'],
+                'duration': requirements['duration'],
+                'special_notes': generate_special_notes(crop, rainfall, temperature, soil_type),
+                'market_type': requirements['market_type'].replace('_', ' ').title(),
+                'water_requirement': requirements['water_need'].title()
+            })
+        recommendations.append(entry)
+    
+    return recommendations
 
-def calculate_estimated_yield(crop, score_percentage, farm_size):
+def calculate_estimated_yield(crop, score_percentage, farm_size, rng=None):
     """Calculate estimated yield based on suitability score"""
-    import random
+    rng = rng or fallback_rng('estimated-yield', crop, score_percentage, farm_size)
     
     base_yields = {
         'Rice': 4000, 'Wheat': 3500, 'Maize': 5000, 'Cotton': 2000,
@@ -821,7 +1194,7 @@ def calculate_estimated_yield(crop, score_percentage, farm_size):
     
     base_yield = base_yields.get(crop, 3000)
     yield_factor = score_percentage / 100
-    estimated_yield_per_ha = round(base_yield * yield_factor * random.uniform(0.9, 1.1))
+    estimated_yield_per_ha = round(base_yield * yield_factor * rng.uniform(0.9, 1.1))
     total_yield = round(estimated_yield_per_ha * farm_size, 1)
     
     return {
@@ -830,26 +1203,31 @@ def calculate_estimated_yield(crop, score_percentage, farm_size):
         'unit': 'kg' if crop != 'Sugarcane' else 'tons'
     }
 
-def calculate_investment(crop, farm_size):
+# Investment range per hectare (INR) for each crop
+CROP_INVESTMENT_RANGES = {
+    'Rice': (25000, 35000),
+    'Wheat': (20000, 30000),
+    'Maize': (15000, 25000),
+    'Cotton': (30000, 45000),
+    'Sugarcane': (80000, 120000),
+    'Soybeans': (12000, 18000),
+    'Groundnut': (18000, 25000),
+    'Tomato': (40000, 60000),
+    'Potato': (35000, 50000),
+    'Onion': (25000, 35000),
+    'Sunflower': (10000, 15000),
+    'Chili': (20000, 30000)
+}
+
+def calculate_investment(crop, farm_size, rng=None):
     """Calculate investment requirements"""
-    import random
+    rng = rng or fallback_rng('investment', crop, farm_size)
     
-    investment_per_ha = {
-        'Rice': random.randint(25000, 35000),
-        'Wheat': random.randint(20000, 30000),
-        'Maize': random.randint(15000, 25000),
-        'Cotton': random.randint(30000, 45000),
-        'Sugarcane': random.randint(80000, 120000),
-        'Soybeans': random.randint(12000, 18000),
-        'Groundnut': random.randint(18000, 25000),
-        'Tomato': random.randint(40000, 60000),
-        'Potato': random.randint(35000, 50000),
-        'Onion': random.randint(25000, 35000),
-        'Sunflower': random.randint(10000, 15000),
-        'Chili': random.randint(20000, 30000)
-    }
-    
-    per_ha = investment_per_ha.get(crop, 20000)
+    # Only draw a figure for the requested crop
+    if crop in CROP_INVESTMENT_RANGES:
+        per_ha = rng.randint(*CROP_INVESTMENT_RANGES[crop])
+    else:
+        per_ha = 20000
     total = round(per_ha * farm_size)
     
     return {
@@ -894,18 +1272,22 @@ def generate_special_notes(crop, rainfall, temperature, soil_type):
 
 
 @app.route('/farmer-connect')
+@cached_page
 def farmer_connect():
     return render_template('farmer_connect.html')
 
 @app.route('/farmer-connect/forum')
+@cached_page
 def farmer_forum():
     return render_template('farmer_forum.html')
 
 @app.route('/farmer-connect/experts')
+@cached_page
 def expert_advice():
     return render_template('expert_advice.html')
 
 @app.route('/farmer-connect/marketplace')
+@cached_page
 def farmer_marketplace():
     return render_template('farmer_marketplace.html')
 
@@ -926,44 +1308,198 @@ def api_post_question():
             'status': 'open'
         }
         
-        # In a real app, save to database
-        # For demo, return success with mock response
+        question_data['id'] = save_with_unique_id(community_store.add_question, question_data, generate_question_id)
+        if search_index is not None:
+            search_index.catch_up()
+        if forum_events is not None:
+            forum_events.notify()
         return jsonify({
             'success': True,
             'question_id': question_data['id'],
             'message': 'Your question has been posted successfully!',
             'estimated_response_time': '2-4 hours'
         })
+    except (HTTPException, KeyError, TypeError) as e:
+        return client_error(e)
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/answer-question', methods=['POST'])
+def api_answer_question():
+    try:
+        data = request.get_json(silent=True) or {}
+        answer_data = {
+            'id': generate_answer_id(),
+            'question_id': data['question_id'],
+            'farmer_name': data['farmer_name'],
+            'answer': data['answer'],
+            'timestamp': get_current_timestamp()
+        }
+        answer_data['id'] = save_with_unique_id(community_store.add_answer, answer_data, generate_answer_id)
+        if forum_events is not None:
+            forum_events.notify()
+        return jsonify({'success': True, 'answer_id': answer_data['id']})
+    except (KeyError, TypeError) as e:
+        return client_error(e)
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/mark-helpful', methods=['POST'])
+def api_mark_helpful():
+    try:
+        data = request.get_json(silent=True) or {}
+        helpful_count = community_store.mark_helpful(data['question_id'])
+        if forum_events is not None:
+            forum_events.notify()
+        return jsonify({'success': True, 'helpful_count': helpful_count})
+    except (KeyError, TypeError) as e:
+        return client_error(e)
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/get-answers')
+def api_get_answers():
+    """Answers to one question (?question_id=), oldest first"""
+    try:
+        return jsonify({'success': True, 'answers': community_store.answers(request.args['question_id'])})
+    except KeyError as e:
+        return jsonify({'success': False, 'error': f'Missing parameter: {e.args[0]}'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/get-forum-posts')
 def api_get_forum_posts():
-    # Mock forum data - in real app, fetch from database
-    mock_posts = generate_mock_forum_posts()
-    return jsonify({
-        'success': True,
-        'posts': mock_posts,
-        'total_posts': len(mock_posts)
-    })
+    """Newest questions first, filtered by category, crop_type or location; page with ?cursor="""
+    try:
+        posts, next_cursor = community_page('questions', ('category', 'crop_type', 'location'))
+        return jsonify({
+            'success': True,
+            'posts': posts,
+            'total_posts': community_store.count('questions'),
+            'next_cursor': next_cursor,
+            'stream_cursor': community_store.latest_id('events')
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Streams served by this route hold a request thread each; asgi.py serves the
+# same path from its event loop without one
+forum_stream_slots = threading.BoundedSemaphore(app.config['FORUM_STREAM_MAX_THREADS'])
+
+@app.route('/api/forum/stream')
+def api_forum_stream():
+    """Server-sent events for questions posted, answered or updated after Last-Event-ID / ?since= (default: from now on)"""
+    if forum_events is None:
+        return jsonify({'success': False, 'error': 'Forum events are not available'}), 503
+    try:
+        cursor = parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not forum_stream_slots.acquire(blocking=False):
+        return jsonify({'success': False, 'error': 'Too many open streams'}), 503, {'Retry-After': '5'}
+    cursor = forum_events.last_id if cursor is None else cursor
+    heartbeat = app.config['FORUM_STREAM_HEARTBEAT']
+    
+    def generate(cursor):
+        yield b'retry: 3000\n\n'
+        while True:
+            events = forum_events.since(cursor) or forum_events.wait(cursor, heartbeat)
+            if not events:
+                yield HEARTBEAT
+            for event_id, frame in events:
+                yield frame
+                cursor = event_id
+    
+    response = Response(generate(cursor), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # The server closes every response, including HEAD ones whose body never runs
+    response.call_on_close(forum_stream_slots.release)
+    return response
+
+@app.route('/api/get-listings')
+def api_get_listings():
+    """Newest marketplace listings first, filtered by listing_type, item_name or location; page with ?cursor="""
+    try:
+        listings, next_cursor = community_page('listings', ('listing_type', 'item_name', 'location'))
+        return jsonify({
+            'success': True,
+            'listings': listings,
+            'total_listings': community_store.count('listings'),
+            'next_cursor': next_cursor
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/search')
+def api_search():
+    """BM25 search over questions and listings; ?q=, optional type=question|listing, limit, prefix=0"""
+    try:
+        if search_index is None:
+            raise RuntimeError('Search index is not available')
+        kind = request.args.get('type') or None
+        if kind not in (None, 'question', 'listing'):
+            return jsonify({'success': False, 'error': f'Unknown type: {kind}'}), 400
+        limit = int(request.args.get('limit', app.config['SEARCH_PAGE_SIZE']))
+        limit = max(1, min(limit, app.config['SEARCH_PAGE_MAX']))
+        with stage('search_catch_up'):
+            # Posts made through other worker processes
+            search_index.catch_up()
+        with stage('search'):
+            results, suggestions = search_index.search(request.args.get('q', ''), limit=limit, kind=kind,
+                                                       prefix=request.args.get('prefix', '1') == '1')
+        return jsonify({
+            'success': True,
+            'results': results,
+            'suggestions': suggestions,
+            'total_documents': len(search_index)
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/connect-farmers', methods=['POST'])
 def api_connect_farmers():
     try:
         data = request.json
-        location = data['location']
         crop_interest = data.get('crop_interest', 'All')
+        if data.get('lat') is not None and data.get('lon') is not None:
+            point = (float(data['lat']), float(data['lon']))
+        else:
+            point = resolve_location(data['location'])
+        if point is None:
+            return jsonify({'success': False, 'error': f"Unknown location: {data['location']}"}), 400
+        if not (-90 <= point[0] <= 90 and -180 <= point[1] <= 180):
+            return jsonify({'success': False, 'error': 'lat must be within [-90, 90] and lon within [-180, 180]'}), 400
+        radius_km = float(data.get('radius_km', app.config['FARMER_SEARCH_RADIUS_KM']))
+        if not 0 < radius_km <= app.config['FARMER_SEARCH_MAX_RADIUS_KM']:
+            return jsonify({'success': False, 'error':
+                            f"radius_km must be within (0, {app.config['FARMER_SEARCH_MAX_RADIUS_KM']:g}]"}), 400
+        k = max(1, min(int(data.get('k', 6)), app.config['FARMER_SEARCH_MAX_K']))
         
-        # Mock farmer connections - in real app, query database
-        nearby_farmers = generate_nearby_farmers(location, crop_interest)
+        with stage('farmer_search'):
+            matches = farmer_registry.nearest(point[0], point[1], k=k, radius_km=radius_km, crop=crop_interest)
+        nearby_farmers = [farmer_registry.profile(row, distance) for row, distance in matches]
         
         return jsonify({
             'success': True,
             'farmers': nearby_farmers,
-            'message': f'Found {len(nearby_farmers)} farmers in your area'
+            'message': f'Found {len(nearby_farmers)} farmers within {radius_km:g} km'
         })
+    except KeyError as e:
+        return jsonify({'success': False, 'error': f'Unknown crop or missing field: {e}'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/submit-listing', methods=['POST'])
 def api_submit_listing():
@@ -982,16 +1518,42 @@ def api_submit_listing():
             'timestamp': get_current_timestamp(),
             'status': 'active'
         }
+        listing['id'] = save_with_unique_id(community_store.add_listing, listing, generate_listing_id)
+        if search_index is not None:
+            search_index.catch_up()
         
         return jsonify({
             'success': True,
             'listing_id': listing['id'],
             'message': 'Your listing has been posted successfully!'
         })
+    except (HTTPException, KeyError, TypeError) as e:
+        return client_error(e)
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 # Helper functions for Farmer Connect
+def community_page(table, filter_names):
+    """One page of the community store from the query string (filters, cursor, limit)"""
+    if community_store is None:
+        raise RuntimeError('Community database is not available')
+    limit = int(request.args.get('limit', app.config['COMMUNITY_PAGE_SIZE']))
+    limit = max(1, min(limit, app.config['COMMUNITY_PAGE_MAX']))
+    filters = {name: request.args.get(name) for name in filter_names}
+    return community_store.page(table, filters, cursor=request.args.get('cursor'), limit=limit)
+
+def save_with_unique_id(add, record, make_id, attempts=5):
+    """Store ``record``, drawing a new random id if the current one is already taken"""
+    if community_store is None:
+        raise RuntimeError('Community database is not available')
+    for _ in range(attempts):
+        try:
+            add(record)
+            return record['id']
+        except sqlite3.IntegrityError:
+            record['id'] = make_id()
+    raise RuntimeError('Could not allocate a unique id')
+
 def generate_question_id():
     import random, string
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
@@ -1000,6 +1562,10 @@ def generate_listing_id():
     import random, string
     return 'LST' + ''.join(random.choices(string.digits, k=6))
 
+def generate_answer_id():
+    import random, string
+    return 'ANS' + ''.join(random.choices(string.digits, k=6))
+
 def get_current_timestamp():
     from datetime import datetime
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1073,60 +1639,24 @@ def generate_mock_forum_posts():
     
     return posts
 
-def generate_nearby_farmers(location, crop_interest):
-    import random
-    
-    farmers = [
-        {
-            'name': 'Amit Singh',
-            'location': location,
-            'crops': ['Wheat', 'Mustard', 'Barley'],
-            'experience': '15 years',
-            'specialization': 'Organic farming',
-            'contact': '+91 98xxx-xxxxx',
-            'rating': 4.8,
-            'distance': f"{random.randint(2, 15)} km"
-        },
-        {
-            'name': 'Sunita Devi',
-            'location': location,
-            'crops': ['Rice', 'Vegetables', 'Pulses'],
-            'experience': '12 years',
-            'specialization': 'Sustainable agriculture',
-            'contact': '+91 97xxx-xxxxx',
-            'rating': 4.6,
-            'distance': f"{random.randint(5, 20)} km"
-        },
-        {
-            'name': 'Kiran Patil',
-            'location': location,
-            'crops': ['Cotton', 'Soybean', 'Maize'],
-            'experience': '20 years',
-            'specialization': 'Precision farming',
-            'contact': '+91 96xxx-xxxxx',
-            'rating': 4.9,
-            'distance': f"{random.randint(8, 25)} km"
-        },
-        {
-            'name': 'Deepak Yadav',
-            'location': location,
-            'crops': ['Sugarcane', 'Wheat', 'Potato'],
-            'experience': '18 years',
-            'specialization': 'Water management',
-            'contact': '+91 95xxx-xxxxx',
-            'rating': 4.7,
-            'distance': f"{random.randint(3, 12)} km"
-        }
-    ]
-    
-    if crop_interest != 'All':
-        farmers = [f for f in farmers if crop_interest in f['crops']]
-    
-    return random.sample(farmers, min(len(farmers), 6))
-
 
+# Start an empty forum with the sample questions
+if community_store is not None:
+    community_store.seed_questions(generate_mock_forum_posts())
 
+# Full-text index over the forum and marketplace, following the store's change feed
+try:
+    search_index = SearchIndex.from_store(community_store)
+except Exception as e:
+    print(f"Error building search index: {e}")
+    search_index = None
 
+# One follower of the forum events table per process, feeding every /api/forum/stream
+try:
+    forum_events = ForumBroadcaster(community_store, poll_interval=app.config['FORUM_EVENTS_POLL_INTERVAL']).start()
+except Exception as e:
+    print(f"Error starting forum events: {e}")
+    forum_events = None
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
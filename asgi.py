@@ -0,0 +1,319 @@
+"""
+ASGI entry point serving the Flask app's routes unchanged.
+
+Usage:
+    uvicorn asgi:application --workers 4        (or: python serve.py)
+
+Each request is translated to a WSGI call and run on one of two bounded
+thread pools. Model routes (forest predictions, crop scoring) go to the
+inference pool, everything else to the request pool. A burst of
+predictions then queues behind INFERENCE_THREADS threads while forum
+posts, history lookups and pages keep being served. Once more than
+INFERENCE_QUEUE predictions are already waiting, new ones are turned
+away with 503 and Retry-After instead of piling up.
+Streamed responses are forwarded chunk by chunk. Request bodies are not
+buffered either: wsgi.input pulls each chunk from the server as the app
+reads it, so the NDJSON and CSV batch routes score the first plots while
+the rest of the upload is still arriving.
+
+/api/forum/stream is answered here on the event loop instead of through
+Flask. Each open stream is an asyncio queue fed by one listener on the
+process's ForumBroadcaster, so thousands of idle streams hold no threads.
+"""
+
+import asyncio
+import contextvars
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from werkzeug.exceptions import ClientDisconnected
+
+from app import app, forum_events
+from models.forum_events import HEARTBEAT, parse_cursor
+
+INFERENCE_PATHS = frozenset({
+    '/api/predict-yield',
+    '/api/predict-yield/batch',
+    '/api/predict-disease',
+    '/api/predict-weather',
+    '/api/recommend-fertilizer',
+    '/api/recommend-crop',
+    '/api/recommend-crop/batch'
+})
+
+BUSY_BODY = b'{"error":"Server busy, retry shortly","success":false}\n'
+EVENT_STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no')
+]
+
+
+class BoundedPool:
+    """A thread pool that accepts at most ``threads + max_queue`` calls at a time"""
+
+    def __init__(self, name, threads, max_queue):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=name)
+        self.capacity = threads + max_queue
+        self.active = 0
+
+    def try_acquire(self):
+        if self.active >= self.capacity:
+            return False
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+
+class EventStream:
+    """
+    Server-sent events from a ForumBroadcaster, one asyncio queue per
+    connection. The broadcaster thread schedules a single dispatch per
+    event on the loop, which copies the pre-encoded frame to every queue.
+    A connection that falls ``max_pending`` events behind is closed, and the
+    browser reconnects with Last-Event-ID to pick up where it stopped.
+    """
+
+    def __init__(self, broadcaster, heartbeat=15.0, max_pending=256):
+        self.broadcaster = broadcaster
+        self.heartbeat = heartbeat
+        self.max_pending = max_pending
+        self.queues = set()
+        self.loop = None
+
+    def _publish(self, event_id, frame):
+        self.loop.call_soon_threadsafe(self._dispatch, event_id, frame)
+
+    def _dispatch(self, event_id, frame):
+        for queue in list(self.queues):
+            if queue.qsize() >= self.max_pending:
+                self.queues.discard(queue)
+                queue.put_nowait(None)
+            else:
+                queue.put_nowait((event_id, frame))
+
+    async def __call__(self, scope, receive, send):
+        if self.broadcaster is None:
+            return await self.error(send, 503, 'Forum events are not available')
+        headers = dict(scope.get('headers', []))
+        since = headers.get(b'last-event-id', b'').decode('latin-1')
+        since = since or parse_qs(scope.get('query_string', b'').decode('latin-1')).get('since', [None])[0]
+        try:
+            cursor = parse_cursor(since)
+        except ValueError as e:
+            return await self.error(send, 400, str(e))
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.broadcaster.subscribe(self._publish)
+
+        queue = asyncio.Queue()
+        self.queues.add(queue)
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            cursor = self.broadcaster.last_id if cursor is None else cursor
+            # Missed events may have to come from the database
+            backlog = await self.loop.run_in_executor(None, self.broadcaster.since, cursor)
+            await send({'type': 'http.response.start', 'status': 200, 'headers': EVENT_STREAM_HEADERS})
+            await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+            for event_id, frame in backlog:
+                await send({'type': 'http.response.body', 'body': frame, 'more_body': True})
+                cursor = event_id
+            while True:
+                item = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({item, disconnected}, timeout=self.heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if item not in done:
+                    item.cancel()
+                    if disconnected in done:
+                        return
+                    await send({'type': 'http.response.body', 'body': HEARTBEAT, 'more_body': True})
+                    continue
+                if item.result() is None:
+                    break
+                event_id, frame = item.result()
+                if event_id > cursor:
+                    await send({'type': 'http.response.body', 'body': frame, 'more_body': True})
+                    cursor = event_id
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            self.queues.discard(queue)
+            disconnected.cancel()
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def error(send, status, message):
+        body = json.dumps({'error': message, 'success': False}).encode() + b'\n'
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode())
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+class RequestBody(io.RawIOBase):
+    """A request body read from a WSGI thread, one ASGI ``http.request`` message at a time"""
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._chunk = b''
+        self._offset = 0
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._offset >= len(self._chunk):
+            if not self._more:
+                return 0
+            # Runs on a pool thread; the event loop is free to fetch the next chunk
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self._more = False
+                raise ClientDisconnected()
+            self._chunk, self._offset = message.get('body', b''), 0
+            self._more = message.get('more_body', False)
+        n = min(len(buffer), len(self._chunk) - self._offset)
+        buffer[:n] = self._chunk[self._offset:self._offset + n]
+        self._offset += n
+        return n
+
+
+class WSGIToASGI:
+    """Run a WSGI app under an ASGI server, with inference routes on their own bounded pool"""
+
+    def __init__(self, wsgi_app, inference_threads=2, inference_queue=64, request_threads=32,
+                 inference_paths=INFERENCE_PATHS, streams=None):
+        self.wsgi_app = wsgi_app
+        self.inference_paths = inference_paths
+        self.streams = streams or {}
+        self.inference = BoundedPool('inference', inference_threads, inference_queue)
+        self.requests = BoundedPool('request', request_threads, request_threads * 4)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        if scope['path'] in self.streams:
+            return await self.streams[scope['path']](scope, receive, send)
+        pool = self.inference if scope['path'] in self.inference_paths else self.requests
+        if not pool.try_acquire():
+            return await self.busy(send)
+        try:
+            body = io.BufferedReader(RequestBody(receive, asyncio.get_running_loop()))
+            await self.handle(pool, self.environ(scope, body), send)
+        finally:
+            pool.release()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for pool in (self.inference, self.requests):
+                    pool.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def busy(self, send):
+        await send({'type': 'http.response.start', 'status': 503, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(BUSY_BODY)).encode()),
+            (b'retry-after', b'1')
+        ]})
+        await send({'type': 'http.response.body', 'body': BUSY_BODY})
+
+    def environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            # The body ends where the client's does, with or without Content-Length
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    def call_app(self, environ):
+        """Run the WSGI app up to its first body chunk; returns (status, headers, first chunk, iterator)"""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+        result = self.wsgi_app(environ, start_response)
+        iterator = iter(result)
+        first = next(iterator, None)
+        return started['status'], started['headers'], first, (result, iterator)
+
+    async def handle(self, pool, environ, send):
+        # Every step runs in one context, so Flask's request context (kept in
+        # context variables) follows a streamed response from thread to thread
+        context = contextvars.copy_context()
+        status, headers, chunk, (result, iterator) = await pool.run(context.run, self.call_app, environ)
+        # Flask sets Content-Length only on bodies it already holds in memory;
+        # only streamed responses need another trip to the pool per chunk
+        buffered = any(name == b'content-length' for name, _ in headers)
+        try:
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = next(iterator, None) if buffered else await pool.run(context.run, next, iterator, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                if buffered:
+                    result.close()
+                else:
+                    await pool.run(context.run, result.close)
+
+
+application = WSGIToASGI(
+    app,
+    inference_threads=int(os.environ.get('INFERENCE_THREADS', 2)),
+    inference_queue=int(os.environ.get('INFERENCE_QUEUE', 64)),
+    request_threads=int(os.environ.get('REQUEST_THREADS', 32)),
+    streams={'/api/forum/stream': EventStream(forum_events, heartbeat=app.config['FORUM_STREAM_HEARTBEAT'])}
+)
@@ -0,0 +1,339 @@
+"""
+Load and latency benchmark for every /api/* route.
+
+Usage:
+    python -m benchmarks.api_load [--requests 300] [--save benchmarks/baseline.json]
+    python -m benchmarks.api_load --server [--concurrency 8]
+    python -m benchmarks.api_load --url http://127.0.0.1:5000 --compare benchmarks/baseline.json
+
+By default requests go through Flask's in-process test client. --server
+launches app.py on a local port and drives it over HTTP from a thread pool;
+--url targets a server that is already running. Request payloads are built
+from rows of dataset/yield_df.csv.
+
+For each route the report gives throughput, p50/p95/p99 latency and, in
+in-process mode, the mean peak Python allocation per request (tracemalloc,
+measured in a separate pass so it does not distort the timings). --save
+writes the results as JSON; --compare prints the change against a saved
+baseline and exits non-zero when a route's p95 or throughput regresses by
+more than --fail-threshold percent.
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SOIL_TYPES = ['clay', 'loamy', 'sandy', 'red', 'black', 'alluvial']
+SEASONS = ['kharif', 'rabi', 'zaid']
+GROWTH_STAGES = ['pre-sowing', 'sowing', 'vegetative', 'flowering', 'maturity']
+FORUM_CATEGORIES = ['Disease Management', 'Pest Control', 'Soil Management', 'Water Management']
+
+
+def load_samples(dataset_path, n, seed):
+    """Random rows of the historical yield data, used as request inputs"""
+    data = pd.read_csv(dataset_path).dropna()
+    return data.sample(n=min(n, len(data)), random_state=seed).reset_index(drop=True)
+
+
+def build_scenarios(samples, seed):
+    """(name, method, path, payloads) for every API route"""
+    rng = np.random.default_rng(seed)
+    rows = samples.to_dict('records')
+
+    def per_row(build):
+        return [build(row) for row in rows]
+
+    return [
+        ('predict-yield', 'POST', '/api/predict-yield', per_row(lambda r: {
+            'rainfall': r['average_rain_fall_mm_per_year'],
+            'pesticide': r['pesticides_tonnes'],
+            'temperature': r['avg_temp'],
+            'crop': r['Item']
+        })),
+        ('predict-yield-batch', 'POST', '/api/predict-yield/batch', [{
+            'rows': [[r['average_rain_fall_mm_per_year'], r['pesticides_tonnes'], r['avg_temp']]
+                     for r in rows[i:i + 100]]
+        } for i in range(0, len(rows), 100)]),
+        ('predict-disease', 'POST', '/api/predict-disease', per_row(lambda r: {
+            'rainfall': r['average_rain_fall_mm_per_year'],
+            'temperature': r['avg_temp'],
+            'pesticide': r['pesticides_tonnes'],
+            'humidity': float(rng.uniform(40, 95))
+        })),
+        ('recommend-fertilizer', 'POST', '/api/recommend-fertilizer', per_row(lambda r: {
+            'crop': r['Item'],
+            'rainfall': r['average_rain_fall_mm_per_year'],
+            'soil_type': str(rng.choice(SOIL_TYPES)),
+            'field_size': float(rng.uniform(0.5, 10)),
+            'growth_stage': str(rng.choice(GROWTH_STAGES))
+        })),
+        ('predict-weather', 'POST', '/api/predict-weather', per_row(lambda r: {
+            'year': int(r['Year']) + int(rng.integers(10, 30)),
+            'location': r['Area']
+        })),
+        ('recommend-crop', 'POST', '/api/recommend-crop', per_row(lambda r: {
+            'rainfall': r['average_rain_fall_mm_per_year'],
+            'temperature': r['avg_temp'],
+            'humidity': float(rng.uniform(40, 95)),
+            'soil_type': str(rng.choice(SOIL_TYPES)),
+            'ph_level': float(rng.uniform(5, 8)),
+            'season': str(rng.choice(SEASONS)),
+            'farm_size': float(rng.uniform(0.5, 10))
+        })),
+        ('recommend-crop-batch', 'POST', '/api/recommend-crop/batch', [{
+            'plots': [{
+                'rainfall': r['average_rain_fall_mm_per_year'],
+                'temperature': r['avg_temp'],
+                'soil_type': str(rng.choice(SOIL_TYPES)),
+                'season': str(rng.choice(SEASONS))
+            } for r in rows[i:i + 100]]
+        } for i in range(0, len(rows), 100)]),
+        ('post-question', 'POST', '/api/post-question', per_row(lambda r: {
+            'farmer_name': 'Benchmark Farmer',
+            'location': r['Area'],
+            'crop_type': r['Item'],
+            'category': str(rng.choice(FORUM_CATEGORIES)),
+            'question': f"How should I manage {r['Item']} with {r['average_rain_fall_mm_per_year']:.0f}mm of rain?"
+        })),
+        ('get-forum-posts', 'GET', '/api/get-forum-posts', [None] * len(rows)),
+        ('connect-farmers', 'POST', '/api/connect-farmers', per_row(lambda r: {
+            'location': r['Area'],
+            'crop_interest': str(rng.choice(['All', 'Wheat', 'Rice', 'Maize', 'Cotton']))
+        })),
+        ('submit-listing', 'POST', '/api/submit-listing', per_row(lambda r: {
+            'farmer_name': 'Benchmark Farmer',
+            'contact': '+91 90000-00000',
+            'location': r['Area'],
+            'listing_type': 'sell',
+            'item_name': r['Item'],
+            'quantity': f"{int(rng.integers(1, 50))} quintal",
+            'price': f"{int(rng.integers(1000, 5000))}/quintal",
+            'description': f"Fresh {r['Item']} from {r['Area']}"
+        })),
+        ('get-listings', 'GET', '/api/get-listings', [None] * len(rows)),
+    ]
+
+
+def scratch_community_db():
+    """Questions and listings posted by the benchmark go to a throwaway database"""
+    return os.environ.get('COMMUNITY_DB') or os.path.join(tempfile.mkdtemp(prefix='api_load_'), 'community.db')
+
+
+class InProcessClient:
+    def __init__(self):
+        warnings.filterwarnings('ignore')
+        os.environ['COMMUNITY_DB'] = scratch_community_db()
+        from app import app
+        self.client = app.test_client()
+
+    def request(self, method, path, payload):
+        if method == 'GET':
+            response = self.client.get(path)
+        else:
+            response = self.client.post(path, json=payload)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, payload):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            return response.status
+
+
+def launch_server(port):
+    """Start app.py on a local port without the debug reloader"""
+    env = dict(os.environ, PYTHONWARNINGS='ignore', COMMUNITY_DB=scratch_community_db())
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(port), '--with-threads'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('Server did not start within 60s')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_scenario(client, method, path, payloads, n_requests, concurrency, warmup=5):
+    for payload in payloads[:warmup]:
+        client.request(method, path, payload)
+
+    jobs = [payloads[i % len(payloads)] for i in range(n_requests)]
+
+    def timed(payload):
+        started = time.perf_counter()
+        status = client.request(method, path, payload)
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, jobs))
+    else:
+        results = [timed(payload) for payload in jobs]
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    return {
+        'requests': n_requests,
+        'errors': sum(1 for _, status in results if status >= 400),
+        'throughput_rps': round(n_requests / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3)
+    }
+
+
+def measure_allocations(client, method, path, payloads, n_requests):
+    """Mean peak traced allocation (KB) per request"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(n_requests):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            client.request(method, path, payloads[i % len(payloads)])
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+    return round(float(np.mean(peaks)) / 1024, 2)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return None
+
+
+def print_report(results):
+    print(f"\n{'route':24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'alloc KB':>10}{'errors':>8}")
+    for name, stats in results.items():
+        alloc = stats.get('alloc_peak_kb')
+        alloc = f"{alloc:>10.1f}" if alloc is not None else f"{'-':>10}"
+        print(f"{name:24}{stats['throughput_rps']:>10.1f}{stats['p50_ms']:>10.2f}"
+              f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{alloc}{stats['errors']:>8}")
+
+
+def compare(results, mode, baseline_path, threshold):
+    """Print change against a saved baseline; return the routes that regressed"""
+    with open(baseline_path) as f:
+        saved = json.load(f)
+    baseline = saved['results']
+    if saved['meta']['mode'] != mode:
+        print(f"\nWarning: baseline was recorded in {saved['meta']['mode']} mode, this run is {mode}")
+    regressions = []
+    print(f"\nChange vs {baseline_path} (positive p95 / negative req/s is worse)")
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        p95_change = (stats['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+        rps_change = (stats['throughput_rps'] - old['throughput_rps']) / old['throughput_rps'] * 100
+        flag = ''
+        if p95_change > threshold or rps_change < -threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"  {name:24}p95 {p95_change:+7.1f}%   req/s {rps_change:+7.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every /api/* route')
+    parser.add_argument('--dataset', default='dataset/yield_df.csv')
+    parser.add_argument('--requests', type=int, default=300, help='Requests per route')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--server', action='store_true', help='Launch app.py locally and benchmark over HTTP')
+    parser.add_argument('--url', help='Benchmark an already running server')
+    parser.add_argument('--routes', help='Comma-separated subset of routes to run')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='Write results as a JSON baseline')
+    parser.add_argument('--compare', help='Compare against a JSON baseline')
+    parser.add_argument('--fail-threshold', type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    scenarios = build_scenarios(load_samples(args.dataset, 1000, args.seed), args.seed)
+    if args.routes:
+        selected = set(args.routes.split(','))
+        scenarios = [s for s in scenarios if s[0] in selected]
+
+    server = None
+    if args.server:
+        port = free_port()
+        server = launch_server(port)
+        client, mode = HttpClient(f'http://127.0.0.1:{port}'), 'server'
+    elif args.url:
+        client, mode = HttpClient(args.url), 'server'
+    else:
+        client, mode = InProcessClient(), 'in-process'
+
+    results = {}
+    try:
+        for name, method, path, payloads in scenarios:
+            stats = run_scenario(client, method, path, payloads, args.requests, args.concurrency)
+            if mode == 'in-process':
+                stats['alloc_peak_kb'] = measure_allocations(client, method, path, payloads,
+                                                             min(args.requests, 100))
+            results[name] = stats
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"Mode: {mode}, {args.requests} requests per route, concurrency {args.concurrency}")
+    print_report(results)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'meta': {
+                    'revision': git_revision(),
+                    'mode': mode,
+                    'requests': args.requests,
+                    'concurrency': args.concurrency,
+                    'python': platform.python_version(),
+                    'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+                },
+                'results': results
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare and compare(results, mode, args.compare, args.fail_threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Nearest-farmer query latency on a large synthetic registry.
+
+Usage:
+    python -m benchmarks.farmer_search [--size 1000000] [--queries 5000]
+                                       [--k 6] [--check 200]
+
+Builds a FarmerRegistry of --size farmers, then times ``nearest`` for
+random points around the registry's towns. Queries rotate through "All"
+and single crops, from common to rare, at 25, 50 and 200 km radii. The
+first --check queries are also answered by a brute-force haversine scan
+over every farmer, and the two answers must agree.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from models.farmer_registry import CROPS, PLACES, FarmerRegistry, crop_bit, haversine_km
+
+RADII_KM = (25, 50, 200)
+
+
+def brute_force(registry, lat, lon, k, radius_km, crop):
+    distances = haversine_km(lat, lon, registry.lat, registry.lon)
+    bit = crop_bit(crop)
+    if bit is not None:
+        distances[(np.asarray(registry.columns['crops']) >> bit) & 1 == 0] = np.inf
+    best = np.argsort(distances, kind='stable')[:k]
+    return [float(distances[row]) for row in best if distances[row] <= radius_km]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Nearest-farmer query latency')
+    parser.add_argument('--size', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--k', type=int, default=6)
+    parser.add_argument('--check', type=int, default=200, help='Queries verified against a full scan')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    registry = FarmerRegistry.synthetic(args.size, args.seed)
+    print(f"Built {len(registry):,} farmers in {time.perf_counter() - started:.2f}s")
+
+    rng = np.random.default_rng(args.seed + 1)
+    crops = ('All',) + CROPS
+    timings = {}
+    mismatches = 0
+    for i in range(args.queries):
+        _, _, lat, lon = PLACES[rng.integers(len(PLACES))]
+        lat, lon = lat + rng.normal(0, 0.5), lon + rng.normal(0, 0.5)
+        crop = crops[i % len(crops)]
+        radius_km = RADII_KM[i % len(RADII_KM)]
+        started = time.perf_counter()
+        matches = registry.nearest(lat, lon, k=args.k, radius_km=radius_km, crop=crop)
+        timings.setdefault(radius_km, []).append(time.perf_counter() - started)
+        if i < args.check:
+            expected = brute_force(registry, lat, lon, args.k, radius_km, crop)
+            if not np.allclose(expected, [distance for _, distance in matches]):
+                mismatches += 1
+
+    print(f"\n{args.queries:,} queries, k={args.k}")
+    print(f"{'radius':>8}{'p50 (us)':>12}{'p95 (us)':>12}{'p99 (us)':>12}{'max (us)':>12}")
+    for radius_km, samples in sorted(timings.items()):
+        micros = np.array(samples) * 1e6
+        print(f"{radius_km:>5} km" + ''.join(f"{np.percentile(micros, q):>12.0f}" for q in (50, 95, 99, 100)))
+    print(f"\nChecked {min(args.check, args.queries)} queries against a full scan: {mismatches} mismatches")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Inference throughput of request threads versus the process pool.
+
+Usage:
+    python -m benchmarks.inference_scaling [--max-workers N] [--threads 16]
+                                           [--seconds 3] [--models-dir models/]
+
+Client threads stand in for the server's request threads. Each one calls
+predict_disease_risk_batch for as long as the run lasts, on either 1 row
+or --batch-rows rows per call. The first row of the report is the default
+in-process backend, where every thread evaluates the forest under the GIL.
+The following rows use a ProcessInferencePool with 1, 2, 4, ... up to
+--max-workers processes (default: the core count). Speedup is relative to
+a one-worker pool; with one core per worker it should rise until the
+workers run out of cores.
+"""
+
+import argparse
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+
+
+def measure(models, rows, threads, seconds):
+    """Predictions per second from ``threads`` threads each predicting ``rows`` per call"""
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def client(index):
+        while not stop.is_set():
+            models.predict_disease_risk_batch(rows)
+            counts[index] += len(rows)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / (time.perf_counter() - started)
+
+
+def worker_counts(max_workers):
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Disease inference throughput: threads vs process pool')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--batch-rows', type=int, default=256)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--models-dir', default='models/')
+    parser.add_argument('--backend', default='sklearn', help='Disease model backend (sklearn, compiled, mmap)')
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore')
+    from models.prediction_models import PredictionModels
+
+    rng = np.random.default_rng(0)
+    row_sets = {'1 row': rng.uniform([0, 0, 0], [3000, 35, 100000], size=(1, 3)),
+                f'{args.batch_rows} rows': rng.uniform([0, 0, 0], [3000, 35, 100000], size=(args.batch_rows, 3))}
+
+    results = []
+    models = PredictionModels(disease_backend=args.backend, lazy=True)
+    models.models_dir = args.models_dir
+    models.ensure_loaded('disease')
+    results.append(('threads', {name: measure(models, rows, args.threads, args.seconds)
+                                for name, rows in row_sets.items()}))
+
+    for n_workers in worker_counts(args.max_workers):
+        models = PredictionModels(disease_backend=args.backend, lazy=True)
+        models.models_dir = args.models_dir
+        models.ensure_loaded('disease')
+        pool = models.enable_inference_pool(workers=n_workers)
+        pool.wait_ready(timeout=300)
+        results.append((f'pool x{n_workers}', {name: measure(models, rows, args.threads, args.seconds)
+                                               for name, rows in row_sets.items()}))
+        pool.close()
+
+    print(f"\n{os.cpu_count()} cores, {args.threads} client threads, {args.backend} disease model")
+    print(f"{'backend':14}" + ''.join(f"{name + ' (rows/s)':>20}{'speedup':>9}" for name in row_sets))
+    baseline = dict(results)['pool x1']
+    for label, throughput in results:
+        print(f"{label:14}" + ''.join(f"{throughput[name]:>20,.0f}{throughput[name] / baseline[name]:>8.2f}x"
+                                      for name in row_sets))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Per-worker memory benchmark for the model loading backends.
+
+Usage:
+    python -m benchmarks.model_memory [--workers 8] [--backends sklearn,mmap]
+
+For each backend, starts N worker processes that each build their own
+PredictionModels (as gunicorn workers without --preload do), run a few
+disease predictions, then wait until every worker has loaded before reading
+/proc/self/smaps_rollup. RSS counts shared pages in full for every process;
+PSS divides shared pages between the processes mapping them, so it shows
+what each worker really costs. Linux only.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import warnings
+
+import numpy as np
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Private_Clean', 'Private_Dirty')
+
+
+def read_memory_kb():
+    """Selected fields from /proc/self/smaps_rollup, in kB"""
+    usage = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0].rstrip(':') in SMAPS_FIELDS:
+                usage[parts[0].rstrip(':')] = int(parts[1])
+    return usage
+
+
+def worker(backend, loaded, release, results):
+    warnings.filterwarnings('ignore')
+    # Import sklearn before measuring so the baseline covers the libraries
+    # every backend needs for the scaler and encoder.
+    import sklearn.preprocessing  # noqa: F401
+    from models.prediction_models import PredictionModels
+
+    before = read_memory_kb()
+    models = PredictionModels(disease_backend=backend)
+    rng = np.random.default_rng(os.getpid())
+    rows = rng.uniform([0, 0, 0], [3000, 35, 100000], size=(256, 3))
+    models.predict_disease_risk_batch(rows)
+    for row in rows[:16]:
+        models.predict_disease_risk(*row)
+
+    loaded.wait()
+    after = read_memory_kb()
+    results.put({'pid': os.getpid(), 'before': before, 'after': after,
+                 'model': type(models.disease_model).__name__})
+    release.wait()
+
+
+def run_backend(backend, n_workers):
+    ctx = mp.get_context('fork')
+    loaded = ctx.Barrier(n_workers)
+    release = ctx.Barrier(n_workers + 1)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(backend, loaded, release, results))
+                 for _ in range(n_workers)]
+    for p in processes:
+        p.start()
+    samples = [results.get() for _ in processes]
+    release.wait()
+    for p in processes:
+        p.join()
+    return samples
+
+
+def summarize(backend, samples):
+    def mean_mb(stage, field):
+        return np.mean([s[stage][field] for s in samples]) / 1024
+
+    print(f"\n{backend} backend ({samples[0]['model']}), {len(samples)} workers")
+    print(f"  {'':22}{'RSS':>10}{'PSS':>10}{'private':>10}")
+    for stage in ('before', 'after'):
+        private = np.mean([s[stage]['Private_Clean'] + s[stage]['Private_Dirty'] for s in samples]) / 1024
+        print(f"  {stage + ' load (MB/worker)':22}{mean_mb(stage, 'Rss'):>10.1f}"
+              f"{mean_mb(stage, 'Pss'):>10.1f}{private:>10.1f}")
+    delta_rss = mean_mb('after', 'Rss') - mean_mb('before', 'Rss')
+    delta_pss = mean_mb('after', 'Pss') - mean_mb('before', 'Pss')
+    print(f"  model cost per worker: +{delta_rss:.2f} MB RSS, +{delta_pss:.2f} MB PSS")
+    return {'rss_mb': delta_rss, 'pss_mb': delta_pss}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-worker RSS/PSS for each model backend')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--backends', default='sklearn,mmap')
+    args = parser.parse_args(argv)
+
+    totals = {}
+    for backend in args.backends.split(','):
+        totals[backend] = summarize(backend, run_backend(backend, args.workers))
+
+    print(f"\nEstimated model memory across {args.workers} workers (PSS):")
+    for backend, delta in totals.items():
+        print(f"  {backend:10} {delta['pss_mb'] * args.workers:8.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Full-text search latency over a large synthetic forum and marketplace.
+
+Usage:
+    python -m benchmarks.search_latency [--documents 100000] [--queries 2000] [--limit 10]
+
+Indexes --documents synthetic questions and listings (half of each) built
+from a farming vocabulary, then times SearchIndex.search. Queries mix whole
+words, multi-word queries and partial last words as typed in a search box,
+with and without a type filter. It also reports the cost of adding one
+document to the full index, which is what /api/post-question and
+/api/submit-listing pay.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from models.search_index import SearchIndex
+
+CROPS = ('Wheat', 'Rice', 'Cotton', 'Maize', 'Sugarcane', 'Tomato', 'Potato', 'Onion', 'Groundnut',
+         'Soybean', 'Mustard', 'Chilli', 'Banana', 'Mango', 'Turmeric', 'Pulses')
+CATEGORIES = ('Disease Management', 'Pest Control', 'Soil Management', 'Water Management',
+              'Market Information', 'Seeds and Varieties', 'Equipment', 'Government Schemes')
+WORDS = ('yellow rust leaf spots wilting blight aphids bollworm whitefly termites drip irrigation sprinkler '
+         'mulching compost vermicompost urea dap potash zinc deficiency nitrogen organic fertilizer '
+         'seed treatment germination sowing harvest storage prices mandi wholesale tractor rotavator '
+         'harvester subsidy insurance loan rainfall drought flooding salinity ph testing yield spray '
+         'neem fungicide pesticide dosage timing varieties hybrid transplanting weeding labour').split()
+
+
+def synthetic_documents(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        crop = CROPS[rng.integers(len(CROPS))]
+        words = ' '.join(WORDS[j] for j in rng.integers(len(WORDS), size=rng.integers(6, 18)))
+        if i % 2:
+            yield 'listing', {'id': f'LST{i}', 'item_name': f'{crop} seeds', 'listing_type': 'sell',
+                              'description': words, 'location': 'Punjab'}
+        else:
+            yield 'question', {'id': f'Q{i}', 'question': f'{crop} {words}?',
+                               'category': CATEGORIES[rng.integers(len(CATEGORIES))],
+                               'crop_type': crop, 'location': 'Punjab'}
+
+
+def queries(n, seed=1):
+    rng = np.random.default_rng(seed)
+    vocabulary = [crop.lower() for crop in CROPS] + WORDS
+    for i in range(n):
+        words = [vocabulary[j] for j in rng.integers(len(vocabulary), size=1 + i % 3)]
+        if i % 2:
+            # Half-typed last word, as sent by the autocomplete box
+            words[-1] = words[-1][:max(2, len(words[-1]) // 2)]
+        yield ' '.join(words), (None, 'question', 'listing')[i % 3]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Full-text search latency')
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    for kind, document in synthetic_documents(args.documents):
+        index.add_question(document) if kind == 'question' else index.add_listing(document)
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {len(index):,} documents in {elapsed:.2f}s ({elapsed / len(index) * 1e6:.0f} us each)")
+
+    timings = {'exact': [], 'prefix': []}
+    for i, (query, kind) in enumerate(queries(args.queries)):
+        started = time.perf_counter()
+        index.search(query, limit=args.limit, kind=kind)
+        timings['prefix' if i % 2 else 'exact'].append(time.perf_counter() - started)
+
+    print(f"\n{args.queries:,} queries, top {args.limit}")
+    print(f"{'query':>8}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}")
+    for name, samples in timings.items():
+        millis = np.array(samples) * 1e3
+        print(f"{name:>8}" + ''.join(f"{np.percentile(millis, q):>12.2f}" for q in (50, 95, 99)))
+
+    started = time.perf_counter()
+    index.add_question({'id': 'QNEW', 'question': 'Late blight on potato after rain', 'category': 'Disease Management',
+                        'crop_type': 'Potato'})
+    print(f"\nOne incremental add: {(time.perf_counter() - started) * 1e6:.0f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from queue import Queue, Empty
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-row prediction calls into one vectorized call.
+
+    Rows submitted from many request threads are queued and a background
+    thread drains the queue, waiting at most ``max_wait_ms`` for up to
+    ``max_batch_size`` rows before running ``batch_fn`` once on all of them.
+    ``batch_fn`` takes an (N, n_features) array and returns N results.
+
+    Rows with NaN or infinite values are rejected at ``submit``. If a batch
+    call still fails, each of its rows is retried alone, so only the caller
+    whose row fails gets the exception.
+    """
+
+    def __init__(self, batch_fn, max_wait_ms=2.0, max_batch_size=64, stats_window=10000):
+        self.batch_fn = batch_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = Queue()
+        self._latencies = deque(maxlen=stats_window)
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._stats_lock = threading.Lock()
+        self._started_at = time.perf_counter()
+        self._rows_processed = 0
+        self._batches_processed = 0
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, row):
+        """Queue one feature row and return a Future for its result"""
+        values = np.asarray(row, dtype=float)
+        if values.ndim != 1 or not np.isfinite(values).all():
+            raise ValueError("Feature row must be a flat list of finite numbers")
+        future = Future()
+        self._queue.put((values, future, time.perf_counter()))
+        return future
+
+    def predict(self, row, timeout=None):
+        """Queue one feature row and block until its result is ready"""
+        return self.submit(row).result(timeout)
+
+    def stop(self):
+        """Stop the background worker after it drains the queue"""
+        self._running = False
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return []
+        pending = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            pending.append(item)
+        return pending
+
+    def _run(self):
+        while self._running or not self._queue.empty():
+            pending = self._collect()
+            if not pending:
+                continue
+            try:
+                results = self._call(np.stack([row for row, _, _ in pending]))
+                for (_, future, _), result in zip(pending, results):
+                    future.set_result(result)
+            except Exception as e:
+                if len(pending) == 1:
+                    if not pending[0][1].done():
+                        pending[0][1].set_exception(e)
+                else:
+                    self._run_singly(pending)
+            # No caller may wait forever, whatever went wrong above
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Prediction was not completed"))
+
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self._latencies.extend(finished - queued_at for _, _, queued_at in pending)
+                self._batch_sizes.append(len(pending))
+                self._rows_processed += len(pending)
+                self._batches_processed += 1
+
+    def _call(self, rows):
+        results = self.batch_fn(rows)
+        if results is None:
+            return [None] * len(rows)
+        if len(results) != len(rows):
+            raise ValueError(f"Batch function returned {len(results)} results for {len(rows)} rows")
+        return results
+
+    def _run_singly(self, pending):
+        """Fallback after a failed batch: one call per row, so a bad row fails only its own future"""
+        for row, future, _ in pending:
+            if future.done():
+                continue
+            try:
+                future.set_result(self._call(row[np.newaxis, :])[0])
+            except Exception as e:
+                future.set_exception(e)
+
+    def stats(self):
+        """Latency percentiles (ms), mean batch size and throughput (rows/s)"""
+        with self._stats_lock:
+            latencies = np.array(self._latencies) * 1000
+            batch_sizes = np.array(self._batch_sizes)
+            rows_processed = self._rows_processed
+            batches_processed = self._batches_processed
+        elapsed = time.perf_counter() - self._started_at
+
+        if len(latencies) == 0:
+            return {
+                'requests': 0,
+                'max_wait_ms': self.max_wait * 1000,
+                'max_batch_size': self.max_batch_size
+            }
+
+        return {
+            'requests': rows_processed,
+            'batches': batches_processed,
+            'mean_batch_size': round(float(batch_sizes.mean()), 2),
+            'p50_latency_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p99_latency_ms': round(float(np.percentile(latencies, 99)), 3),
+            'throughput_rps': round(rows_processed / elapsed, 1),
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch_size': self.max_batch_size
+        }
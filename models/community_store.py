@@ -0,0 +1,346 @@
+"""
+SQLite storage for forum questions, their answers and marketplace listings.
+
+The database runs in WAL mode, so readers never block on the writer or on
+each other. Connections come from a small pool and are reused across
+requests. Each one keeps its own cache of prepared statements; because
+every query here is a fixed SQL string with bound parameters, a repeated
+request reuses the compiled statement.
+
+Read endpoints page with a keyset cursor rather than OFFSET. A page is
+"rows older than the last (created_at, id) seen", answered by a range scan
+on one of the (filter, created_at, id) indexes. The cost of a page is the
+same on page 1 and page 10,000, and no query scans the whole table or
+sorts in a temporary B-tree. Row totals are kept in a counters table by
+triggers, so reporting them does not need COUNT(*).
+
+Triggers also append to an events table whenever a question is posted,
+answered or updated. Its row id gives every forum change one position in
+a single feed, which ``events`` reads after a given id.
+"""
+
+import base64
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+COMMUNITY_DB = 'dataset/community.db'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT NOT NULL UNIQUE,
+    farmer_name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    crop_type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    question TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    responses INTEGER NOT NULL DEFAULT 0,
+    helpful_count INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'open'
+);
+CREATE INDEX IF NOT EXISTS questions_by_time ON questions (created_at, id);
+CREATE INDEX IF NOT EXISTS questions_by_category ON questions (category, created_at, id);
+CREATE INDEX IF NOT EXISTS questions_by_crop ON questions (crop_type, created_at, id);
+CREATE INDEX IF NOT EXISTS questions_by_location ON questions (location, created_at, id);
+
+CREATE TABLE IF NOT EXISTS listings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    listing_id TEXT NOT NULL UNIQUE,
+    farmer_name TEXT NOT NULL,
+    contact TEXT NOT NULL,
+    location TEXT NOT NULL,
+    listing_type TEXT NOT NULL,
+    item_name TEXT NOT NULL,
+    quantity TEXT NOT NULL,
+    price TEXT NOT NULL,
+    description TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'active'
+);
+CREATE INDEX IF NOT EXISTS listings_by_time ON listings (created_at, id);
+CREATE INDEX IF NOT EXISTS listings_by_type ON listings (listing_type, created_at, id);
+CREATE INDEX IF NOT EXISTS listings_by_item ON listings (item_name, created_at, id);
+CREATE INDEX IF NOT EXISTS listings_by_location ON listings (location, created_at, id);
+
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    answer_id TEXT NOT NULL UNIQUE,
+    question_id TEXT NOT NULL,
+    farmer_name TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_by_question ON answers (question_id, created_at, id);
+
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO counters VALUES ('questions', 0), ('listings', 0);
+CREATE TRIGGER IF NOT EXISTS questions_count AFTER INSERT ON questions
+    BEGIN UPDATE counters SET value = value + 1 WHERE name = 'questions'; END;
+CREATE TRIGGER IF NOT EXISTS listings_count AFTER INSERT ON listings
+    BEGIN UPDATE counters SET value = value + 1 WHERE name = 'listings'; END;
+
+-- kind is 'question' or 'update' (ref is a questions row) or 'answer' (ref is an answers row)
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    ref INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS questions_event AFTER INSERT ON questions
+    BEGIN INSERT INTO events (kind, ref) VALUES ('question', NEW.id); END;
+CREATE TRIGGER IF NOT EXISTS questions_update_event AFTER UPDATE OF responses, helpful_count, status ON questions
+    BEGIN INSERT INTO events (kind, ref) VALUES ('update', NEW.id); END;
+CREATE TRIGGER IF NOT EXISTS answers_event AFTER INSERT ON answers
+    BEGIN
+        UPDATE questions SET responses = responses + 1, status = 'answered' WHERE question_id = NEW.question_id;
+        INSERT INTO events (kind, ref) VALUES ('answer', NEW.id);
+    END;
+"""
+
+QUESTION_COLUMNS = ('question_id', 'farmer_name', 'location', 'crop_type', 'category', 'question',
+                    'created_at', 'responses', 'helpful_count', 'status')
+LISTING_COLUMNS = ('listing_id', 'farmer_name', 'contact', 'location', 'listing_type', 'item_name',
+                   'quantity', 'price', 'description', 'created_at', 'status')
+ANSWER_COLUMNS = ('answer_id', 'question_id', 'farmer_name', 'answer', 'created_at')
+ID_COLUMNS = {'questions': 'question_id', 'listings': 'listing_id', 'answers': 'answer_id'}
+
+# Columns each table can be filtered on; each has a (column, created_at, id) index
+FILTERS = {
+    'questions': ('category', 'crop_type', 'location'),
+    'listings': ('listing_type', 'item_name', 'location')
+}
+
+# Each event with the row it refers to; updates read the question as it is now
+EVENTS_SQL = (
+    f"SELECT e.id AS event_id, e.kind, q.id, {', '.join(f'q.{column}' for column in QUESTION_COLUMNS)}, "
+    f"a.id AS a_id, {', '.join(f'a.{column} AS a_{column}' for column in ANSWER_COLUMNS)} "
+    "FROM events e "
+    "LEFT JOIN questions q ON e.kind != 'answer' AND q.id = e.ref "
+    "LEFT JOIN answers a ON e.kind = 'answer' AND a.id = e.ref "
+    "WHERE e.id > ? ORDER BY e.id LIMIT ?"
+)
+
+
+def encode_cursor(created_at, row_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return str(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor') from None
+
+
+def now_timestamp():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+class ConnectionPool:
+    """Up to ``size`` SQLite connections shared between threads, one borrower at a time"""
+
+    def __init__(self, path, size=8, timeout=30.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=256, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            conn = self._connect() if create else self._idle.get(timeout=self.timeout)
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class CommunityStore:
+    def __init__(self, path=COMMUNITY_DB, pool_size=8):
+        self.path = path
+        self.pool = ConnectionPool(path, size=pool_size)
+        # SQLite has a single writer; serializing writes in-process avoids busy retries
+        self._write_lock = threading.Lock()
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._write_lock, self.pool.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    @staticmethod
+    def _insert(conn, table, columns, values):
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        return conn.execute(sql, [values[column] for column in columns]).lastrowid
+
+    @staticmethod
+    def _question_values(question):
+        values = dict(question, question_id=question['id'], created_at=question.get('timestamp') or now_timestamp())
+        values.setdefault('responses', 0)
+        values.setdefault('helpful_count', 0)
+        values.setdefault('status', 'open')
+        if isinstance(values['responses'], list):
+            values['responses'] = len(values['responses'])
+        return values
+
+    def add_question(self, question):
+        """Store a question dict (keys as in QUESTION_COLUMNS, ``id`` for question_id)"""
+        with self._transaction() as conn:
+            return self._insert(conn, 'questions', QUESTION_COLUMNS, self._question_values(question))
+
+    def add_listing(self, listing):
+        """Store a listing dict (keys as in LISTING_COLUMNS, ``id`` for listing_id)"""
+        values = dict(listing, listing_id=listing['id'], created_at=listing.get('timestamp') or now_timestamp())
+        values.setdefault('status', 'active')
+        with self._transaction() as conn:
+            return self._insert(conn, 'listings', LISTING_COLUMNS, values)
+
+    def add_answer(self, answer):
+        """Store an answer dict (keys as in ANSWER_COLUMNS, ``id`` for answer_id); LookupError for an unknown question"""
+        values = dict(answer, answer_id=answer['id'], created_at=answer.get('timestamp') or now_timestamp())
+        with self._transaction() as conn:
+            if conn.execute('SELECT 1 FROM questions WHERE question_id = ?', (values['question_id'],)).fetchone() is None:
+                raise LookupError(f"Unknown question: {values['question_id']}")
+            return self._insert(conn, 'answers', ANSWER_COLUMNS, values)
+
+    def mark_helpful(self, question_id):
+        """Add one to a question's helpful count and return the new count; LookupError for an unknown question"""
+        with self._transaction() as conn:
+            row = conn.execute('UPDATE questions SET helpful_count = helpful_count + 1 WHERE question_id = ? '
+                               'RETURNING helpful_count', (question_id,)).fetchone()
+        if row is None:
+            raise LookupError(f'Unknown question: {question_id}')
+        return row[0]
+
+    def answers(self, question_id, limit=100):
+        """Answers to one question, oldest first"""
+        columns = ', '.join(ANSWER_COLUMNS)
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT id, {columns} FROM answers WHERE question_id = ? '
+                                'ORDER BY created_at, id LIMIT ?', (question_id, limit)).fetchall()
+        return [self._public('answers', row) for row in rows]
+
+    def seed_questions(self, questions):
+        """Insert ``questions`` if the forum is empty; one transaction, so concurrent workers seed once"""
+        with self._transaction() as conn:
+            if conn.execute("SELECT value FROM counters WHERE name = 'questions'").fetchone()[0]:
+                return False
+            for question in questions:
+                self._insert(conn, 'questions', QUESTION_COLUMNS, self._question_values(question))
+        return True
+
+    def count(self, table):
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT value FROM counters WHERE name = ?', (table,)).fetchone()[0]
+
+    def latest_id(self, table):
+        """Row id of the newest row in ``table``, 0 when empty"""
+        if table not in FILTERS and table != 'events':
+            raise ValueError(f'Unknown table: {table}')
+        with self.pool.connection() as conn:
+            return conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+
+    def changes(self, table, after_id, limit=100):
+        """Up to ``limit`` rows inserted after row id ``after_id``, oldest first, as (id, record) pairs"""
+        if table not in FILTERS:
+            raise ValueError(f'Unknown table: {table}')
+        columns = QUESTION_COLUMNS if table == 'questions' else LISTING_COLUMNS
+        sql = f"SELECT id, {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, (after_id, limit)).fetchall()
+        return [(row['id'], self._public(table, row)) for row in rows]
+
+    def events(self, after_id, limit=100):
+        """Up to ``limit`` forum events after event id ``after_id``, oldest first, as (id, kind, record) triples"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(EVENTS_SQL, (after_id, limit)).fetchall()
+        events = []
+        for row in rows:
+            if row['kind'] == 'answer':
+                record = self._public('answers', {'id': row['a_id'], **{c: row[f'a_{c}'] for c in ANSWER_COLUMNS}})
+            else:
+                record = self._public('questions', {'id': row['id'], **{c: row[c] for c in QUESTION_COLUMNS}})
+            events.append((row['event_id'], row['kind'], record))
+        return events
+
+    def _select(self, table, filters, cursor, limit):
+        filters = {column: value for column, value in (filters or {}).items() if value not in (None, '', 'All')}
+        unknown = set(filters) - set(FILTERS[table])
+        if unknown:
+            raise ValueError(f"Cannot filter {table} on {', '.join(sorted(unknown))}")
+        clauses = [f'{column} = ?' for column in sorted(filters)]
+        params = [filters[column] for column in sorted(filters)]
+        if cursor:
+            clauses.append('(created_at, id) < (?, ?)')
+            params.extend(decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        columns = QUESTION_COLUMNS if table == 'questions' else LISTING_COLUMNS
+        # One statement text per filter combination, so each stays in the statement cache
+        sql = f"SELECT id, {', '.join(columns)} FROM {table} {where} ORDER BY created_at DESC, id DESC LIMIT ?"
+        return sql, params + [limit + 1]
+
+    def page(self, table, filters=None, cursor=None, limit=20):
+        """
+        Newest-first page of ``table``, optionally filtered on one or more
+        indexed columns. Returns (rows, next_cursor); next_cursor is None on
+        the last page.
+        """
+        sql, params = self._select(table, filters, cursor, limit)
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1]['created_at'], rows[limit - 1]['id']) if len(rows) > limit else None
+        return [self._public(table, row) for row in rows[:limit]], next_cursor
+
+    def query_plan(self, table, filters=None, cursor=None, limit=20):
+        """EXPLAIN QUERY PLAN of ``page`` with the same arguments, for checking index use"""
+        sql, params = self._select(table, filters, cursor, limit)
+        with self.pool.connection() as conn:
+            return [row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+    @staticmethod
+    def _public(table, row):
+        record = dict(row)
+        del record['id']
+        record['id'] = record.pop(ID_COLUMNS[table])
+        record['timestamp'] = record.pop('created_at')
+        return record
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,381 @@
+"""
+Columnar crop suitability index used by the crop recommendation API.
+
+CROP_DATABASE is the source of truth for crop requirements. At import time
+it is unpacked once into NumPy arrays (rainfall, temperature and pH bounds)
+and integer bitmasks (soil types, seasons, experience levels, water needs),
+so every crop can be scored against one or many sets of field conditions
+in a single vectorized pass.
+"""
+
+import functools
+
+import numpy as np
+
+# Comprehensive crop database with requirements
+CROP_DATABASE = {
+    'Rice': {
+        'rainfall': (1000, 2500),
+        'temperature': (20, 35),
+        'humidity': (70, 95),
+        'soil_types': ['clay', 'loamy', 'alluvial'],
+        'ph_range': (5.5, 7.0),
+        'water_need': 'high',
+        'season': ['kharif', 'rabi'],
+        'experience': ['beginner', 'intermediate', 'advanced'],
+        'market_type': 'food_grain',
+        'yield_potential': 'high',
+        'investment': 'medium',
+        'duration': '120-150 days',
+        'profit_margin': 'medium'
+    },
+    'Wheat': {
+        'rainfall': (300, 1000),
+        'temperature': (15, 25),
+        'humidity': (50, 70),
+        'soil_types': ['loamy', 'clay', 'black'],
+        'ph_range': (6.0, 7.5),
+        'water_need': 'medium',
+        'season': ['rabi'],
+        'experience': ['beginner', 'intermediate', 'advanced'],
+        'market_type': 'food_grain',
+        'yield_potential': 'high',
+        'investment': 'medium',
+        'duration': '120-140 days',
+        'profit_margin': 'medium'
+    },
+    'Maize': {
+        'rainfall': (500, 1200),
+        'temperature': (18, 32),
+        'humidity': (60, 80),
+        'soil_types': ['loamy', 'sandy', 'red'],
+        'ph_range': (5.5, 7.0),
+        'water_need': 'medium',
+        'season': ['kharif', 'rabi', 'zaid'],
+        'experience': ['beginner', 'intermediate', 'advanced'],
+        'market_type': 'food_grain',
+        'yield_potential': 'high',
+        'investment': 'medium',
+        'duration': '90-120 days',
+        'profit_margin': 'high'
+    },
+    'Cotton': {
+        'rainfall': (500, 1200),
+        'temperature': (21, 35),
+        'humidity': (60, 85),
+        'soil_types': ['black', 'alluvial', 'red'],
+        'ph_range': (6.0, 8.0),
+        'water_need': 'medium',
+        'season': ['kharif'],
+        'experience': ['intermediate', 'advanced'],
+        'market_type': 'cash_crop',
+        'yield_potential': 'high',
+        'investment': 'high',
+        'duration': '180-200 days',
+        'profit_margin': 'very_high'
+    },
+    'Sugarcane': {
+        'rainfall': (1000, 2000),
+        'temperature': (20, 35),
+        'humidity': (70, 90),
+        'soil_types': ['loamy', 'clay', 'alluvial'],
+        'ph_range': (6.0, 7.5),
+        'water_need': 'very_high',
+        'season': ['annual'],
+        'experience': ['intermediate', 'advanced'],
+        'market_type': 'cash_crop',
+        'yield_potential': 'very_high',
+        'investment': 'very_high',
+        'duration': '12-18 months',
+        'profit_margin': 'high'
+    },
+    'Soybeans': {
+        'rainfall': (400, 800),
+        'temperature': (20, 30),
+        'humidity': (60, 80),
+        'soil_types': ['loamy', 'black', 'red'],
+        'ph_range': (6.0, 7.5),
+        'water_need': 'medium',
+        'season': ['kharif'],
+        'experience': ['beginner', 'intermediate'],
+        'market_type': 'oilseed',
+        'yield_potential': 'medium',
+        'investment': 'low',
+        'duration': '90-110 days',
+        'profit_margin': 'medium'
+    },
+    'Groundnut': {
+        'rainfall': (500, 1000),
+        'temperature': (20, 30),
+        'humidity': (65, 85),
+        'soil_types': ['sandy', 'red', 'black'],
+        'ph_range': (6.0, 7.0),
+        'water_need': 'medium',
+        'season': ['kharif', 'rabi'],
+        'experience': ['beginner', 'intermediate'],
+        'market_type': 'oilseed',
+        'yield_potential': 'medium',
+        'investment': 'medium',
+        'duration': '100-120 days',
+        'profit_margin': 'medium'
+    },
+    'Tomato': {
+        'rainfall': (400, 800),
+        'temperature': (18, 27),
+        'humidity': (60, 80),
+        'soil_types': ['loamy', 'sandy', 'red'],
+        'ph_range': (6.0, 7.0),
+        'water_need': 'high',
+        'season': ['rabi', 'zaid'],
+        'experience': ['intermediate', 'advanced'],
+        'market_type': 'vegetable',
+        'yield_potential': 'high',
+        'investment': 'high',
+        'duration': '90-120 days',
+        'profit_margin': 'very_high'
+    },
+    'Potato': {
+        'rainfall': (400, 700),
+        'temperature': (15, 25),
+        'humidity': (60, 80),
+        'soil_types': ['loamy', 'sandy', 'red'],
+        'ph_range': (5.5, 6.5),
+        'water_need': 'medium',
+        'season': ['rabi'],
+        'experience': ['intermediate', 'advanced'],
+        'market_type': 'vegetable',
+        'yield_potential': 'high',
+        'investment': 'high',
+        'duration': '90-120 days',
+        'profit_margin': 'high'
+    },
+    'Onion': {
+        'rainfall': (300, 600),
+        'temperature': (15, 25),
+        'humidity': (60, 70),
+        'soil_types': ['loamy', 'sandy', 'alluvial'],
+        'ph_range': (6.0, 7.5),
+        'water_need': 'medium',
+        'season': ['rabi', 'kharif'],
+        'experience': ['intermediate', 'advanced'],
+        'market_type': 'vegetable',
+        'yield_potential': 'medium',
+        'investment': 'medium',
+        'duration': '120-150 days',
+        'profit_margin': 'high'
+    },
+    'Sunflower': {
+        'rainfall': (400, 800),
+        'temperature': (20, 30),
+        'humidity': (60, 80),
+        'soil_types': ['loamy', 'sandy', 'red'],
+        'ph_range': (6.0, 7.5),
+        'water_need': 'medium',
+        'season': ['kharif', 'rabi'],
+        'experience': ['beginner', 'intermediate'],
+        'market_type': 'oilseed',
+        'yield_potential': 'medium',
+        'investment': 'low',
+        'duration': '90-110 days',
+        'profit_margin': 'medium'
+    },
+    'Chili': {
+        'rainfall': (600, 1200),
+        'temperature': (20, 30),
+        'humidity': (70, 85),
+        'soil_types': ['loamy', 'sandy', 'red'],
+        'ph_range': (6.0, 7.0),
+        'water_need': 'medium',
+        'season': ['kharif', 'rabi'],
+        'experience': ['intermediate', 'advanced'],
+        'market_type': 'spice',
+        'yield_potential': 'high',
+        'investment': 'medium',
+        'duration': '150-180 days',
+        'profit_margin': 'very_high'
+    }
+}
+
+WATER_COMPATIBILITY = {
+    'low': ['low', 'medium'],
+    'medium': ['low', 'medium', 'high'],
+    'high': ['medium', 'high', 'very_high'],
+    'very_high': ['high', 'very_high']
+}
+
+CROP_NAMES = list(CROP_DATABASE)
+
+
+def _bit_vocabulary(values):
+    return {value: 1 << i for i, value in enumerate(sorted(set(values)))}
+
+
+def _mask(values, bits):
+    mask = 0
+    for value in values:
+        mask |= bits[value]
+    return mask
+
+
+SOIL_BITS = _bit_vocabulary(soil for req in CROP_DATABASE.values() for soil in req['soil_types'])
+SEASON_BITS = _bit_vocabulary(season for req in CROP_DATABASE.values() for season in req['season'])
+EXPERIENCE_BITS = _bit_vocabulary(level for req in CROP_DATABASE.values() for level in req['experience'])
+WATER_BITS = _bit_vocabulary(list(WATER_COMPATIBILITY) + [req['water_need'] for req in CROP_DATABASE.values()])
+MARKET_CODES = {market: code for code, market in enumerate(sorted({req['market_type'] for req in CROP_DATABASE.values()}))}
+
+RAIN_MIN = np.array([req['rainfall'][0] for req in CROP_DATABASE.values()], dtype=float)
+RAIN_MAX = np.array([req['rainfall'][1] for req in CROP_DATABASE.values()], dtype=float)
+TEMP_MIN = np.array([req['temperature'][0] for req in CROP_DATABASE.values()], dtype=float)
+TEMP_MAX = np.array([req['temperature'][1] for req in CROP_DATABASE.values()], dtype=float)
+PH_MIN = np.array([req['ph_range'][0] for req in CROP_DATABASE.values()], dtype=float)
+PH_MAX = np.array([req['ph_range'][1] for req in CROP_DATABASE.values()], dtype=float)
+PH_MID = (PH_MIN + PH_MAX) / 2
+
+SOIL_MASK = np.array([_mask(req['soil_types'], SOIL_BITS) for req in CROP_DATABASE.values()], dtype=np.int64)
+SEASON_MASK = np.array([_mask(req['season'], SEASON_BITS) for req in CROP_DATABASE.values()], dtype=np.int64)
+IS_ANNUAL = np.array(['annual' in req['season'] for req in CROP_DATABASE.values()])
+EXPERIENCE_MASK = np.array([_mask(req['experience'], EXPERIENCE_BITS) for req in CROP_DATABASE.values()], dtype=np.int64)
+WATER_NEED_BIT = np.array([WATER_BITS[req['water_need']] for req in CROP_DATABASE.values()], dtype=np.int64)
+MARKET_CODE = np.array([MARKET_CODES[req['market_type']] for req in CROP_DATABASE.values()], dtype=np.int64)
+WATER_ACCEPT_MASK = {availability: _mask(needs, WATER_BITS) for availability, needs in WATER_COMPATIBILITY.items()}
+
+
+def _range_score(value, low, high, points):
+    # Full points inside the range, linear fall-off relative to the violated bound
+    inside = (low <= value) & (value <= high)
+    below = points - (low - value) / low * points
+    above = points - (value - high) / high * points
+    return np.where(inside, points, np.maximum(0, np.where(value < low, below, above)))
+
+
+@functools.lru_cache(maxsize=4096)
+def _categorical_points(soil_type, season, water_availability, experience_level, market_preference):
+    """Soil, season, experience, water and market points for every crop"""
+    soil_bits = SOIL_BITS.get(soil_type, 0)
+    season_bits = SEASON_BITS.get(season, 0)
+    experience_bits = EXPERIENCE_BITS.get(experience_level, 0)
+    water_accept = WATER_ACCEPT_MASK.get(water_availability, 0)
+    market_code = MARKET_CODES.get(market_preference, -1)
+    return np.stack([
+        np.where((SOIL_MASK & soil_bits) != 0, 15, 8),
+        np.where(((SEASON_MASK & season_bits) != 0) | IS_ANNUAL, 10, 5),
+        np.where((EXPERIENCE_MASK & experience_bits) != 0, 10, 6),
+        np.where((WATER_NEED_BIT & water_accept) != 0, 10, 5),
+        np.where((MARKET_CODE == market_code) | (market_preference == 'mixed'), 5, 3)
+    ])
+
+
+def _category(value):
+    # Anything but a string matches no category, as in the original per-crop loop
+    return value if isinstance(value, str) else None
+
+
+def _plot_categorical_points(soil_type, season, water_availability, experience_level, market_preference, n_plots):
+    """(5, n_crops) points shared by all plots, or (5, n_plots, n_crops) when they differ"""
+    columns = [soil_type, season, water_availability, experience_level, market_preference]
+    per_plot = [isinstance(column, (list, tuple, np.ndarray)) for column in columns]
+    if not any(per_plot):
+        return _categorical_points(*map(_category, columns))[:, np.newaxis, :]
+    columns = [list(column) if is_list else [column] * n_plots for column, is_list in zip(columns, per_plot)]
+    points = np.stack([_categorical_points(*map(_category, combo)) for combo in zip(*columns)])
+    return points.transpose(1, 0, 2)
+
+
+def score_crops(rainfall, temperature, soil_type, ph_level, season,
+                water_availability, experience_level, market_preference):
+    """
+    Suitability percentage of every crop for one or more plots.
+
+    Numeric arguments may be scalars or arrays of length P; categorical
+    arguments may be a single value or a list, tuple or array of length P.
+    Values that are not strings match nothing. Returns an unrounded
+    (P, n_crops) array in CROP_NAMES order.
+    """
+    rainfall = np.atleast_1d(np.asarray(rainfall, dtype=float))[:, np.newaxis]
+    temperature = np.atleast_1d(np.asarray(temperature, dtype=float))[:, np.newaxis]
+    ph_level = np.atleast_1d(np.asarray(ph_level, dtype=float))[:, np.newaxis]
+    n_plots = max(len(rainfall), len(temperature), len(ph_level))
+    soil, season_fit, experience, water, market = _plot_categorical_points(
+        soil_type, season, water_availability, experience_level, market_preference, n_plots
+    )
+
+    # Points are added in the same order as the original per-crop loop so the
+    # floating point totals are identical
+    score = _range_score(rainfall, RAIN_MIN, RAIN_MAX, 20)
+    score = score + _range_score(temperature, TEMP_MIN, TEMP_MAX, 20)
+    score = score + soil
+    score = score + np.where((PH_MIN <= ph_level) & (ph_level <= PH_MAX), 10,
+                             np.maximum(0, 10 - np.abs(ph_level - PH_MID)))
+    score = score + season_fit
+    score = score + experience
+    score = score + water
+    score = score + market
+
+    return (score / 100) * 100
+
+
+def recommendation_level(score_percentage):
+    """Recommendation label and Bootstrap class for a suitability percentage"""
+    if score_percentage >= 80:
+        return "Highly Recommended", "success"
+    elif score_percentage >= 65:
+        return "Recommended", "primary"
+    elif score_percentage >= 50:
+        return "Moderately Suitable", "warning"
+    return "Not Recommended", "danger"
+
+
+def suitability_details(crop, rainfall, temperature, soil_type, ph_level, season,
+                        water_availability, experience_level, market_preference):
+    """Human-readable explanation of how a crop scored on each criterion"""
+    requirements = CROP_DATABASE[crop]
+    details = []
+
+    rain_min, rain_max = requirements['rainfall']
+    if rain_min <= rainfall <= rain_max:
+        details.append(f"✓ Rainfall requirement met ({rain_min}-{rain_max}mm)")
+    elif rainfall < rain_min:
+        details.append(f"⚠ Rainfall slightly low (needs {rain_min}-{rain_max}mm)")
+    else:
+        details.append(f"⚠ Rainfall slightly high (optimal: {rain_min}-{rain_max}mm)")
+
+    temp_min, temp_max = requirements['temperature']
+    if temp_min <= temperature <= temp_max:
+        details.append(f"✓ Temperature requirement met ({temp_min}-{temp_max}°C)")
+    elif temperature < temp_min:
+        details.append(f"⚠ Temperature slightly low (needs {temp_min}-{temp_max}°C)")
+    else:
+        details.append(f"⚠ Temperature slightly high (optimal: {temp_min}-{temp_max}°C)")
+
+    if soil_type in requirements['soil_types']:
+        details.append(f"✓ Suitable for {soil_type} soil")
+    else:
+        details.append(f"⚠ Moderately suitable for {soil_type} soil")
+
+    ph_min, ph_max = requirements['ph_range']
+    if ph_min <= ph_level <= ph_max:
+        details.append(f"✓ pH requirement met ({ph_min}-{ph_max})")
+    else:
+        details.append(f"⚠ pH adjustment may be needed (optimal: {ph_min}-{ph_max})")
+
+    if season in requirements['season'] or 'annual' in requirements['season']:
+        details.append(f"✓ Suitable for {season} season")
+    else:
+        details.append(f"⚠ Not ideal season (best: {', '.join(requirements['season'])})")
+
+    if experience_level in requirements['experience']:
+        details.append(f"✓ Suitable for {experience_level} farmers")
+    else:
+        details.append(f"⚠ May require {requirements['experience'][-1]} level expertise")
+
+    if requirements['water_need'] in WATER_COMPATIBILITY.get(water_availability, []):
+        details.append(f"✓ Water requirement compatible")
+    else:
+        details.append(f"⚠ Water requirement: {requirements['water_need']}")
+
+    if requirements['market_type'] == market_preference or market_preference == 'mixed':
+        details.append(f"✓ Matches market preference")
+    else:
+        details.append(f"⚠ Different market category: {requirements['market_type']}")
+
+    return details
@@ -0,0 +1,145 @@
+"""
+Read access to the columnar store of the historical datasets.
+
+The store is built by ``python -m models.ingest_data`` and holds two
+memory-mappable bundles (see model_store):
+
+    climate   one row per (area, year): rainfall_mm, avg_temp, pesticides_tonnes
+    yields    one row per (area, item, year): yield_hg_ha plus the climate columns
+
+String columns are stored as integer codes with their vocabulary in the
+bundle metadata. Loading only maps the .npy files, so it takes milliseconds
+and needs NumPy but not pandas.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from .model_store import load_bundle, bundle_exists
+
+DATASET_DIR = 'dataset'
+STORE_DIR = 'dataset/store'
+SOURCE_FILES = ('pesticides.csv', 'rainfall.csv', 'temp.csv', 'yield.csv')
+TABLES = ('climate', 'yields')
+
+# Alternative spellings in rainfall.csv (World Bank) and temp.csv (Berkeley Earth)
+# mapped to the FAO names used by yield.csv and pesticides.csv
+COUNTRY_ALIASES = {
+    'Bolivia': 'Bolivia (Plurinational State of)',
+    'Bosnia And Herzegovina': 'Bosnia and Herzegovina',
+    'Congo (Democratic Republic Of The)': 'Democratic Republic of the Congo',
+    'Congo, Dem. Rep.': 'Democratic Republic of the Congo',
+    'Congo, Rep.': 'Congo',
+    "Cote d'Ivoire": "Côte d'Ivoire",
+    "Côte D'Ivoire": "Côte d'Ivoire",
+    'Czech Republic': 'Czechia',
+    'Guinea Bissau': 'Guinea-Bissau',
+    'Hong Kong': 'China, Hong Kong SAR',
+    'Hong Kong SAR, China': 'China, Hong Kong SAR',
+    'Iran': 'Iran (Islamic Republic of)',
+    'Kyrgyz Republic': 'Kyrgyzstan',
+    'Lao PDR': "Lao People's Democratic Republic",
+    'Laos': "Lao People's Democratic Republic",
+    'Macao SAR, China': 'China, Macao SAR',
+    'Macedonia': 'The former Yugoslav Republic of Macedonia',
+    'Micronesia': 'Micronesia (Federated States of)',
+    'Moldova': 'Republic of Moldova',
+    'North Korea': "Democratic People's Republic of Korea",
+    'Russia': 'Russian Federation',
+    'Slovak Republic': 'Slovakia',
+    'South Korea': 'Republic of Korea',
+    'St. Kitts and Nevis': 'Saint Kitts and Nevis',
+    'St. Lucia': 'Saint Lucia',
+    'St. Vincent and the Grenadines': 'Saint Vincent and the Grenadines',
+    'Syria': 'Syrian Arab Republic',
+    'Taiwan': 'China, Taiwan Province of',
+    'Tanzania': 'United Republic of Tanzania',
+    'United States': 'United States of America',
+    'Venezuela, RB': 'Venezuela (Bolivarian Republic of)',
+    'Vietnam': 'Viet Nam',
+}
+
+
+def normalize_area(name):
+    """Canonical (FAO) spelling of a country name"""
+    name = str(name).strip()
+    return COUNTRY_ALIASES.get(name, name)
+
+
+def source_hashes(dataset_dir=DATASET_DIR):
+    """SHA-256 of each source CSV"""
+    hashes = {}
+    for filename in SOURCE_FILES:
+        digest = hashlib.sha256()
+        with open(os.path.join(dataset_dir, filename), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        hashes[filename] = digest.hexdigest()
+    return hashes
+
+
+def store_is_stale(dataset_dir=DATASET_DIR, store_dir=STORE_DIR):
+    """True when a table is missing or was built from different CSV contents"""
+    hashes = source_hashes(dataset_dir)
+    for name in TABLES:
+        directory = os.path.join(store_dir, name)
+        if not bundle_exists(directory):
+            return True
+        _, metadata = load_bundle(directory, mmap_mode='r')
+        if metadata.get('sources') != hashes:
+            return True
+    return False
+
+
+class DataTable:
+    """
+    Read-only columnar table. ``table['year']`` returns the raw (memory-mapped)
+    column; categorical columns come back as codes, use ``decode`` for strings.
+    """
+
+    def __init__(self, arrays, metadata):
+        self.arrays = arrays
+        self.columns = metadata['columns']
+        self.categories = metadata['categories']
+        self.sources = metadata.get('sources', {})
+        self._code_maps = {
+            column: {value: code for code, value in enumerate(vocabulary)}
+            for column, vocabulary in self.categories.items()
+        }
+
+    def __len__(self):
+        return len(self.arrays[self.columns[0]])
+
+    def __getitem__(self, column):
+        return self.arrays[column]
+
+    def code(self, column, value):
+        """Integer code of a categorical value, or -1 if it never occurs"""
+        if column == 'area':
+            value = normalize_area(value)
+        return self._code_maps[column].get(value, -1)
+
+    def decode(self, column, codes=None):
+        """String values of a categorical column (or of the given codes)"""
+        vocabulary = np.asarray(self.categories[column], dtype=object)
+        return vocabulary[self.arrays[column] if codes is None else codes]
+
+    def to_frame(self):
+        """pandas DataFrame with categorical columns as pd.Categorical"""
+        import pandas as pd
+
+        data = {}
+        for column in self.columns:
+            if column in self.categories:
+                data[column] = pd.Categorical.from_codes(self.arrays[column], self.categories[column])
+            else:
+                data[column] = np.asarray(self.arrays[column])
+        return pd.DataFrame(data)
+
+
+def load_table(name, store_dir=STORE_DIR, mmap_mode='r'):
+    """Load the ``climate`` or ``yields`` table, memory-mapped read-only by default"""
+    arrays, metadata = load_bundle(os.path.join(store_dir, name), mmap_mode=mmap_mode)
+    return DataTable(arrays, metadata)
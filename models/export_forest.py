@@ -0,0 +1,77 @@
+"""
+Export the disease RandomForest into flat NumPy arrays.
+
+Usage:
+    python -m models.export_forest [--model models/disease_prediction_model.pkl]
+                                   [--output models/disease_forest.npz]
+                                   [--bundle-dir models/disease_forest]
+
+The compiled forest is checked against the pickled sklearn model before it is
+written: predictions on every row of dataset/yield_df.csv plus a block of
+random inputs must match exactly, otherwise nothing is saved.
+"""
+
+import argparse
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .prediction_models import CompiledForest
+
+DISEASE_FEATURES = ['average_rain_fall_mm_per_year', 'avg_temp', 'pesticides_tonnes']
+
+
+def load_verification_inputs(scaler, dataset_path='dataset/yield_df.csv', n_random=20000, seed=42):
+    """Scaled feature rows drawn from the historical data plus random rows around it"""
+    data = pd.read_csv(dataset_path)
+    observed = data[DISEASE_FEATURES].dropna().to_numpy(dtype=float)
+
+    rng = np.random.default_rng(seed)
+    low, high = observed.min(axis=0), observed.max(axis=0)
+    spread = high - low
+    synthetic = rng.uniform(low - 0.2 * spread, high + 0.2 * spread, size=(n_random, observed.shape[1]))
+
+    return scaler.transform(np.vstack([observed, synthetic]))
+
+
+def verify_compiled_forest(model, compiled, X):
+    """Return the number of rows where the compiled forest disagrees with sklearn"""
+    expected_proba = model.predict_proba(X)
+    actual_proba = compiled.predict_proba(X)
+    proba_mismatches = np.any(expected_proba != actual_proba, axis=1)
+    label_mismatches = model.predict(X) != compiled.predict(X)
+    return int(np.count_nonzero(proba_mismatches | label_mismatches))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default='models/disease_prediction_model.pkl')
+    parser.add_argument('--scaler', default='models/disease_scaler.pkl')
+    parser.add_argument('--dataset', default='dataset/yield_df.csv')
+    parser.add_argument('--output', default='models/disease_forest.npz')
+    parser.add_argument('--bundle-dir', default='models/disease_forest',
+                        help='Directory of .npy files for memory-mapped loading')
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    compiled = CompiledForest.from_sklearn(model)
+
+    X = load_verification_inputs(scaler, args.dataset)
+    mismatches = verify_compiled_forest(model, compiled, X)
+    if mismatches:
+        print(f"Compiled forest disagrees with sklearn on {mismatches} of {len(X)} rows, not saving")
+        return 1
+
+    compiled.save(args.output)
+    compiled.save_bundle(args.bundle_dir)
+    print(f"✓ Verified {len(X)} rows against {args.model}")
+    print(f"✓ Saved {len(compiled)} trees, {len(compiled.feature)} nodes to {args.output}")
+    print(f"✓ Saved memory-mappable bundle to {args.bundle_dir}/")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
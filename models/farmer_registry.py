@@ -0,0 +1,303 @@
+"""
+Farmer registry with a spatial grid and a crop inverted index.
+
+Usage:
+    python -m models.farmer_registry [--size 100000] [--seed 0] [--output dataset/farmers]
+
+Farmers are stored column-wise: coordinates, a bitmask of the crops they
+grow, and small codes for name, home town and profile. Rows are indexed
+by a uniform lat/lon grid of CELL_DEG cells stored CSR-style, i.e. row
+numbers sorted by cell plus one offset per cell. Each crop gets its own
+posting list in the same cell order, so "farmers growing X" is an
+inverted-index lookup that is already bucketed spatially.
+
+A k-nearest query visits grid rings outward from the query's cell. After
+ring r, every unvisited farmer is at least r cell widths away, so the
+search stops as soon as the k-th best distance is within that bound or the
+radius is covered. The cost depends on the farmers near the query, not on
+the size of the registry.
+
+There is no real registry yet, so ``synthetic`` builds a reproducible one
+clustered around Indian farming towns. The CLI saves it as a bundle that
+``load`` memory-maps.
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from .model_store import bundle_exists, load_bundle, save_bundle
+
+FARMER_REGISTRY_DIR = 'dataset/farmers'
+CELL_DEG = 0.1
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+
+CROPS = ('Rice', 'Wheat', 'Cotton', 'Vegetables', 'Fruits', 'Maize', 'Sugarcane', 'Pulses',
+         'Mustard', 'Barley', 'Soybean', 'Potato', 'Groundnut', 'Millets', 'Tea', 'Spices')
+
+# (town, state, latitude, longitude)
+PLACES = (
+    ('Delhi', 'Delhi', 28.61, 77.21), ('Ludhiana', 'Punjab', 30.90, 75.86),
+    ('Amritsar', 'Punjab', 31.63, 74.87), ('Bathinda', 'Punjab', 30.21, 74.95),
+    ('Karnal', 'Haryana', 29.69, 76.99), ('Hisar', 'Haryana', 29.15, 75.72),
+    ('Chandigarh', 'Chandigarh', 30.73, 76.78), ('Shimla', 'Himachal Pradesh', 31.10, 77.17),
+    ('Srinagar', 'Jammu and Kashmir', 34.08, 74.80), ('Dehradun', 'Uttarakhand', 30.32, 78.03),
+    ('Lucknow', 'Uttar Pradesh', 26.85, 80.95), ('Kanpur', 'Uttar Pradesh', 26.45, 80.33),
+    ('Varanasi', 'Uttar Pradesh', 25.32, 82.97), ('Agra', 'Uttar Pradesh', 27.18, 78.01),
+    ('Meerut', 'Uttar Pradesh', 28.98, 77.71), ('Patna', 'Bihar', 25.59, 85.14),
+    ('Gaya', 'Bihar', 24.80, 85.00), ('Ranchi', 'Jharkhand', 23.34, 85.31),
+    ('Kolkata', 'West Bengal', 22.57, 88.36), ('Siliguri', 'West Bengal', 26.73, 88.40),
+    ('Guwahati', 'Assam', 26.14, 91.74), ('Bhubaneswar', 'Odisha', 20.30, 85.82),
+    ('Cuttack', 'Odisha', 20.46, 85.88), ('Raipur', 'Chhattisgarh', 21.25, 81.63),
+    ('Bhopal', 'Madhya Pradesh', 23.26, 77.41), ('Indore', 'Madhya Pradesh', 22.72, 75.86),
+    ('Jabalpur', 'Madhya Pradesh', 23.18, 79.99), ('Jaipur', 'Rajasthan', 26.91, 75.79),
+    ('Jodhpur', 'Rajasthan', 26.24, 73.02), ('Kota', 'Rajasthan', 25.21, 75.86),
+    ('Ahmedabad', 'Gujarat', 23.02, 72.57), ('Rajkot', 'Gujarat', 22.30, 70.80),
+    ('Surat', 'Gujarat', 21.17, 72.83), ('Mumbai', 'Maharashtra', 19.08, 72.88),
+    ('Pune', 'Maharashtra', 18.52, 73.86), ('Nashik', 'Maharashtra', 20.00, 73.79),
+    ('Nagpur', 'Maharashtra', 21.15, 79.09), ('Hyderabad', 'Telangana', 17.39, 78.49),
+    ('Warangal', 'Telangana', 17.97, 79.59), ('Vijayawada', 'Andhra Pradesh', 16.51, 80.65),
+    ('Guntur', 'Andhra Pradesh', 16.31, 80.44), ('Visakhapatnam', 'Andhra Pradesh', 17.69, 83.22),
+    ('Bengaluru', 'Karnataka', 12.97, 77.59), ('Mysuru', 'Karnataka', 12.30, 76.64),
+    ('Hubballi', 'Karnataka', 15.36, 75.12), ('Panaji', 'Goa', 15.49, 73.83),
+    ('Chennai', 'Tamil Nadu', 13.08, 80.27), ('Coimbatore', 'Tamil Nadu', 11.02, 76.96),
+    ('Madurai', 'Tamil Nadu', 9.93, 78.12), ('Kochi', 'Kerala', 9.93, 76.27),
+    ('Kozhikode', 'Kerala', 11.26, 75.78), ('Thiruvananthapuram', 'Kerala', 8.52, 76.94),
+)
+
+# Approximate state centroids, for queries that name only a state
+STATES = {
+    'punjab': (30.84, 75.42), 'haryana': (29.06, 76.09), 'uttar pradesh': (26.85, 80.91),
+    'maharashtra': (19.66, 75.30), 'karnataka': (15.32, 75.71), 'tamil nadu': (11.13, 78.66),
+    'andhra pradesh': (15.91, 79.74), 'telangana': (18.11, 79.02), 'kerala': (10.85, 76.27),
+    'gujarat': (22.26, 71.19), 'rajasthan': (27.02, 74.22), 'madhya pradesh': (22.97, 78.66),
+    'bihar': (25.10, 85.31), 'west bengal': (22.99, 87.85), 'odisha': (20.95, 85.10),
+    'assam': (26.20, 92.94), 'jharkhand': (23.61, 85.28), 'chhattisgarh': (21.28, 81.87),
+    'uttarakhand': (30.07, 79.02), 'himachal pradesh': (31.10, 77.17),
+    'jammu and kashmir': (33.78, 76.58), 'goa': (15.30, 74.12), 'delhi': (28.61, 77.21),
+    'chandigarh': (30.73, 76.78)
+}
+
+FIRST_NAMES = ('Amit', 'Sunita', 'Kiran', 'Deepak', 'Rajesh', 'Priya', 'Suresh', 'Lakshmi', 'Ramesh', 'Anita',
+               'Vijay', 'Meena', 'Arjun', 'Kavita', 'Harpreet', 'Gurpreet', 'Manoj', 'Rekha', 'Sanjay', 'Pooja')
+LAST_NAMES = ('Singh', 'Devi', 'Patil', 'Yadav', 'Kumar', 'Sharma', 'Patel', 'Reddy', 'Naidu', 'Gowda',
+              'Nair', 'Das', 'Verma', 'Chauhan', 'Jadhav', 'Mishra', 'Rao', 'Iyer', 'Sandhu', 'Pillai')
+SPECIALIZATIONS = ('Organic farming', 'Sustainable agriculture', 'Precision farming', 'Water management',
+                   'Integrated pest management', 'Soil health', 'Dairy and mixed farming', 'Horticulture')
+
+COLUMNS = ('lat', 'lon', 'crops', 'place', 'first_name', 'last_name', 'experience', 'rating', 'specialization')
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance from one point to arrays of points"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def resolve_location(location):
+    """(lat, lon) for "Town", "Town, State" or "State", or None if no part is known"""
+    parts = [part.strip().lower() for part in str(location or '').split(',') if part.strip()]
+    towns = {town.lower(): (lat, lon) for town, _, lat, lon in PLACES}
+    for part in parts:
+        if part in towns:
+            return towns[part]
+    for part in parts:
+        if part in STATES:
+            return STATES[part]
+    return None
+
+
+def crop_bit(crop):
+    """Bit of ``crop`` in the crops mask, None for "All"; KeyError for an unknown crop"""
+    if crop in (None, '', 'All'):
+        return None
+    names = {name.lower(): bit for bit, name in enumerate(CROPS)}
+    return names[str(crop).strip().lower()]
+
+
+class FarmerRegistry:
+    def __init__(self, columns, cell_deg=CELL_DEG):
+        self.columns = columns
+        self.cell_deg = cell_deg
+        lat = np.asarray(columns['lat'], dtype=np.float64)
+        lon = np.asarray(columns['lon'], dtype=np.float64)
+        self.lat = lat
+        self.lon = lon
+        self.lat0 = math.floor(lat.min()) if len(lat) else 0.0
+        self.lon0 = math.floor(lon.min()) if len(lon) else 0.0
+        self.n_rows = int((lat.max() - self.lat0) // cell_deg) + 1 if len(lat) else 1
+        self.n_cols = int((lon.max() - self.lon0) // cell_deg) + 1 if len(lon) else 1
+        # Smallest cos(latitude) in the grid, for the ring search's distance bound
+        widest_lat = max(abs(self.lat0), abs(self.lat0 + self.n_rows * cell_deg))
+        self.min_cos_lat = math.cos(math.radians(min(widest_lat, 90.0)))
+
+        cells = self._cells(lat, lon)
+        order = np.argsort(cells, kind='stable').astype(np.int32)
+        n_cells = self.n_rows * self.n_cols
+        self.postings = {None: self._posting(order, cells, n_cells)}
+        crops = np.asarray(columns['crops'])[order]
+        for bit in range(len(CROPS)):
+            members = order[(crops >> bit) & 1 == 1]
+            self.postings[bit] = self._posting(members, cells, n_cells)
+
+    def __len__(self):
+        return len(self.lat)
+
+    @staticmethod
+    def _posting(rows, cells, n_cells):
+        return rows, np.searchsorted(cells[rows], np.arange(n_cells + 1)).astype(np.int32)
+
+    def _cells(self, lat, lon):
+        rows = ((lat - self.lat0) // self.cell_deg).astype(np.int64)
+        cols = ((lon - self.lon0) // self.cell_deg).astype(np.int64)
+        return rows * self.n_cols + cols
+
+    @classmethod
+    def synthetic(cls, size=100000, seed=0):
+        """A reproducible registry of ``size`` farmers clustered around PLACES"""
+        rng = np.random.default_rng(seed)
+        place = rng.integers(0, len(PLACES), size).astype(np.int16)
+        centers = np.array([(lat, lon) for _, _, lat, lon in PLACES])[place]
+        offsets = rng.normal(0, 0.5, (size, 2))
+        crop_weights = np.linspace(2.0, 0.5, len(CROPS))
+        crop_weights /= crop_weights.sum()
+        crops = np.zeros(size, dtype=np.uint16)
+        for _ in range(3):
+            picks = rng.choice(len(CROPS), size, p=crop_weights)
+            crops |= (1 << picks).astype(np.uint16)
+        return cls({
+            'lat': centers[:, 0] + offsets[:, 0],
+            'lon': centers[:, 1] + offsets[:, 1],
+            'crops': crops,
+            'place': place,
+            'first_name': rng.integers(0, len(FIRST_NAMES), size).astype(np.uint8),
+            'last_name': rng.integers(0, len(LAST_NAMES), size).astype(np.uint8),
+            'experience': rng.integers(2, 40, size).astype(np.uint8),
+            'rating': np.round(rng.uniform(3.5, 5.0, size), 1).astype(np.float32),
+            'specialization': rng.integers(0, len(SPECIALIZATIONS), size).astype(np.uint8)
+        })
+
+    @classmethod
+    def load(cls, directory=FARMER_REGISTRY_DIR, mmap_mode='r'):
+        arrays, metadata = load_bundle(directory, mmap_mode=mmap_mode)
+        return cls(arrays, metadata.get('cell_deg', CELL_DEG))
+
+    @classmethod
+    def load_or_synthetic(cls, directory=FARMER_REGISTRY_DIR, size=100000, seed=0):
+        return cls.load(directory) if bundle_exists(directory) else cls.synthetic(size, seed)
+
+    def save(self, directory=FARMER_REGISTRY_DIR):
+        save_bundle(directory, {name: self.columns[name] for name in COLUMNS},
+                    {'cell_deg': self.cell_deg, 'size': len(self)})
+
+    def nearest(self, lat, lon, k=6, radius_km=50.0, crop=None):
+        """Up to ``k`` (row, distance_km) pairs within ``radius_km``, nearest first"""
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f'Coordinates out of range: {lat}, {lon}')
+        rows, offsets = self.postings[crop_bit(crop)]
+        r0 = int((lat - self.lat0) // self.cell_deg)
+        c0 = int((lon - self.lon0) // self.cell_deg)
+        # Rings before the first one that reaches the grid are empty; skip them,
+        # and the whole search if the grid is farther away than the radius
+        outside = max(-r0, r0 - self.n_rows + 1, -c0, c0 - self.n_cols + 1, 0)
+        if outside and self._covered_km(lat, lon, r0, c0, outside - 1) >= radius_km:
+            return []
+        max_ring = outside + max(self.n_rows, self.n_cols)
+        found_rows, found_dist = [], []
+        kth = math.inf
+        for ring in range(outside, max_ring + 1):
+            candidates = []
+            for r, c in self._ring(r0, c0, ring):
+                cell = r * self.n_cols + c
+                start, end = offsets[cell], offsets[cell + 1]
+                if start != end:
+                    candidates.append(rows[start:end])
+            if candidates:
+                candidates = np.concatenate(candidates)
+                distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+                within = distances <= radius_km
+                found_rows.append(candidates[within])
+                found_dist.append(distances[within])
+                n_found = sum(len(d) for d in found_dist)
+                if n_found >= k:
+                    kth = np.partition(np.concatenate(found_dist), k - 1)[k - 1]
+            covered_km = self._covered_km(lat, lon, r0, c0, ring)
+            if kth <= covered_km or covered_km >= radius_km:
+                break
+        if not found_rows:
+            return []
+        found_rows = np.concatenate(found_rows)
+        found_dist = np.concatenate(found_dist)
+        best = np.argsort(found_dist, kind='stable')[:k]
+        return [(int(found_rows[i]), float(found_dist[i])) for i in best]
+
+    def _covered_km(self, lat, lon, r0, c0, ring):
+        """Lower bound on the distance to any farmer outside the rings visited so far"""
+        south = self.lat0 + (r0 - ring) * self.cell_deg
+        west = self.lon0 + (c0 - ring) * self.cell_deg
+        side = (2 * ring + 1) * self.cell_deg
+        lat_km = min(lat - south, south + side - lat) * KM_PER_DEG
+        # Great-circle distance to a meridian d degrees of longitude away is asin(cos(lat) * sin(d))
+        d_lon = math.radians(min(lon - west, west + side - lon, 90.0))
+        cos_lat = min(self.min_cos_lat, math.cos(math.radians(lat)))
+        lon_km = EARTH_RADIUS_KM * math.asin(cos_lat * math.sin(max(d_lon, 0.0)))
+        return max(min(lat_km, lon_km), 0.0)
+
+    def _ring(self, r0, c0, ring):
+        """In-grid cells at Chebyshev distance ``ring`` from (r0, c0)"""
+        if ring == 0:
+            return [(r0, c0)] if 0 <= r0 < self.n_rows and 0 <= c0 < self.n_cols else []
+        top, bottom, left, right = r0 - ring, r0 + ring, c0 - ring, c0 + ring
+        columns = range(max(left, 0), min(right, self.n_cols - 1) + 1)
+        inner_rows = range(max(top + 1, 0), min(bottom - 1, self.n_rows - 1) + 1)
+        cells = []
+        for r in (top, bottom):
+            if 0 <= r < self.n_rows:
+                cells += [(r, c) for c in columns]
+        for c in (left, right):
+            if 0 <= c < self.n_cols:
+                cells += [(r, c) for r in inner_rows]
+        return cells
+
+    def profile(self, row, distance_km=None):
+        """API record for one farmer"""
+        columns = self.columns
+        town, state, _, _ = PLACES[int(columns['place'][row])]
+        mask = int(columns['crops'][row])
+        record = {
+            'name': f"{FIRST_NAMES[columns['first_name'][row]]} {LAST_NAMES[columns['last_name'][row]]}",
+            'location': f'{town}, {state}',
+            'crops': [name for bit, name in enumerate(CROPS) if mask >> bit & 1],
+            'experience': f"{int(columns['experience'][row])} years",
+            'specialization': SPECIALIZATIONS[int(columns['specialization'][row])],
+            'contact': f"+91 9{row % 10}xxx-xxxxx",
+            'rating': round(float(columns['rating'][row]), 1)
+        }
+        if distance_km is not None:
+            record['distance'] = f'{distance_km:.1f} km'
+            record['distance_km'] = round(distance_km, 2)
+        return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build a synthetic farmer registry bundle')
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=FARMER_REGISTRY_DIR)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    registry = FarmerRegistry.synthetic(args.size, args.seed)
+    registry.save(args.output)
+    print(f"✓ Wrote {len(registry):,} farmers to {args.output}/ in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Rule-based NPK fertilizer recommendations.
+
+The training notebook pickled these rules as a closure, which joblib cannot
+serialize (the shipped fertilizer_recommender.pkl is empty). The
+recommender is a module-level class, so it pickles by reference and loads
+anywhere ``models`` is importable.
+"""
+
+FERTILIZER_RULES = {
+    'Maize': {
+        'base_npk': {'N': 120, 'P': 60, 'K': 40},
+        'rainfall_adjustment': {
+            'low': {'N': 1.2, 'P': 1.1, 'K': 1.0},
+            'medium': {'N': 1.0, 'P': 1.0, 'K': 1.0},
+            'high': {'N': 0.8, 'P': 0.9, 'K': 1.1}
+        }
+    },
+    'Rice': {
+        'base_npk': {'N': 100, 'P': 50, 'K': 50},
+        'rainfall_adjustment': {
+            'low': {'N': 1.3, 'P': 1.2, 'K': 1.0},
+            'medium': {'N': 1.0, 'P': 1.0, 'K': 1.0},
+            'high': {'N': 0.9, 'P': 0.8, 'K': 1.2}
+        }
+    },
+    'Potatoes': {
+        'base_npk': {'N': 150, 'P': 80, 'K': 120},
+        'rainfall_adjustment': {
+            'low': {'N': 1.2, 'P': 1.1, 'K': 1.1},
+            'medium': {'N': 1.0, 'P': 1.0, 'K': 1.0},
+            'high': {'N': 0.8, 'P': 0.9, 'K': 1.0}
+        }
+    },
+    'Soybeans': {
+        'base_npk': {'N': 20, 'P': 40, 'K': 60},  # Lower N due to nitrogen fixation
+        'rainfall_adjustment': {
+            'low': {'N': 1.5, 'P': 1.2, 'K': 1.1},
+            'medium': {'N': 1.0, 'P': 1.0, 'K': 1.0},
+            'high': {'N': 0.8, 'P': 0.8, 'K': 1.2}
+        }
+    }
+}
+
+
+class FertilizerRecommender:
+    """Callable returning (npk, matched_crop) for a crop name and annual rainfall"""
+
+    def __init__(self, rules=None, default_crop='Maize'):
+        self.rules = rules or FERTILIZER_RULES
+        self.default_crop = default_crop
+
+    def match_crop(self, crop):
+        crop_key = crop.replace(',', '').replace(' paddy', '').strip()
+        for crop_name in self.rules:
+            if crop_name.lower() in crop_key.lower() or crop_key.lower() in crop_name.lower():
+                return crop_name
+        return self.default_crop
+
+    def __call__(self, crop, rainfall, soil_type='medium'):
+        matching_crop = self.match_crop(crop)
+        base_npk = self.rules[matching_crop]['base_npk']
+
+        if rainfall < 500:
+            rainfall_cat = 'low'
+        elif rainfall < 1200:
+            rainfall_cat = 'medium'
+        else:
+            rainfall_cat = 'high'
+        adjustments = self.rules[matching_crop]['rainfall_adjustment'][rainfall_cat]
+
+        recommended_npk = {nutrient: round(base_npk[nutrient] * adjustments[nutrient]) for nutrient in ('N', 'P', 'K')}
+        return recommended_npk, matching_crop
@@ -0,0 +1,130 @@
+"""
+Server-sent events for the forum: new questions, answers and updated posts.
+
+One ForumBroadcaster per process follows the store's events table, which
+triggers fill whenever a question is posted, answered or updated. A
+background thread asks the store for events newer than the last one it
+saw. It runs every ``poll_interval`` seconds, or immediately when a local
+request calls ``notify`` after writing. That range query on the primary
+key also picks up changes that other worker processes wrote. Each event is
+encoded once into an SSE frame whose ``event:`` is its kind ('question',
+'answer' or 'update') and whose ``id:`` is the event id. The same bytes
+are then handed to every listener and kept in a short backlog.
+
+The event id is also the reconnect cursor. A client that comes back with
+``Last-Event-ID`` (or ``?since=``) first gets what it missed, from the
+backlog or from the store if it is older. After that it gets only new
+events; nothing already on the page is re-sent.
+
+Listeners must not block. The ASGI entry point registers one listener per
+event loop, which fans each frame out to the loop's connections, so idle
+streams there cost a queue rather than a thread. The Flask route uses
+``wait`` instead and keeps a thread per stream.
+"""
+
+import json
+import threading
+from collections import deque
+
+HEARTBEAT = b': keep-alive\n\n'
+
+
+def encode_event(event_id, event, data):
+    payload = json.dumps(data, separators=(',', ':'), default=str)
+    return f'id: {event_id}\nevent: {event}\ndata: {payload}\n\n'.encode('utf-8')
+
+
+def parse_cursor(value):
+    """Row id from a Last-Event-ID header or ?since= value; None if absent, ValueError if malformed"""
+    if value in (None, ''):
+        return None
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid since cursor') from None
+    if cursor < 0:
+        raise ValueError('Invalid since cursor')
+    return cursor
+
+
+class ForumBroadcaster:
+    def __init__(self, store, poll_interval=1.0, backlog=512, replay_limit=200):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.replay_limit = replay_limit
+        self._recent = deque(maxlen=backlog)
+        self._listeners = []
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.last_id = store.latest_id('events')
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='forum-events', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def notify(self):
+        """Check the store now instead of at the next poll (after a local write)"""
+        self._wake.set()
+
+    def subscribe(self, listener):
+        """Call ``listener(event_id, frame)`` for each new event; returns an unsubscribe function"""
+        with self._changed:
+            self._listeners = self._listeners + [listener]
+
+        def unsubscribe():
+            with self._changed:
+                self._listeners = [other for other in self._listeners if other is not listener]
+        return unsubscribe
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error polling forum events: {e}")
+
+    def poll(self):
+        """Publish every forum event stored since the last poll"""
+        while True:
+            rows = self.store.events(self.last_id, limit=self.replay_limit)
+            if not rows:
+                return
+            for row_id, kind, record in rows:
+                frame = encode_event(row_id, kind, record)
+                with self._changed:
+                    self._recent.append((row_id, frame))
+                    self.last_id = row_id
+                    listeners = self._listeners
+                    self._changed.notify_all()
+                for listener in listeners:
+                    try:
+                        listener(row_id, frame)
+                    except Exception as e:
+                        print(f"Error delivering forum event: {e}")
+
+    def since(self, cursor):
+        """(event_id, frame) pairs after ``cursor``, at most replay_limit of them"""
+        if cursor is None or cursor >= self.last_id:
+            return []
+        with self._changed:
+            recent = list(self._recent)
+        if recent and cursor >= recent[0][0] - 1:
+            return [(row_id, frame) for row_id, frame in recent if row_id > cursor][:self.replay_limit]
+        return [(row_id, encode_event(row_id, kind, record))
+                for row_id, kind, record in self.store.events(cursor, limit=self.replay_limit)]
+
+    def wait(self, cursor, timeout):
+        """Block until an event newer than ``cursor`` is published or ``timeout`` passes; returns ``since(cursor)``"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.last_id > cursor or self._stopped.is_set(), timeout)
+        return self.since(cursor)
@@ -0,0 +1,121 @@
+"""
+Sorted-key index over the historical yields table.
+
+Rows are addressed by a single int64 key packed from the (area, item, year)
+codes. The table is stored in key order, so a point lookup or a year range
+is one binary search. Top-k rankings across countries use a secondary order
+per metric, sorted by (item, year, value), built the first time that metric
+is ranked.
+"""
+
+import threading
+
+import numpy as np
+
+from .data_store import STORE_DIR, load_table
+
+METRICS = ('yield_hg_ha', 'rainfall_mm', 'avg_temp', 'pesticides_tonnes')
+YEAR_BITS = 16
+
+
+def pack_key(area, item, year):
+    if not 0 <= int(year) < 1 << YEAR_BITS:
+        raise ValueError(f'Year {year} cannot be packed into a key')
+    return (int(area) << 32) | (int(item) << 16) | int(year)
+
+
+def pack_keys(area, item, year):
+    return (np.asarray(area, dtype=np.int64) << 32) | (np.asarray(item, dtype=np.int64) << 16) | np.asarray(year, dtype=np.int64)
+
+
+class HistoryIndex:
+    def __init__(self, table):
+        self.table = table
+        keys = pack_keys(table['area'], table['item'], table['year'])
+        if np.any(keys[1:] < keys[:-1]):
+            order = np.argsort(keys, kind='stable')
+            self.rows = {column: np.asarray(table[column])[order] for column in table.columns}
+            keys = keys[order]
+        else:
+            self.rows = {column: table[column] for column in table.columns}
+        self.keys = keys
+        self.years = (int(self.rows['year'].min()), int(self.rows['year'].max())) if len(keys) else (None, None)
+        self._rankings = {}
+        self._rankings_lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store_dir=STORE_DIR):
+        return cls(load_table('yields', store_dir))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def check_year(self, year):
+        """Raise ValueError unless ``year`` lies within the years the table covers"""
+        if year is not None and (self.years[0] is None or not self.years[0] <= year <= self.years[1]):
+            raise ValueError(f'Year {year} is outside the available range {self.years[0]}-{self.years[1]}')
+
+    def _codes(self, area, item):
+        return self.table.code('area', area), self.table.code('item', item)
+
+    def _record(self, position):
+        record = {
+            'area': self.table.categories['area'][self.rows['area'][position]],
+            'item': self.table.categories['item'][self.rows['item'][position]],
+            'year': int(self.rows['year'][position])
+        }
+        for metric in METRICS:
+            value = float(self.rows[metric][position])
+            record[metric] = None if np.isnan(value) else value
+        return record
+
+    def lookup(self, area, item, year):
+        """Record for one (area, item, year), or None"""
+        area_code, item_code = self._codes(area, item)
+        if area_code < 0 or item_code < 0 or self.years[0] is None or not self.years[0] <= year <= self.years[1]:
+            return None
+        key = pack_key(area_code, item_code, year)
+        position = int(np.searchsorted(self.keys, key))
+        if position < len(self.keys) and self.keys[position] == key:
+            return self._record(position)
+        return None
+
+    def year_range(self, area, item, start_year=None, end_year=None):
+        """Records for one (area, item) between two years, inclusive"""
+        area_code, item_code = self._codes(area, item)
+        if area_code < 0 or item_code < 0 or self.years[0] is None:
+            return []
+        start_year = self.years[0] if start_year is None else start_year
+        end_year = self.years[1] if end_year is None else end_year
+        low = np.searchsorted(self.keys, pack_key(area_code, item_code, start_year), side='left')
+        high = np.searchsorted(self.keys, pack_key(area_code, item_code, end_year), side='right')
+        return [self._record(position) for position in range(low, high)]
+
+    def _ranking(self, metric):
+        """Row positions ordered by (item, year, metric descending), NaNs last in each group"""
+        ranking = self._rankings.get(metric)
+        if ranking is None:
+            with self._rankings_lock:
+                ranking = self._rankings.get(metric)
+                if ranking is None:
+                    values = np.asarray(self.rows[metric], dtype=float)
+                    descending = np.where(np.isnan(values), np.inf, -values)
+                    order = np.lexsort((descending, self.rows['year'], self.rows['item']))
+                    group_keys = pack_keys(0, self.rows['item'][order], self.rows['year'][order])
+                    ranking = (order, group_keys)
+                    self._rankings[metric] = ranking
+        return ranking
+
+    def top_k(self, item, year, k=10, metric='yield_hg_ha'):
+        """The k countries with the highest ``metric`` for one item and year"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {', '.join(METRICS)}")
+        item_code = self.table.code('item', item)
+        if item_code < 0 or self.years[0] is None or not self.years[0] <= year <= self.years[1]:
+            return []
+        order, group_keys = self._ranking(metric)
+        group = pack_key(0, item_code, year)
+        low = np.searchsorted(group_keys, group, side='left')
+        high = min(np.searchsorted(group_keys, group, side='right'), low + k)
+        records = [self._record(position) for position in order[low:high]]
+        return [record for record in records if record[metric] is not None]
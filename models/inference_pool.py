@@ -0,0 +1,310 @@
+"""
+Run forest predictions in a pool of worker processes.
+
+Threads serving requests in one process contend for the GIL inside the
+forests' predict. This pool moves model evaluation to separate processes
+so inference uses every core. Each worker loads the yield and disease
+models once at start-up.
+
+Inputs and outputs never go through pickle. The pool owns a fixed set of
+slots, and each slot is a pair of shared-memory arrays: up to ``max_rows``
+feature rows in, one float per row out. A call copies its rows into a free
+slot and sends ``(group, slot, n_rows)`` over the task pipe of the worker
+with the fewest tasks in flight. The worker reads the rows in place, writes
+the predictions into the slot's output array and answers with
+``(slot, error)`` on its result pipe. A batch larger than one slot is split
+across several slots and so across several workers.
+
+Reload and rollback commands go down the same task pipes, so a worker
+applies them before any task sent after them.
+
+The result thread waits on every result pipe and every worker's sentinel.
+When a worker exits, the calls it was serving fail at once, their slots
+go back to the pool and a replacement worker is started. A replacement
+loads the artifacts currently on disk. A call that times out gives up its
+slots; one still held by a worker comes back when the worker answers, and
+a worker that has been on a task for longer than the timeout is killed
+and replaced.
+"""
+
+import atexit
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+N_FEATURES = 3
+GROUPS = ('yield', 'disease')
+
+
+def evaluate(models, group, rows):
+    """Raw forest output for ``rows``: yield per row, or the disease model's encoded class"""
+    version = models.current(group)
+    if group == 'yield':
+        return version.yield_model.predict(version.yield_scaler.transform(rows))
+    return version.disease_model.predict(version.disease_scaler.transform(rows))
+
+
+def _worker(models_dir, disease_backend, slots, tasks, results):
+    warnings.filterwarnings('ignore')
+    from .prediction_models import PredictionModels
+
+    models = PredictionModels(disease_backend=disease_backend, lazy=True)
+    models.models_dir = models_dir
+    for group in GROUPS:
+        models.ensure_loaded(group)
+    results.send(('ready', None))
+
+    while True:
+        try:
+            task = tasks.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        if task[0] in ('reload', 'rollback'):
+            action, group = task
+            try:
+                models.reload(group) if action == 'reload' else models.rollback(group)
+            except Exception as e:
+                print(f"Error applying {action} of {group} model in inference worker: {e}")
+            continue
+        group, slot, n_rows = task
+        inputs, outputs = slots[slot]
+        try:
+            outputs[:n_rows] = evaluate(models, group, inputs[:n_rows])
+            results.send((slot, None))
+        except Exception as e:
+            results.send((slot, str(e)))
+
+
+class ProcessInferencePool:
+    """A fixed pool of processes evaluating the forests on shared-memory buffers"""
+
+    def __init__(self, models_dir='models/', disease_backend='sklearn', workers=None, max_rows=4096,
+                 slots_per_worker=2, start_method='fork', timeout=60.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.groups = GROUPS
+        self.max_rows = max_rows
+        self.timeout = timeout
+        # Forked workers inherit the shared memory instead of re-attaching it by
+        # name; start the pool before the server starts its request threads
+        ctx = mp.get_context(start_method)
+        self._memory = []
+        self._slots = []
+        for _ in range(self.workers * slots_per_worker):
+            inputs = SharedMemory(create=True, size=max_rows * N_FEATURES * 8)
+            outputs = SharedMemory(create=True, size=max_rows * 8)
+            self._memory += [inputs, outputs]
+            self._slots.append((np.ndarray((max_rows, N_FEATURES), dtype=np.float64, buffer=inputs.buf),
+                                np.ndarray((max_rows,), dtype=np.float64, buffer=outputs.buf)))
+        self._free = queue.Queue()
+        for slot in range(len(self._slots)):
+            self._free.put(slot)
+        # slot -> (future, n_rows, worker index, dispatch time), and the slots each worker holds
+        self._pending = {}
+        self._in_flight = [set() for _ in range(self.workers)]
+        self._lock = threading.Lock()
+        self._ctx = ctx
+        self._worker_args = (models_dir, disease_backend)
+        self._processes = [None] * self.workers
+        self._senders = [None] * self.workers
+        self._receivers = [None] * self.workers
+        for index in range(self.workers):
+            self._start_worker(index)
+        self._closing = False
+        self._wake_receiver, self._wake_sender = ctx.Pipe(duplex=False)
+        self._ready = threading.Semaphore(0)
+        self.rows_processed = 0
+        self.restarts = 0
+        self._collector = threading.Thread(target=self._collect, name='inference-results', daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+
+    def _start_worker(self, index):
+        tasks, sender = self._ctx.Pipe(duplex=False)
+        receiver, results = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(target=_worker, name=f'inference-{index}', daemon=True, args=(
+            *self._worker_args, self._slots, tasks, results
+        ))
+        process.start()
+        # The worker holds its own ends now
+        tasks.close()
+        results.close()
+        self._processes[index] = process
+        self._senders[index] = sender
+        self._receivers[index] = receiver
+
+    def wait_ready(self, timeout=None):
+        """Block until every worker has loaded its models"""
+        for _ in range(self.workers):
+            if not self._ready.acquire(timeout=timeout):
+                raise TimeoutError("Inference workers did not start in time")
+
+    def predict(self, group, rows):
+        """Evaluate ``group`` on an (N, 3) array of feature rows; returns N floats"""
+        rows = np.asarray(rows, dtype=np.float64)
+        slots, futures = [], []
+        try:
+            for start in range(0, len(rows), self.max_rows):
+                chunk = rows[start:start + self.max_rows]
+                try:
+                    slot = self._free.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError("No free inference slot") from None
+                self._slots[slot][0][:len(chunk)] = chunk
+                slots.append(slot)
+                futures.append(self._dispatch(group, slot, len(chunk)))
+            return np.concatenate([future.result(self.timeout) for future in futures]) if futures else np.empty(0)
+        finally:
+            for slot, future in zip(slots, futures):
+                if not future.done():
+                    self._abandon(slot, future)
+
+    def _dispatch(self, group, slot, n_rows):
+        future = Future()
+        with self._lock:
+            index = min(range(self.workers), key=lambda i: len(self._in_flight[i]))
+            self._pending[slot] = (future, n_rows, index, time.monotonic())
+            self._in_flight[index].add(slot)
+            try:
+                self._senders[index].send((group, slot, n_rows))
+            except OSError:
+                # The worker is gone; the result thread fails the task when it replaces it
+                pass
+        return future
+
+    def _abandon(self, slot, future):
+        """Give up on a timed-out call; the slot is freed when its worker answers or is replaced"""
+        with self._lock:
+            entry = self._pending.get(slot)
+            if entry is None or entry[0] is not future:
+                return
+            future.cancel()
+            _, _, index, dispatched = entry
+            process = self._processes[index]
+            stuck = time.monotonic() - dispatched >= self.timeout
+        if stuck and process.is_alive():
+            print(f"Error: Inference worker {process.name} spent over {self.timeout}s on one task; restarting it")
+            process.terminate()
+
+    def reload(self, group):
+        self._broadcast(('reload', group))
+
+    def rollback(self, group):
+        self._broadcast(('rollback', group))
+
+    def close(self):
+        """Stop the workers and free the shared memory; safe to call more than once"""
+        if not self._memory:
+            return
+        self._closing = True
+        self._wake_sender.send(None)
+        self._collector.join()
+        for sender in self._senders:
+            try:
+                sender.send(None)
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        self._slots = []
+        for memory in self._memory:
+            memory.close()
+            memory.unlink()
+        self._memory = []
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'alive': sum(process.is_alive() for process in self._processes),
+            'restarts': self.restarts,
+            'slots': len(self._slots),
+            'free_slots': self._free.qsize(),
+            'rows_processed': self.rows_processed
+        }
+
+    def _broadcast(self, command):
+        with self._lock:
+            for sender in self._senders:
+                try:
+                    sender.send(command)
+                except OSError:
+                    pass
+
+    def _collect(self):
+        while True:
+            with self._lock:
+                sources = {self._wake_receiver: None}
+                for index in range(self.workers):
+                    sources[self._receivers[index]] = index
+                    sources[self._processes[index].sentinel] = index
+            ready = wait(list(sources))
+            if self._closing:
+                return
+            exited = set()
+            for source in ready:
+                index = sources[source]
+                if index is None:
+                    continue
+                if source is self._receivers[index]:
+                    try:
+                        while source.poll():
+                            self._finish(index, *source.recv())
+                    except (EOFError, OSError):
+                        exited.add(index)
+                else:
+                    exited.add(index)
+            for index in exited:
+                self._replace_worker(index)
+
+    def _finish(self, index, slot, error):
+        if slot == 'ready':
+            self._ready.release()
+            return
+        with self._lock:
+            future, n_rows, _, _ = self._pending.pop(slot)
+            self._in_flight[index].discard(slot)
+            if not future.cancelled():
+                if error is None:
+                    # Copy out before the slot can be reused by another call
+                    future.set_result(self._slots[slot][1][:n_rows].copy())
+                    self.rows_processed += n_rows
+                else:
+                    future.set_exception(RuntimeError(error))
+        self._free.put(slot)
+
+    def _replace_worker(self, index):
+        """Fail the tasks of a worker that exited, free their slots and start a new worker"""
+        process = self._processes[index]
+        process.join()
+        receiver = self._receivers[index]
+        # Answers it sent before exiting still count
+        try:
+            while receiver.poll():
+                self._finish(index, *receiver.recv())
+        except (EOFError, OSError):
+            pass
+        with self._lock:
+            lost = [(slot, self._pending.pop(slot)[0]) for slot in self._in_flight[index]]
+            self._in_flight[index] = set()
+            error = RuntimeError(f"Inference worker {process.name} exited with code {process.exitcode}")
+            for _, future in lost:
+                if not future.cancelled():
+                    future.set_exception(error)
+            receiver.close()
+            self._senders[index].close()
+            if self._closing:
+                return
+            print(f"Error: {error}; starting a replacement")
+            self._start_worker(index)
+            self.restarts += 1
+        for slot, _ in lost:
+            self._free.put(slot)
@@ -0,0 +1,127 @@
+"""
+Build the columnar store of the historical datasets, pre-joined on (Area, Year).
+
+Usage:
+    python -m models.ingest_data [--dataset-dir dataset] [--store-dir dataset/store] [--force]
+
+Parses pesticides.csv, rainfall.csv, temp.csv and yield.csv once. Country
+names from the World Bank and Berkeley Earth sources are mapped to the FAO
+spelling used by yield.csv, temperatures are averaged over the stations
+reported for a country and year, and unparseable numbers become NaN. The
+result is written as the ``climate`` and ``yields`` tables read by
+models.data_store, together with a hash of the CSVs they came from.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .data_store import DATASET_DIR, STORE_DIR, normalize_area, source_hashes, store_is_stale
+from .model_store import save_bundle
+
+
+def read_sources(dataset_dir=DATASET_DIR):
+    """Parse the source CSVs into tidy (Area, Year, value) frames"""
+    def tidy(frame, area, year, value, name):
+        frame = pd.DataFrame({
+            'area': frame[area].map(normalize_area),
+            'year': pd.to_numeric(frame[year], errors='coerce'),
+            name: pd.to_numeric(frame[value], errors='coerce')
+        }).dropna(subset=['year'])
+        frame['year'] = frame['year'].astype(np.int16)
+        return frame
+
+    rainfall = pd.read_csv(os.path.join(dataset_dir, 'rainfall.csv'))
+    rainfall.columns = rainfall.columns.str.strip()
+    rainfall = tidy(rainfall, 'Area', 'Year', 'average_rain_fall_mm_per_year', 'rainfall_mm')
+
+    # temp.csv has one row per weather station, several per country and year
+    temperature = pd.read_csv(os.path.join(dataset_dir, 'temp.csv'))
+    temperature = tidy(temperature, 'country', 'year', 'avg_temp', 'avg_temp')
+
+    pesticides = pd.read_csv(os.path.join(dataset_dir, 'pesticides.csv'))
+    pesticides = tidy(pesticides, 'Area', 'Year', 'Value', 'pesticides_tonnes')
+
+    yields = pd.read_csv(os.path.join(dataset_dir, 'yield.csv'))
+    item = yields['Item'].str.strip()
+    yields = tidy(yields, 'Area', 'Year', 'Value', 'yield_hg_ha')
+    yields.insert(1, 'item', item)
+
+    return {
+        'rainfall': rainfall.groupby(['area', 'year'], as_index=False).mean(),
+        'temperature': temperature.groupby(['area', 'year'], as_index=False).mean(),
+        'pesticides': pesticides.groupby(['area', 'year'], as_index=False).mean(),
+        'yields': yields.dropna(subset=['yield_hg_ha'])
+    }
+
+
+def join_sources(sources):
+    """Outer-join the climate sources on (area, year) and attach them to every yield row"""
+    climate = sources['rainfall']
+    for name in ('temperature', 'pesticides'):
+        climate = climate.merge(sources[name], on=['area', 'year'], how='outer')
+    climate = climate.sort_values(['area', 'year'], ignore_index=True)
+
+    yields = sources['yields'].merge(climate, on=['area', 'year'], how='left')
+    yields = yields.sort_values(['area', 'item', 'year'], ignore_index=True)
+    return climate, yields
+
+
+def encode(frame, categorical):
+    """Split a frame into arrays, replacing categorical columns by codes"""
+    arrays, categories = {}, {}
+    for column in frame.columns:
+        if column in categorical:
+            codes, vocabulary = pd.factorize(frame[column], sort=True)
+            arrays[column] = codes.astype(np.int16)
+            categories[column] = vocabulary.tolist()
+        elif column == 'year':
+            arrays[column] = frame[column].to_numpy(np.int16)
+        else:
+            arrays[column] = frame[column].to_numpy(np.float64)
+    return arrays, categories
+
+
+def build_store(dataset_dir=DATASET_DIR, store_dir=STORE_DIR):
+    """Parse, normalize and join the CSVs, then write the climate and yields bundles"""
+    hashes = source_hashes(dataset_dir)
+    climate, yields = join_sources(read_sources(dataset_dir))
+    for name, frame, categorical in (('climate', climate, ('area',)), ('yields', yields, ('area', 'item'))):
+        arrays, categories = encode(frame, categorical)
+        save_bundle(os.path.join(store_dir, name), arrays, {
+            'columns': list(frame.columns),
+            'categories': categories,
+            'rows': len(frame),
+            'sources': hashes
+        })
+    return {'climate': len(climate), 'yields': len(yields)}
+
+
+def ensure_store(dataset_dir=DATASET_DIR, store_dir=STORE_DIR):
+    """Rebuild the store if it is missing or stale; returns True when it was rebuilt"""
+    if store_is_stale(dataset_dir, store_dir):
+        build_store(dataset_dir, store_dir)
+        return True
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dataset-dir', default=DATASET_DIR)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the store is up to date')
+    args = parser.parse_args(argv)
+
+    if not args.force and not store_is_stale(args.dataset_dir, args.store_dir):
+        print(f"✓ {args.store_dir} is up to date")
+        return 0
+    rows = build_store(args.dataset_dir, args.store_dir)
+    print(f"✓ Wrote climate ({rows['climate']} rows) and yields ({rows['yields']} rows) to {args.store_dir}/")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Low-overhead request and stage timing histograms.
+
+Code marks the hot-path stages it wants timed with ``with stage('name'):``.
+Each stage feeds a fixed-bucket histogram, and the registry renders all of
+them in the Prometheus text exposition format. When the registry is
+disabled, ``stage`` returns one shared no-op context manager and nothing is
+recorded.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Upper bounds in seconds, from 50µs to 5s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_NULL_STAGE = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """Cumulative bucket counts, sum and count"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class _StageTimer:
+    __slots__ = ('registry', 'name', 'started')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record_stage(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=False, server_timing=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.server_timing = server_timing
+        self.buckets = buckets
+        self.stage_histograms = {}
+        self.request_histograms = {}
+        self._create_lock = threading.Lock()
+        self._local = threading.local()
+
+    def stage(self, name):
+        """Context manager timing one stage of the current request"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self, name)
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            with self._create_lock:
+                histogram = table.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def record_stage(self, name, seconds):
+        self._histogram(self.stage_histograms, name).observe(seconds)
+        timings = getattr(self._local, 'timings', None)
+        if timings is not None:
+            timings.append((name, seconds))
+
+    def begin_request(self):
+        """Start collecting this thread's stage timings for a Server-Timing header"""
+        self._local.timings = [] if self.server_timing else None
+
+    def end_request(self, route, seconds):
+        """Record the total request time and return the stage timings collected"""
+        self._histogram(self.request_histograms, route).observe(seconds)
+        timings = getattr(self._local, 'timings', None)
+        self._local.timings = None
+        return timings or []
+
+    def render_prometheus(self, extra_counters=None):
+        """All histograms (plus optional counters) in Prometheus text format"""
+        lines = []
+        self._render_histograms(
+            lines, 'agripredict_request_duration_seconds', 'Total request handling time by route',
+            'route', self.request_histograms
+        )
+        self._render_histograms(
+            lines, 'agripredict_stage_duration_seconds', 'Time spent in each hot-path stage',
+            'stage', self.stage_histograms
+        )
+        for name, (help_text, samples) in (extra_counters or {}).items():
+            if not samples:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f'{name}{{{label_text}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _render_histograms(self, lines, name, help_text, label, histograms):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for key in sorted(histograms):
+            cumulative, total, count = histograms[key].snapshot()
+            bounds = [repr(b) for b in self.buckets] + ['+Inf']
+            for bound, bucket_count in zip(bounds, cumulative):
+                lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {bucket_count}')
+            lines.append(f'{name}_sum{{{label}="{key}"}} {total}')
+            lines.append(f'{name}_count{{{label}="{key}"}} {count}')
+
+
+METRICS = Metrics()
+stage = METRICS.stage
@@ -0,0 +1,169 @@
+"""
+Hot reload of model artifacts without restarting the server.
+
+Each model group's artifacts are held in an immutable ``ModelVersion``.
+A prediction reads the group's current version once and uses it to the
+end, so swapping in a new version is a single reference assignment:
+requests already running finish on the old artifacts, later ones see the
+new ones, and nothing ever pairs a new forest with an old scaler.
+
+A reload loads the new artifacts next to the live ones, runs a smoke
+prediction through them and only then swaps; the replaced version is kept
+so ``rollback`` can swap it straight back. Reloads are triggered by
+``ModelWatcher`` (polls the artifact files), SIGHUP or the admin endpoint.
+"""
+
+import math
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+
+GROUP_ARTIFACTS = {
+    'yield': ('yield_prediction_model.pkl', 'yield_scaler.pkl'),
+    'disease': ('disease_prediction_model.pkl', 'disease_scaler.pkl', 'disease_encoder.pkl',
+                'disease_forest.npz', 'disease_forest'),
+    'weather': ('weather_model.pkl', 'weather_table'),
+    'fertilizer': ('fertilizer_recommender.pkl',)
+}
+
+GROUP_ATTRIBUTES = {
+    'yield': ('yield_model', 'yield_scaler'),
+    'disease': ('disease_model', 'disease_scaler', 'disease_encoder'),
+    'weather': ('weather_model', 'weather_table'),
+    'fertilizer': ('fertilizer_recommender',)
+}
+
+
+class ModelVersion:
+    """One loaded generation of a model group; artifacts are readable as attributes (None if missing)"""
+
+    def __init__(self, group, artifacts, number, fingerprint=None):
+        self.group = group
+        self.artifacts = dict(dict.fromkeys(GROUP_ATTRIBUTES[group]), **artifacts)
+        self.number = number
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+
+    def __getattr__(self, key):
+        try:
+            return self.__dict__['artifacts'][key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def describe(self):
+        return {
+            'version': self.number,
+            'loaded_at': round(self.loaded_at, 3),
+            'artifacts': sorted(key for key, value in self.artifacts.items() if value is not None)
+        }
+
+
+def fingerprint(models_dir, group):
+    """(name, inode, mtime, size) of each artifact of ``group``; changes whenever one is replaced"""
+    entries = []
+    for name in GROUP_ARTIFACTS[group]:
+        path = os.path.join(models_dir, name)
+        try:
+            st = os.stat(os.path.join(path, 'meta.json') if os.path.isdir(path) else path)
+        except OSError:
+            continue
+        entries.append((name, st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(entries)
+
+
+def _finite(value):
+    return value is not None and math.isfinite(float(value))
+
+
+def smoke_test(version):
+    """Raise ValueError unless one prediction through ``version`` looks sane"""
+    group = version.group
+    if group == 'yield' and version.yield_model is not None:
+        scaled = version.yield_scaler.transform(np.array([[1000.0, 100.0, 20.0]]))
+        if not _finite(version.yield_model.predict(scaled)[0]):
+            raise ValueError("yield model returned a non-finite prediction")
+    elif group == 'disease' and version.disease_model is not None:
+        scaled = version.disease_scaler.transform(np.array([[1000.0, 20.0, 100.0]]))
+        risk = version.disease_encoder.inverse_transform(version.disease_model.predict(scaled))[0]
+        if risk not in version.disease_encoder.classes_:
+            raise ValueError(f"disease model returned unknown class {risk!r}")
+    elif group == 'weather':
+        if version.weather_model is not None and not _finite(version.weather_model.predict(np.array([[2025]]))[0]):
+            raise ValueError("weather model returned a non-finite prediction")
+        if version.weather_table is not None and version.weather_table.lookup('India', 2025) is None:
+            raise ValueError("weather table has no entry for India")
+    elif group == 'fertilizer' and version.fertilizer_recommender is not None:
+        npk, _ = version.fertilizer_recommender('Maize', 800)
+        if not all(_finite(npk[nutrient]) for nutrient in 'NPK'):
+            raise ValueError("fertilizer recommender returned a non-numeric dose")
+
+
+class ModelWatcher:
+    """
+    Poll the artifact files of every model group and reload a group once its
+    files have changed and then stayed unchanged for ``settle_seconds``, so
+    a model written a moment before its scaler is never loaded half-updated.
+    Changes are tracked against the files last seen on disk, not the live
+    version, so a rollback is not undone by the next poll and a broken
+    artifact is tried once rather than on every poll.
+    """
+
+    def __init__(self, models, interval=2.0, settle_seconds=1.0):
+        self.models = models
+        self.interval = interval
+        self.settle_seconds = settle_seconds
+        self._pending = {}
+        self._seen = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def poll(self):
+        """Reload every group whose artifacts changed and have settled; returns the reload reports"""
+        reports = {}
+        now = time.monotonic()
+        for group in self.models.loaded_groups():
+            current = fingerprint(self.models.models_dir, group)
+            if current == self._seen.setdefault(group, self.models.fingerprint(group)):
+                self._pending.pop(group, None)
+                continue
+            pending, since = self._pending.get(group, (None, now))
+            if pending != current:
+                self._pending[group] = (current, now)
+            elif now - since >= self.settle_seconds:
+                del self._pending[group]
+                self._seen[group] = current
+                reports.update(self.models.reload(group))
+        return reports
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                for group, report in self.poll().items():
+                    print(f"Model reload ({group}): {report}")
+            except Exception as e:
+                print(f"Error watching models: {e}")
+
+
+def install_reload_signal(models, signum=signal.SIGHUP):
+    """Reload every model group in a background thread when the process receives ``signum``"""
+    def handler(received, frame):
+        threading.Thread(target=lambda: print(f"Model reload: {models.reload()}"),
+                         name='model-reload', daemon=True).start()
+    try:
+        signal.signal(signum, handler)
+    except ValueError as e:
+        # Only the main thread may install signal handlers
+        print(f"Error installing model reload signal: {e}")
+        return False
+    return True
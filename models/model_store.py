@@ -0,0 +1,57 @@
+"""
+Directory-of-.npy model bundles that can be memory-mapped.
+
+A bundle is a directory holding one ``<name>.npy`` file per array plus a
+``meta.json`` with scalar metadata. Loading with ``mmap_mode='r'`` maps the
+files read-only, so every worker process on the host shares the same
+physical pages through the OS page cache instead of holding its own copy.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+META_FILE = 'meta.json'
+
+
+def save_bundle(directory, arrays, metadata=None):
+    """Write arrays and metadata to ``directory``, replacing it atomically"""
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.bundle-', dir=parent)
+    os.chmod(staging, 0o755)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+        with open(os.path.join(staging, META_FILE), 'w') as f:
+            json.dump({'arrays': sorted(arrays), **(metadata or {})}, f, indent=2)
+
+        if os.path.exists(directory):
+            previous = directory.rstrip('/') + '.old'
+            shutil.rmtree(previous, ignore_errors=True)
+            os.rename(directory, previous)
+            os.rename(staging, directory)
+            shutil.rmtree(previous, ignore_errors=True)
+        else:
+            os.rename(staging, directory)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def load_bundle(directory, mmap_mode='r'):
+    """Return (arrays, metadata); arrays are read-only memory maps by default"""
+    with open(os.path.join(directory, META_FILE)) as f:
+        metadata = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+        for name in metadata['arrays']
+    }
+    return arrays, metadata
+
+
+def bundle_exists(directory):
+    return os.path.exists(os.path.join(directory, META_FILE))
@@ -0,0 +1,91 @@
+"""
+Rendered-page cache for templates that carry no per-request data.
+
+The first request for a page renders it. Later requests get the same
+bytes, with a strong ETag (a hash of the HTML) and a Last-Modified taken
+from the newest watched source file. Because both are derived from the
+sources and not from the time of rendering, every worker process gives
+the same validators for the same page, and a browser revalidating
+against any of them gets 304. Compressed copies are made once per page
+and encoding, at the highest level, instead of on every response.
+
+With ``auto_reload`` (development), each lookup compares the watched
+files' modification times and drops every page when one has changed.
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+
+from .static_assets import compress
+
+
+class RenderedPage:
+    def __init__(self, html, last_modified):
+        self.bodies = {None: html.encode('utf-8')}
+        self.etag = hashlib.sha1(self.bodies[None]).hexdigest()
+        self.last_modified = last_modified
+        self._lock = threading.Lock()
+
+    def body(self, encoding=None):
+        """The page's bytes, compressed with ``encoding`` (None for identity)"""
+        body = self.bodies.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self.bodies.get(encoding)
+                if body is None:
+                    body = self.bodies[encoding] = compress(self.bodies[None], encoding)
+        return body
+
+
+class PageCache:
+    def __init__(self, watch_paths, on_change=None):
+        self.watch_paths = list(watch_paths)
+        self.on_change = on_change
+        self.hits = 0
+        self.renders = 0
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._stamp = self.source_stamp()
+
+    def source_stamp(self):
+        """Newest modification time among the watched files (directories are walked)"""
+        newest = 0.0
+        for path in self.watch_paths:
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    for filename in files:
+                        newest = max(newest, os.stat(os.path.join(root, filename)).st_mtime)
+            elif os.path.exists(path):
+                newest = max(newest, os.stat(path).st_mtime)
+        return newest
+
+    def get(self, key, render, auto_reload=False):
+        """Cached page for ``key``, calling ``render()`` for its HTML on a miss"""
+        if auto_reload:
+            stamp = self.source_stamp()
+            if stamp != self._stamp:
+                self.clear()
+                self._stamp = stamp
+                if self.on_change is not None:
+                    self.on_change()
+        page = self._pages.get(key)
+        if page is not None:
+            self.hits += 1
+            return page
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                # Whole seconds: HTTP dates have no finer resolution
+                last_modified = datetime.fromtimestamp(int(self._stamp), tz=timezone.utc)
+                page = self._pages[key] = RenderedPage(render(), last_modified)
+                self.renders += 1
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages = {}
+
+    def stats(self):
+        return {'pages': len(self._pages), 'hits': self.hits, 'renders': self.renders}
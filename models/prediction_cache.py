@@ -0,0 +1,109 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with optional TTL for single-row predictions.
+
+    Inputs are snapped to a grid of ``resolution`` (a scalar, or one step per
+    argument) before lookup, so nearly identical requests share an entry.
+    The prediction itself is computed from the snapped inputs, which keeps a
+    cached answer identical to what a cold call with the same key returns.
+
+    ``clear`` starts a new generation; a value computed before the clear (by
+    a model that has since been swapped out) is dropped instead of stored.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=None, resolution=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.resolution = resolution
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.generation = 0
+
+    def quantize(self, args):
+        """Snap numeric arguments to the cache grid"""
+        if self.resolution is None:
+            return tuple(args)
+        steps = self.resolution if isinstance(self.resolution, (tuple, list)) else [self.resolution] * len(args)
+        return tuple(
+            round(round(float(value) / step) * step, 10) if step else value
+            for value, step in zip(args, steps)
+        )
+
+    def get(self, key):
+        """Return (found, value) and mark the entry as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value, generation=None):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def cached_prediction(name):
+    """
+    Serve a PredictionModels method from ``self.caches[name]`` when one is enabled.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args):
+            cache = self.caches.get(name)
+            if cache is None:
+                return method(self, *args)
+            key = cache.quantize(args)
+            found, value = cache.get(key)
+            if found:
+                return value
+            generation = cache.generation
+            value = method(self, *key)
+            if value is not None:
+                cache.put(key, value, generation)
+            return value
+        return wrapper
+    return decorator
@@ -1,64 +1,489 @@
 import joblib
 import numpy as np
 import os
+import threading
+import time
+from .batching import MicroBatcher
+from .inference_pool import ProcessInferencePool
+from .metrics import stage
+from .model_reload import ModelVersion, fingerprint, smoke_test
+from .model_store import save_bundle, load_bundle, bundle_exists
+from .prediction_cache import PredictionCache, cached_prediction
+from .weather_table import WeatherTable
+
+class CompiledForest:
+    """
+    Array-based evaluator for a fitted scikit-learn random forest.
+
+    All trees are flattened into shared node arrays (feature index, threshold,
+    left/right child, leaf value) and walked together for the whole batch.
+    Leaf nodes point to themselves, so every sample can take the same number
+    of steps regardless of the depth at which it lands.
+    """
+    
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes=None, children=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        # (n_nodes, 2) lookup so each step is a single gather: column 0 = left, 1 = right
+        self._children = children if children is not None else np.stack([left, right], axis=1)
+    
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a RandomForestClassifier or RandomForestRegressor"""
+        is_classifier = hasattr(model, 'classes_')
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            
+            if is_classifier:
+                # Same normalisation as DecisionTreeClassifier.predict_proba
+                value = tree.value[:, 0, :model.n_classes_].copy()
+                normalizer = value.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                value /= normalizer
+            else:
+                value = tree.value[:, 0, :1].copy()
+            
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            values.append(value)
+            roots.append(offset)
+            offset += tree.node_count
+        
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max(estimator.tree_.max_depth for estimator in model.estimators_),
+            classes=model.classes_ if is_classifier else None
+        )
+    
+    @classmethod
+    def load(cls, path):
+        """Load a forest written by ``save``"""
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(
+                feature=arrays['feature'],
+                threshold=arrays['threshold'],
+                left=arrays['left'],
+                right=arrays['right'],
+                value=arrays['value'],
+                roots=arrays['roots'],
+                max_depth=arrays['max_depth'],
+                classes=arrays['classes'] if 'classes' in arrays else None
+            )
+    
+    def save(self, path):
+        """Write the flattened arrays to an ``.npz`` file"""
+        arrays = {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'roots': self.roots,
+            'max_depth': np.array(self.max_depth)
+        }
+        if self.classes_ is not None:
+            arrays['classes'] = self.classes_
+        np.savez(path, **arrays)
+    
+    @classmethod
+    def load_bundle(cls, directory, mmap_mode='r'):
+        """Load a forest written by ``save_bundle``, memory-mapped read-only by default"""
+        arrays, metadata = load_bundle(directory, mmap_mode=mmap_mode)
+        return cls(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            left=arrays['left'],
+            right=arrays['right'],
+            value=arrays['value'],
+            roots=arrays['roots'],
+            max_depth=metadata['max_depth'],
+            classes=arrays.get('classes'),
+            children=arrays['children']
+        )
+    
+    def save_bundle(self, directory):
+        """Write the flattened arrays as a directory of ``.npy`` files for memory-mapping"""
+        arrays = {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'children': self._children,
+            'value': self.value,
+            'roots': self.roots
+        }
+        if self.classes_ is not None:
+            arrays['classes'] = self.classes_
+        save_bundle(directory, arrays, {'max_depth': self.max_depth, 'n_trees': len(self.roots)})
+    
+    def __len__(self):
+        return len(self.roots)
+    
+    def apply(self, X):
+        """Return the global leaf index reached in every tree, shape (n_trees, n_samples)"""
+        # sklearn evaluates trees on float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])
+        nodes = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_right = ~(X[rows, self.feature[nodes]] <= self.threshold[nodes])
+            nodes = self._children[nodes, go_right.astype(np.intp)]
+        return nodes
+    
+    def _accumulate(self, X, chunk_size=4096):
+        X = np.asarray(X)
+        total = np.empty((X.shape[0], self.value.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            # cumsum adds trees one at a time, in order, exactly like sklearn does
+            total[start:start + chunk_size] = np.cumsum(self.value[leaves], axis=0)[-1]
+        total /= len(self.roots)
+        return total
+    
+    def predict_proba(self, X):
+        return self._accumulate(X)
+    
+    def predict(self, X):
+        total = self._accumulate(X)
+        if self.classes_ is None:
+            return total[:, 0]
+        return self.classes_.take(np.argmax(total, axis=1), axis=0)
+
+
+def artifact_size(path):
+    """Size in bytes of a model file, or of every file in a bundle directory"""
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return os.path.getsize(path)
+
+
+def _artifact_property(group, key):
+    """Read one artifact of a group's live version, None until the group is loaded"""
+    def getter(self):
+        version = self._versions.get(group)
+        return version.artifacts.get(key) if version else None
+    return property(getter)
+
 
 class PredictionModels:
-    def __init__(self):
+    MODEL_GROUPS = ('yield', 'disease', 'weather', 'fertilizer')
+    
+    yield_model = _artifact_property('yield', 'yield_model')
+    yield_scaler = _artifact_property('yield', 'yield_scaler')
+    disease_model = _artifact_property('disease', 'disease_model')
+    disease_scaler = _artifact_property('disease', 'disease_scaler')
+    disease_encoder = _artifact_property('disease', 'disease_encoder')
+    weather_model = _artifact_property('weather', 'weather_model')
+    weather_table = _artifact_property('weather', 'weather_table')
+    fertilizer_recommender = _artifact_property('fertilizer', 'fertilizer_recommender')
+    
+    def __init__(self, disease_backend='sklearn', lazy=False):
         self.models_dir = 'models/'
-        self.yield_model = None
-        self.disease_model = None
-        self.weather_model = None
-        self.fertilizer_recommender = None
-        self.load_models()
+        self.disease_backend = disease_backend
+        self.disease_batcher = None
+        self.inference_pool = None
+        self.caches = {}
+        self.load_report = []
+        self._versions = {}
+        self._previous = {}
+        self._version_counter = 0
+        self._load_locks = {name: threading.Lock() for name in self.MODEL_GROUPS}
+        if not lazy:
+            self.load_models()
     
     def load_models(self):
         """Load all trained models"""
+        for name in self.MODEL_GROUPS:
+            self.ensure_loaded(name)
+    
+    def ensure_loaded(self, name):
+        """Load one model group on first use; concurrent first calls share a single load"""
+        if name in self._versions:
+            return
+        with self._load_locks[name]:
+            if name in self._versions:
+                return
+            try:
+                version = self._load_version(name)
+            except Exception as e:
+                print(f"Error loading {name} model: {e}")
+                version = self._new_version(name, {}, fingerprint(self.models_dir, name))
+            self._swap(name, version)
+    
+    def current(self, name):
+        """The live version of a model group; hold on to it for the whole prediction"""
+        self.ensure_loaded(name)
+        return self._versions[name]
+    
+    def reload(self, name=None):
+        """
+        Load new artifacts for one model group (or all of them) beside the live
+        ones, smoke-test them and swap them in; a group that fails keeps serving
+        its current version. Returns a report per group.
+        """
+        reports = {}
+        for group in ([name] if name else self.MODEL_GROUPS):
+            with self._load_locks[group]:
+                try:
+                    version = self._load_version(group)
+                    smoke_test(version)
+                except Exception as e:
+                    print(f"Error reloading {group} model, keeping the current one: {e}")
+                    reports[group] = {'status': 'failed', 'error': str(e)}
+                    continue
+                self._swap(group, version)
+                if self.inference_pool and group in self.inference_pool.groups:
+                    self.inference_pool.reload(group)
+                reports[group] = {'status': 'reloaded', 'version': version.number}
+        return reports
+    
+    def rollback(self, name):
+        """Swap the version replaced by the last reload of a group back in"""
+        with self._load_locks[name]:
+            previous = self._previous.get(name)
+            if previous is None:
+                raise ValueError(f"No previous {name} model to roll back to")
+            self._swap(name, previous)
+            if self.inference_pool and name in self.inference_pool.groups:
+                self.inference_pool.rollback(name)
+            return {'status': 'rolled_back', 'version': previous.number}
+    
+    def fingerprint(self, name):
+        version = self._versions.get(name)
+        return version.fingerprint if version else None
+    
+    def versions(self):
+        """Live and rollback version of every loaded group"""
+        return {
+            name: {
+                'current': version.describe(),
+                'previous': self._previous[name].describe() if self._previous.get(name) else None
+            }
+            for name, version in sorted(self._versions.items())
+        }
+    
+    def _new_version(self, name, artifacts, files=None):
+        self._version_counter += 1
+        return ModelVersion(name, artifacts, self._version_counter, files)
+    
+    def _load_version(self, name):
+        # Fingerprint before loading, so files replaced mid-load are picked up by the next poll
+        files = fingerprint(self.models_dir, name)
+        return self._new_version(name, getattr(self, f'_load_{name}')(), files)
+    
+    def _swap(self, name, version):
+        previous = self._versions.get(name)
+        if previous is not None:
+            self._previous[name] = previous
+        self._versions[name] = version
+        # Anything cached was computed by the previous artifacts
+        if name in self.caches:
+            self.caches[name].clear()
+    
+    def enable_cache(self, name, max_size=10000, ttl_seconds=None, resolution=None):
+        """Cache single-row predictions for one model group on quantized inputs"""
+        self.caches[name] = PredictionCache(max_size=max_size, ttl_seconds=ttl_seconds, resolution=resolution)
+        return self.caches[name]
+    
+    def cache_stats(self):
+        return {name: cache.stats() for name, cache in self.caches.items()}
+    
+    def loaded_groups(self):
+        return sorted(self._versions)
+    
+    def _load_artifact(self, filename, loader=joblib.load):
+        """Load one artifact from models_dir and record its load time and size"""
+        path = f'{self.models_dir}{filename}'
+        started = time.perf_counter()
+        artifact = loader(path)
+        self.load_report.append({
+            'artifact': filename,
+            'seconds': round(time.perf_counter() - started, 4),
+            'size_bytes': artifact_size(path)
+        })
+        return artifact
+    
+    def _load_yield(self):
+        artifacts = {'yield_model': None, 'yield_scaler': None}
+        if os.path.exists(f'{self.models_dir}yield_prediction_model.pkl'):
+            artifacts['yield_model'] = self._load_artifact('yield_prediction_model.pkl')
+            artifacts['yield_scaler'] = self._load_artifact('yield_scaler.pkl')
+        return artifacts
+    
+    def _load_disease(self):
+        artifacts = {'disease_model': self.load_disease_model(), 'disease_scaler': None, 'disease_encoder': None}
+        if artifacts['disease_model'] is not None:
+            artifacts['disease_scaler'] = self._load_artifact('disease_scaler.pkl')
+            artifacts['disease_encoder'] = self._load_artifact('disease_encoder.pkl')
+        return artifacts
+    
+    def _load_weather(self):
+        artifacts = {'weather_model': None, 'weather_table': None}
+        if os.path.exists(f'{self.models_dir}weather_model.pkl'):
+            artifacts['weather_model'] = self._load_artifact('weather_model.pkl')
+        # Read-only: the table is refitted offline by `python -m models.weather_table` or training
+        if bundle_exists(f'{self.models_dir}weather_table'):
+            artifacts['weather_table'] = self._load_artifact('weather_table', WeatherTable.load)
+        return artifacts
+    
+    def _load_fertilizer(self):
+        artifacts = {'fertilizer_recommender': None}
+        if os.path.exists(f'{self.models_dir}fertilizer_recommender.pkl'):
+            artifacts['fertilizer_recommender'] = self._load_artifact('fertilizer_recommender.pkl')
+        return artifacts
+    
+    def load_disease_model(self):
+        """Load the disease forest for the configured backend (sklearn, compiled or mmap)"""
+        if self.disease_backend == 'mmap' and bundle_exists(f'{self.models_dir}disease_forest'):
+            return self._load_artifact('disease_forest', CompiledForest.load_bundle)
+        if self.disease_backend in ('compiled', 'mmap') and os.path.exists(f'{self.models_dir}disease_forest.npz'):
+            return self._load_artifact('disease_forest.npz', CompiledForest.load)
+        if os.path.exists(f'{self.models_dir}disease_prediction_model.pkl'):
+            model = self._load_artifact('disease_prediction_model.pkl')
+            if self.disease_backend in ('compiled', 'mmap'):
+                return CompiledForest.from_sklearn(model)
+            return model
+        return None
+    
+    def warm_up(self):
+        """Load every model and run one smoke prediction through each; returns seconds taken"""
+        started = time.perf_counter()
+        self.load_models()
+        self.predict_yield(1000, 100, 20)
+        self.predict_disease_risk(1000, 20, 100)
+        self.predict_weather(2025)
+        self.forecast_weather('India', 2025)
         try:
-            # Load yield prediction model
-            if os.path.exists(f'{self.models_dir}yield_prediction_model.pkl'):
-                self.yield_model = joblib.load(f'{self.models_dir}yield_prediction_model.pkl')
-                self.yield_scaler = joblib.load(f'{self.models_dir}yield_scaler.pkl')
-            
-            # Load disease prediction model
-            if os.path.exists(f'{self.models_dir}disease_prediction_model.pkl'):
-                self.disease_model = joblib.load(f'{self.models_dir}disease_prediction_model.pkl')
-                self.disease_scaler = joblib.load(f'{self.models_dir}disease_scaler.pkl')
-                self.disease_encoder = joblib.load(f'{self.models_dir}disease_encoder.pkl')
-            
-            # Load weather model
-            if os.path.exists(f'{self.models_dir}weather_model.pkl'):
-                self.weather_model = joblib.load(f'{self.models_dir}weather_model.pkl')
-            
-            # Load fertilizer recommender
-            if os.path.exists(f'{self.models_dir}fertilizer_recommender.pkl'):
-                self.fertilizer_recommender = joblib.load(f'{self.models_dir}fertilizer_recommender.pkl')
-                
+            self.recommend_fertilizer('Maize', 800)
         except Exception as e:
-            print(f"Error loading models: {e}")
+            print(f"Fertilizer warm-up failed: {e}")
+        return time.perf_counter() - started
+    
+    def startup_report(self):
+        """Per-artifact load times and sizes, as a printable table"""
+        lines = [f"{'artifact':32}{'load (s)':>10}{'size (KB)':>12}"]
+        for entry in self.load_report:
+            lines.append(f"{entry['artifact']:32}{entry['seconds']:>10.4f}{entry['size_bytes'] / 1024:>12.1f}")
+        total_seconds = sum(entry['seconds'] for entry in self.load_report)
+        total_kb = sum(entry['size_bytes'] for entry in self.load_report) / 1024
+        lines.append(f"{'total':32}{total_seconds:>10.4f}{total_kb:>12.1f}")
+        return '\n'.join(lines)
     
+    @cached_prediction('yield')
     def predict_yield(self, rainfall, pesticide, temperature):
         """Predict crop yield"""
-        if self.yield_model and self.yield_scaler:
+        models = self.current('yield')
+        if models.yield_model and models.yield_scaler:
             input_data = np.array([[rainfall, pesticide, temperature]])
-            input_scaled = self.yield_scaler.transform(input_data)
-            prediction = self.yield_model.predict(input_scaled)[0]
+            if self.inference_pool:
+                with stage('inference_pool'):
+                    return round(float(self.inference_pool.predict('yield', input_data)[0]), 2)
+            with stage('scaler_transform'):
+                input_scaled = models.yield_scaler.transform(input_data)
+            with stage('forest_predict'):
+                prediction = models.yield_model.predict(input_scaled)[0]
             return round(prediction, 2)
         return None
     
+    def predict_yield_batch(self, features):
+        """Predict crop yield for an (N, 3) array of rainfall, pesticide, temperature rows"""
+        models = self.current('yield')
+        if models.yield_model and models.yield_scaler:
+            input_data = np.asarray(features, dtype=float)
+            if input_data.ndim != 2 or input_data.shape[1] != 3:
+                raise ValueError("Expected rows of (rainfall, pesticide, temperature)")
+            if self.inference_pool:
+                with stage('inference_pool'):
+                    return np.round(self.inference_pool.predict('yield', input_data), 2)
+            with stage('scaler_transform'):
+                input_scaled = models.yield_scaler.transform(input_data)
+            with stage('forest_predict'):
+                predictions = models.yield_model.predict(input_scaled)
+            return np.round(predictions, 2)
+        return None
+    
+    @cached_prediction('disease')
     def predict_disease_risk(self, rainfall, temperature, pesticide):
         """Predict disease risk"""
-        if self.disease_model and self.disease_scaler and self.disease_encoder:
+        if self.disease_batcher:
+            with stage('microbatch_wait'):
+                return self.disease_batcher.predict([rainfall, temperature, pesticide])
+        models = self.current('disease')
+        if models.disease_model and models.disease_scaler and models.disease_encoder:
             input_data = np.array([[rainfall, temperature, pesticide]])
-            input_scaled = self.disease_scaler.transform(input_data)
-            prediction = self.disease_model.predict(input_scaled)[0]
-            risk_level = self.disease_encoder.inverse_transform([prediction])[0]
+            if self.inference_pool:
+                with stage('inference_pool'):
+                    prediction = int(self.inference_pool.predict('disease', input_data)[0])
+            else:
+                with stage('scaler_transform'):
+                    input_scaled = models.disease_scaler.transform(input_data)
+                with stage('forest_predict'):
+                    prediction = models.disease_model.predict(input_scaled)[0]
+            with stage('inverse_transform'):
+                risk_level = models.disease_encoder.inverse_transform([prediction])[0]
             return risk_level
         return None
     
+    def predict_disease_risk_batch(self, features):
+        """Predict disease risk for an (N, 3) array of rainfall, temperature, pesticide rows"""
+        models = self.current('disease')
+        if models.disease_model and models.disease_scaler and models.disease_encoder:
+            input_data = np.asarray(features, dtype=float)
+            if input_data.ndim != 2 or input_data.shape[1] != 3:
+                raise ValueError("Expected rows of (rainfall, temperature, pesticide)")
+            if self.inference_pool:
+                with stage('inference_pool'):
+                    predictions = self.inference_pool.predict('disease', input_data).astype(np.int64)
+            else:
+                with stage('scaler_transform'):
+                    input_scaled = models.disease_scaler.transform(input_data)
+                with stage('forest_predict'):
+                    predictions = models.disease_model.predict(input_scaled)
+            with stage('inverse_transform'):
+                return models.disease_encoder.inverse_transform(predictions)
+        return None
+    
+    def enable_disease_batching(self, max_wait_ms=2.0, max_batch_size=64):
+        """Route single-row disease predictions through a micro-batching coalescer"""
+        if self.disease_batcher is None:
+            self.disease_batcher = MicroBatcher(
+                self.predict_disease_risk_batch,
+                max_wait_ms=max_wait_ms,
+                max_batch_size=max_batch_size
+            )
+        return self.disease_batcher
+    
+    def enable_inference_pool(self, workers=None, max_rows=4096):
+        """Evaluate the yield and disease forests in worker processes instead of request threads"""
+        if self.inference_pool is None:
+            self.inference_pool = ProcessInferencePool(
+                self.models_dir, self.disease_backend, workers=workers, max_rows=max_rows
+            )
+        return self.inference_pool
+    
     def recommend_fertilizer(self, crop, rainfall):
         """Get fertilizer recommendation"""
-        if self.fertilizer_recommender:
-            npk, matched_crop = self.fertilizer_recommender(crop, rainfall)
+        models = self.current('fertilizer')
+        if models.fertilizer_recommender:
+            with stage('fertilizer_rules'):
+                npk, matched_crop = models.fertilizer_recommender(crop, rainfall)
             return {
                 'matched_crop': matched_crop,
                 'nitrogen_kg_ha': npk['N'],
@@ -68,9 +493,20 @@ class PredictionModels:
             }
         return None
     
+    @cached_prediction('weather')
     def predict_weather(self, year):
         """Predict weather patterns"""
-        if self.weather_model:
-            prediction = self.weather_model.predict(np.array([[year]]))[0]
+        models = self.current('weather')
+        if models.weather_model:
+            with stage('weather_predict'):
+                prediction = models.weather_model.predict(np.array([[year]]))[0]
             return round(prediction, 1)
         return None
+    
+    def forecast_weather(self, location, year):
+        """Rainfall and temperature trend for a country or region, read from the weather table"""
+        models = self.current('weather')
+        if models.weather_table:
+            with stage('weather_lookup'):
+                return models.weather_table.lookup(location, year)
+        return None
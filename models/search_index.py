@@ -0,0 +1,180 @@
+"""
+In-memory full-text index over forum questions and marketplace listings.
+
+Each document is tokenized into lowercase words, and every term keeps a
+posting list of (document number, term frequency). The lists are
+``array`` buffers that grow by appending, so adding a question or listing
+costs the same however large the index is. Document numbers only grow,
+which keeps every posting list sorted.
+
+A query scores with BM25. Each query term's posting arrays are copied into
+numpy in one step and scored in one vectorized expression. The scores of
+all terms are summed per document with a single ``bincount``, and the top
+results come from ``argpartition``, so no Python loop runs per posting.
+
+For autocomplete, the last query word also counts as a prefix. The
+vocabulary is kept sorted, so the terms starting with it are found by
+bisection. The most common of those terms join the query and are returned
+as suggestions.
+
+Each process keeps its own index, which follows the community store's
+change feed. ``catch_up`` reads the questions and listings added since the
+last row id it indexed, a primary-key range query, so posts made through
+any worker process are picked up. The search route calls it before every
+query, and the posting routes call it right after their write.
+"""
+
+import bisect
+import math
+import re
+import threading
+from array import array
+
+import numpy as np
+
+QUESTION_FIELDS = ('question', 'category', 'crop_type')
+LISTING_FIELDS = ('item_name', 'description', 'listing_type')
+KINDS = ('question', 'listing')
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    'a an and are as at be by can do for from has have how i in is it my of on or should the this to what '
+    'when where which with'.split()
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    def __init__(self, store=None, k1=1.2, b=0.75, max_expansions=20):
+        self.store = store
+        self.k1 = k1
+        self.b = b
+        self.max_expansions = max_expansions
+        self._postings = {}
+        self._vocabulary = []
+        self._lengths = array('f')
+        self._kinds = array('b')
+        self._records = []
+        self._total_length = 0
+        self._lock = threading.Lock()
+        # Last store row id indexed per table; one thread catches up at a time
+        self._cursors = {'questions': 0, 'listings': 0}
+        self._catch_up_lock = threading.Lock()
+        # Per-document length norms and kinds as numpy arrays, rebuilt after adds
+        self._columns = (0, None, None)
+
+    def __len__(self):
+        return len(self._records)
+
+    @classmethod
+    def from_store(cls, store, batch=1000):
+        """Index every question and listing in a CommunityStore, and follow its later changes"""
+        index = cls(store)
+        index.catch_up(batch)
+        return index
+
+    def catch_up(self, batch=1000):
+        """Index rows added to the store since the last call; returns how many"""
+        if self.store is None:
+            return 0
+        added = 0
+        with self._catch_up_lock:
+            for table, add in (('questions', self.add_question), ('listings', self.add_listing)):
+                while True:
+                    rows = self.store.changes(table, self._cursors[table], limit=batch)
+                    for row_id, record in rows:
+                        add(record)
+                        self._cursors[table] = row_id
+                    added += len(rows)
+                    if len(rows) < batch:
+                        break
+        return added
+
+    def add_question(self, question):
+        record = dict(question, type='question')
+        if isinstance(record.get('responses'), list):
+            record['responses'] = len(record['responses'])
+        self._add(record, ' '.join(str(question.get(field, '')) for field in QUESTION_FIELDS))
+
+    def add_listing(self, listing):
+        self._add(dict(listing, type='listing'),
+                  ' '.join(str(listing.get(field, '')) for field in LISTING_FIELDS))
+
+    def _add(self, record, text):
+        tokens = tokenize(text)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        with self._lock:
+            doc = len(self._records)
+            self._records.append(record)
+            self._kinds.append(KINDS.index(record['type']))
+            self._lengths.append(len(tokens))
+            self._total_length += len(tokens)
+            for term, tf in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = (array('i'), array('f'))
+                    bisect.insort(self._vocabulary, term)
+                posting[0].append(doc)
+                posting[1].append(tf)
+
+    def completions(self, prefix, limit=None):
+        """Indexed terms starting with ``prefix``, most documents first"""
+        limit = limit or self.max_expansions
+        with self._lock:
+            start = bisect.bisect_left(self._vocabulary, prefix)
+            end = bisect.bisect_left(self._vocabulary, prefix + '\uffff')
+            terms = [(len(self._postings[term][0]), term) for term in self._vocabulary[start:end]]
+        return [term for _, term in sorted(terms, key=lambda item: (-item[0], item[1]))[:limit]]
+
+    def search(self, query, limit=10, kind=None, prefix=True):
+        """
+        BM25-ranked records for ``query``, optionally only one kind
+        ('question' or 'listing'). With ``prefix`` the last word also matches
+        longer terms. Returns (results, suggestions); each result is the
+        stored record plus its ``score``.
+        """
+        tokens = tokenize(query)
+        suggestions = []
+        terms = dict.fromkeys(tokens)
+        if prefix and tokens and str(query)[-1:].isalnum():
+            suggestions = self.completions(tokens[-1])
+            terms.update(dict.fromkeys(suggestions))
+        if not terms or not self._records:
+            return [], suggestions
+
+        with self._lock:
+            n_docs, norm, kinds = self._document_columns()
+            docs, weights = [], []
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                term_docs = np.array(posting[0], dtype=np.int32)
+                tfs = np.array(posting[1], dtype=np.float32)
+                idf = math.log(1 + (n_docs - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+                docs.append(term_docs)
+                weights.append(idf * tfs * (self.k1 + 1) / (tfs + norm[term_docs]))
+            if not docs:
+                return [], suggestions
+            scores = np.bincount(np.concatenate(docs), np.concatenate(weights), minlength=n_docs)
+            if kind is not None:
+                scores[kinds != KINDS.index(kind)] = 0
+            # Everything tied with the limit-th score, so ties always go to the newest documents
+            threshold = np.partition(scores, -limit)[-limit] if n_docs > limit else 0
+            matched = np.flatnonzero(scores >= max(threshold, np.nextafter(0, 1)))
+            matched = matched[np.lexsort((-matched, -scores[matched]))][:limit]
+            results = [dict(self._records[doc], score=round(float(scores[doc]), 4)) for doc in matched]
+        return results, suggestions
+
+    def _document_columns(self):
+        n_docs = len(self._records)
+        if self._columns[0] != n_docs:
+            lengths = np.array(self._lengths, dtype=np.float32)
+            norm = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / n_docs))
+            self._columns = (n_docs, norm, np.array(self._kinds, dtype=np.int8))
+        return self._columns
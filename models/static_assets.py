@@ -0,0 +1,198 @@
+"""
+Fingerprinted, precompressed static assets.
+
+Usage:
+    python -m models.static_assets [--static static/]
+
+The build minifies the CSS and JavaScript under static/. Each result is
+written to static/dist/ with a content hash in its name, for example
+js/main.1a2b3c4d5e.js, next to .gz and .br copies compressed at the
+highest level. static/dist/manifest.json maps each source path to its
+hashed file. Templates link assets through ``asset_url``, which falls
+back to the unbuilt file when there is no manifest entry. A changed file
+gets a new URL, so the hashed files can be cached as immutable for a year.
+
+``negotiate`` picks the variant to serve from Accept-Encoding.
+``compress_response`` gzips or brotli-compresses large dynamic responses
+(JSON, HTML, CSV) on the way out. Brotli is optional; without the module
+only gzip is produced and offered.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = 'static'
+DIST_DIR = 'dist'
+MANIFEST_FILE = 'manifest.json'
+COMPRESSIBLE = frozenset({'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'})
+DYNAMIC_TYPES = frozenset({'application/json', 'text/html', 'text/csv', 'text/plain'})
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """Drop indentation, blank lines and whole-line // comments; line breaks stay for ASI"""
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def encodings():
+    """Content codings this process can produce, preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if level is None else level)
+    return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build(static_dir=STATIC_DIR):
+    """Build static/dist from static/; returns {source: (hashed name, sizes by encoding)}"""
+    dist = os.path.join(static_dir, DIST_DIR)
+    report, manifest, written = {}, {}, set()
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for filename in sorted(files):
+            source = os.path.relpath(os.path.join(root, filename), static_dir).replace(os.sep, '/')
+            stem, ext = os.path.splitext(source)
+            with open(os.path.join(static_dir, source), 'rb') as f:
+                data = f.read()
+            if ext in MINIFIERS:
+                data = MINIFIERS[ext](data.decode('utf-8')).encode('utf-8')
+            target = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+            sizes = {'identity': len(data)}
+            outputs = {target: data}
+            if ext in COMPRESSIBLE:
+                for encoding in encodings():
+                    compressed = compress(data, encoding)
+                    if len(compressed) < len(data):
+                        outputs[target + SUFFIXES[encoding]] = compressed
+                        sizes[encoding] = len(compressed)
+            for name, content in outputs.items():
+                path = os.path.join(dist, name)
+                if not os.path.exists(path):
+                    _write(path, content)
+                written.add(os.path.normpath(path))
+            manifest[source] = target
+            report[source] = (target, sizes)
+    _write(os.path.join(dist, MANIFEST_FILE), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    written.add(os.path.normpath(os.path.join(dist, MANIFEST_FILE)))
+    # Drop outputs of earlier builds
+    for root, _, files in os.walk(dist):
+        for filename in files:
+            path = os.path.normpath(os.path.join(root, filename))
+            if path not in written:
+                os.remove(path)
+    return report
+
+
+class AssetManifest:
+    """Source path -> hashed dist path, and which compressed variants exist for each"""
+
+    def __init__(self, static_dir=STATIC_DIR):
+        self.static_dir = static_dir
+        self.dist = os.path.join(static_dir, DIST_DIR)
+        self.manifest_path = os.path.join(self.dist, MANIFEST_FILE)
+        self.reload()
+
+    def reload(self):
+        """Re-read the manifest after a rebuild"""
+        try:
+            with open(self.manifest_path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = {}
+        self.entries, self._variants = entries, {}
+
+    def path(self, filename):
+        """Path under static/ to link for ``filename``"""
+        target = self.entries.get(filename)
+        return f'{DIST_DIR}/{target}' if target else filename
+
+    def variants(self, filename):
+        """Encodings with a precompressed copy of dist/``filename``; files never change, so cached"""
+        variants = self._variants.get(filename)
+        if variants is None:
+            base = os.path.join(self.dist, filename)
+            variants = tuple(encoding for encoding, suffix in SUFFIXES.items() if os.path.exists(base + suffix))
+            self._variants[filename] = variants
+        return variants
+
+
+def negotiate(accept_encodings, available):
+    """Best of ``available`` (in preference order) accepted by the client, or None for identity"""
+    best, quality = None, 0
+    for encoding in available:
+        q = accept_encodings[encoding]
+        if q > quality:
+            best, quality = encoding, q
+    return best
+
+
+def compress_response(response, accept_encodings, min_size=1024, level=5):
+    """Compress a buffered text response in place if it is large enough and the client accepts it"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in DYNAMIC_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = negotiate(accept_encodings, encodings())
+    if len(data) < min_size or encoding is None:
+        return response
+    response.set_data(compress(data, encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Same entity, different bytes: the identity ETag still validates it
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build minified, hashed and precompressed static assets')
+    parser.add_argument('--static', default=STATIC_DIR)
+    args = parser.parse_args(argv)
+
+    report = build(args.static)
+    print(f"{'asset':24}{'hashed file':34}" + ''.join(f'{name:>10}' for name in ('source', 'minified') + encodings()))
+    for source, (target, sizes) in report.items():
+        original = os.path.getsize(os.path.join(args.static, source))
+        print(f"{source:24}{target:34}{original:>10}" + ''.join(f"{sizes.get(name, '-'):>10}"
+                                                              for name in ('identity',) + encodings()))
+    if brotli is None:
+        print("Brotli not installed; built gzip variants only (pip install Brotli)")
+    print(f"✓ Wrote {len(report)} assets to {os.path.join(args.static, DIST_DIR)}/")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Per-country rainfall and temperature trends, precomputed into a lookup table.
+
+Usage:
+    python -m models.weather_table [--output models/weather_table] [--full]
+
+A straight-line trend is fitted per country to the yearly rainfall
+(rainfall.csv) and mean temperature (temp.csv, from FIT_START_YEAR on) in
+the climate table of the data store. The fitted values for every year from
+FIRST_YEAR to LAST_YEAR are stored as dense country x year arrays, so a
+forecast is an index lookup; years outside that range fall back to the
+stored coefficients, up to the MIN_YEAR-MAX_YEAR forecast horizon.
+
+Each country's row records a hash of the observations it was fitted on.
+When the source CSVs change, only countries whose observations changed are
+refitted, and rows for the others are copied from the previous table.
+"""
+
+import argparse
+import hashlib
+import sys
+
+import numpy as np
+
+from .data_store import DATASET_DIR, STORE_DIR, load_table, normalize_area, source_hashes, store_is_stale
+from .model_store import save_bundle, load_bundle, bundle_exists
+
+WEATHER_TABLE_DIR = 'models/weather_table'
+VARIABLES = ('rainfall_mm', 'avg_temp')
+FIT_START_YEAR = 1960
+FIRST_YEAR = 1960
+LAST_YEAR = 2050
+# Forecast horizon: a straight-line trend means nothing far beyond the data
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+# Regions offered by the weather page, resolved to the country they belong to
+REGION_ALIASES = {
+    'north india': 'India',
+    'south india': 'India',
+    'east india': 'India',
+    'west india': 'India',
+    'central india': 'India',
+    'northeast india': 'India',
+    'coastal areas': 'India',
+    'hill stations': 'India',
+}
+
+
+def check_year(year):
+    """Raise ValueError unless ``year`` lies within the forecast horizon"""
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise ValueError(f'Year {year} is outside the forecast range {MIN_YEAR}-{MAX_YEAR}')
+
+
+def fit_trend(years, values):
+    """(slope, intercept) of a least-squares line, NaN with fewer than two points"""
+    if len(years) < 2:
+        return np.nan, np.nan
+    slope, intercept = np.polyfit(years.astype(float), values, 1)
+    return slope, intercept
+
+
+def country_observations(climate):
+    """Yield (country, {variable: (years, values)}) for each country in the climate table"""
+    area = np.asarray(climate['area'])
+    boundaries = np.concatenate(([0], np.flatnonzero(np.diff(area)) + 1, [len(area)]))
+    years = np.asarray(climate['year'])
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        observations = {}
+        for variable in VARIABLES:
+            values = np.asarray(climate[variable][start:end])
+            keep = ~np.isnan(values)
+            if variable == 'avg_temp':
+                keep &= years[start:end] >= FIT_START_YEAR
+            observations[variable] = (years[start:end][keep], values[keep])
+        yield climate.categories['area'][area[start]], observations
+
+
+def observation_hash(observations):
+    digest = hashlib.sha256()
+    for variable in VARIABLES:
+        years, values = observations[variable]
+        digest.update(variable.encode())
+        digest.update(np.ascontiguousarray(years, dtype=np.int16).tobytes())
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class WeatherTable:
+    def __init__(self, countries, values, coefficients, hashes, first_year=FIRST_YEAR, sources=None):
+        self.countries = list(countries)
+        self.values = values
+        self.coefficients = coefficients
+        self.hashes = list(hashes)
+        self.first_year = first_year
+        self.last_year = first_year + values[VARIABLES[0]].shape[1] - 1
+        self.sources = sources or {}
+        self._index = {country.lower(): row for row, country in enumerate(self.countries)}
+
+    @classmethod
+    def build(cls, climate, previous=None):
+        """Fit every country, reusing rows of ``previous`` whose observations are unchanged"""
+        n_years = LAST_YEAR - FIRST_YEAR + 1
+        reusable = previous is not None and previous.first_year == FIRST_YEAR and previous.last_year == LAST_YEAR
+        grid = np.arange(FIRST_YEAR, LAST_YEAR + 1, dtype=float)
+
+        countries, hashes, refitted = [], [], 0
+        rows = {variable: [] for variable in VARIABLES}
+        coefficient_rows = {variable: [] for variable in VARIABLES}
+        for country, observations in country_observations(climate):
+            if all(len(observations[variable][0]) == 0 for variable in VARIABLES):
+                continue
+            digest = observation_hash(observations)
+            old_row = previous._index.get(country.lower()) if reusable else None
+            for variable in VARIABLES:
+                if old_row is not None and previous.hashes[old_row] == digest:
+                    coefficients = previous.coefficients[variable][old_row]
+                    values = previous.values[variable][old_row]
+                else:
+                    coefficients = np.array(fit_trend(*observations[variable]))
+                    values = (coefficients[0] * grid + coefficients[1]).astype(np.float32)
+                coefficient_rows[variable].append(coefficients)
+                rows[variable].append(values)
+            if old_row is None or previous.hashes[old_row] != digest:
+                refitted += 1
+            countries.append(country)
+            hashes.append(digest)
+
+        values = {v: np.vstack(rows[v]) if rows[v] else np.empty((0, n_years), np.float32) for v in VARIABLES}
+        coefficients = {v: np.vstack(coefficient_rows[v]) if coefficient_rows[v] else np.empty((0, 2)) for v in VARIABLES}
+        return cls(countries, values, coefficients, hashes, FIRST_YEAR, climate.sources), refitted
+
+    @classmethod
+    def load(cls, directory=WEATHER_TABLE_DIR, mmap_mode='r'):
+        arrays, metadata = load_bundle(directory, mmap_mode=mmap_mode)
+        return cls(
+            metadata['countries'],
+            {variable: arrays[variable] for variable in VARIABLES},
+            {variable: arrays[f'{variable}_coef'] for variable in VARIABLES},
+            metadata['hashes'],
+            metadata['first_year'],
+            metadata.get('sources')
+        )
+
+    def save(self, directory=WEATHER_TABLE_DIR):
+        arrays = dict(self.values)
+        arrays.update({f'{variable}_coef': self.coefficients[variable] for variable in VARIABLES})
+        save_bundle(directory, arrays, {
+            'countries': self.countries,
+            'hashes': self.hashes,
+            'first_year': self.first_year,
+            'last_year': self.last_year,
+            'sources': self.sources
+        })
+
+    def resolve(self, location):
+        """Table row for a country name or known region, or None"""
+        if not location:
+            return None
+        name = str(location).strip()
+        name = REGION_ALIASES.get(name.lower(), name)
+        return self._index.get(normalize_area(name).lower())
+
+    def lookup(self, location, year):
+        """Trend values for one location and year, or None for an unknown location"""
+        check_year(year)
+        row = self.resolve(location)
+        if row is None:
+            return None
+        forecast = {'country': self.countries[row], 'year': int(year)}
+        for variable in VARIABLES:
+            if self.first_year <= year <= self.last_year:
+                value = float(self.values[variable][row, year - self.first_year])
+            else:
+                slope, intercept = self.coefficients[variable][row]
+                value = float(slope * year + intercept)
+            forecast[variable] = None if np.isnan(value) else value
+        if forecast['rainfall_mm'] is not None:
+            forecast['rainfall_mm'] = max(forecast['rainfall_mm'], 0.0)
+        return forecast
+
+
+def refresh_weather_table(directory=WEATHER_TABLE_DIR, dataset_dir=DATASET_DIR, store_dir=STORE_DIR, full=False):
+    """
+    Bring the table in line with the source CSVs, refitting only the countries
+    whose data changed. Returns (table, number of countries refitted).
+    """
+    previous = WeatherTable.load(directory) if bundle_exists(directory) and not full else None
+    if previous is not None and previous.sources == source_hashes(dataset_dir):
+        return previous, 0
+    if store_is_stale(dataset_dir, store_dir):
+        # Ingestion needs pandas, so it is only imported when the CSVs changed
+        from .ingest_data import build_store
+        build_store(dataset_dir, store_dir)
+    table, refitted = WeatherTable.build(load_table('climate', store_dir), previous)
+    table.save(directory)
+    return WeatherTable.load(directory), refitted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', default=WEATHER_TABLE_DIR)
+    parser.add_argument('--dataset-dir', default=DATASET_DIR)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--full', action='store_true', help='Refit every country')
+    args = parser.parse_args(argv)
+
+    table, refitted = refresh_weather_table(args.output, args.dataset_dir, args.store_dir, args.full)
+    print(f"✓ {len(table.countries)} countries x {table.first_year}-{table.last_year}, "
+          f"{refitted} refitted, saved to {args.output}/")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
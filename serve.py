@@ -0,0 +1,72 @@
+"""
+Production launcher, sized by the host's core count instead of the debug server.
+
+Usage:
+    python serve.py [--mode asgi|wsgi] [--host 0.0.0.0] [--port 8000]
+                    [--workers N] [--threads N] [--inference-threads N]
+
+asgi (default) runs asgi:application under uvicorn with one worker
+process per core. Each process serves cheap routes from a request thread
+pool and queues model predictions on a small inference pool (see asgi.py).
+wsgi runs app:app under gunicorn with gthread workers, also one process
+per core; there every open /api/forum/stream holds one of the --threads
+(FORUM_STREAM_MAX_THREADS, default all but two), while asgi serves streams
+without threads. WEB_CONCURRENCY overrides the process count in both modes.
+With DISEASE_BACKEND=mmap the worker processes share one copy of the
+disease forest through the page cache.
+"""
+
+import argparse
+import os
+import sys
+
+
+def default_workers():
+    return int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+
+
+def run_asgi(args):
+    try:
+        import uvicorn
+    except ImportError:
+        print("Error: --mode asgi needs uvicorn (pip install uvicorn)")
+        return 1
+    os.environ['INFERENCE_THREADS'] = str(args.inference_threads)
+    uvicorn.run('asgi:application', host=args.host, port=args.port, workers=args.workers,
+                lifespan='on', access_log=False)
+    return 0
+
+
+def run_wsgi(args):
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        print("Error: --mode wsgi needs gunicorn (pip install gunicorn)")
+        return 1
+    sys.argv = ['gunicorn', '--bind', f'{args.host}:{args.port}', '--workers', str(args.workers),
+                '--worker-class', 'gthread', '--threads', str(args.threads), 'app:app']
+    run()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=('asgi', 'wsgi'), default='asgi')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=default_workers(), help='Worker processes (default: one per core)')
+    parser.add_argument('--threads', type=int, default=8, help='Request threads per worker process')
+    parser.add_argument('--inference-threads', type=int, default=2,
+                        help='Threads per worker process running model predictions (asgi mode)')
+    args = parser.parse_args(argv)
+
+    # Both modes size per-process limits (e.g. the forum stream cap) from this
+    os.environ['REQUEST_THREADS'] = str(args.threads)
+    print(f"Serving on {args.host}:{args.port} ({args.mode}, {args.workers} workers x {args.threads} threads)")
+    if args.mode == 'asgi':
+        return run_asgi(args)
+    return run_wsgi(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
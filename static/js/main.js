@@ -336,6 +336,7 @@ async function handleWeatherPrediction(e) {
             <p><strong>Year:</strong> ${prediction.year}</p>
             <p><strong>Location:</strong> ${prediction.location}</p>
             <p><strong>Predicted Rainfall:</strong> ${prediction.predicted_rainfall} mm</p>
+            ${prediction.predicted_temperature !== null && prediction.predicted_temperature !== undefined ? `<p><strong>Average Temperature:</strong> ${prediction.predicted_temperature}°C (${prediction.matched_country} trend)</p>` : ''}
             <div class="alert alert-info mt-3">
                 <i class="fas fa-info-circle me-2"></i>
                 ${prediction.advice}
@@ -482,6 +483,13 @@ async function handleCropRecommendation(e) {
 }
 
 // Utility functions
+// Escape user-supplied text (forum posts) before it goes into innerHTML
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
 function showLoading(elementId) {
     const element = document.getElementById(elementId);
     if (element) {
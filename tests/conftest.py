@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The app opens its community database at import time; keep tests off dataset/community.db
+os.environ.setdefault('COMMUNITY_DB', os.path.join(tempfile.mkdtemp(prefix='agripredict-tests-'), 'community.db'))
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
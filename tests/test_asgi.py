@@ -0,0 +1,82 @@
+import asyncio
+
+from flask import Flask, Response, request, stream_with_context
+
+from asgi import WSGIToASGI
+
+demo = Flask(__name__)
+
+
+@demo.route('/echo', methods=['POST'])
+def echo():
+    chunks = []
+    while True:
+        chunk = request.stream.read(3)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return {'body': b''.join(chunks).decode(), 'reads': len(chunks)}
+
+
+@demo.route('/count')
+def count():
+    def generate():
+        # Reads the request while the body is being sent, on whichever pool thread runs it
+        for i in range(int(request.args['n'])):
+            yield f'{request.path} {i}\n'
+    return Response(stream_with_context(generate()), mimetype='text/plain')
+
+
+def call(application, path, method='GET', chunks=(b'',), query=b'', disconnect=False):
+    """Drive one request through ``application``; returns (status, headers, body)"""
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1 or disconnect}
+                for i, chunk in enumerate(chunks)]
+    if disconnect:
+        messages.append({'type': 'http.disconnect'})
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'http_version': '1.1',
+             'headers': [(b'content-type', b'text/plain')]}
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    assert all(message['type'] == 'http.response.body' for message in sent[1:])
+    assert not sent[-1].get('more_body', False)
+    return start['status'], dict(start['headers']), b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_chunked_body_is_read_as_it_arrives():
+    status, _, body = call(WSGIToASGI(demo), '/echo', 'POST', chunks=(b'hello ', b'chunked ', b'world', b''))
+    assert status == 200
+    assert b'"body":"hello chunked world"' in body
+
+
+def test_disconnect_mid_body_is_a_bad_request():
+    status, _, _ = call(WSGIToASGI(demo), '/echo', 'POST', chunks=(b'partial',), disconnect=True)
+    assert status == 400
+
+
+def test_stream_with_context_keeps_the_request_across_chunks():
+    status, headers, body = call(WSGIToASGI(demo, request_threads=4), '/count', query=b'n=3')
+    assert status == 200
+    assert b'content-length' not in headers
+    assert body == b'/count 0\n/count 1\n/count 2\n'
+
+
+def test_full_pool_answers_503():
+    application = WSGIToASGI(demo, inference_threads=1, inference_queue=0, inference_paths={'/count'})
+    assert application.inference.try_acquire()
+    status, headers, body = call(application, '/count', query=b'n=1')
+    assert status == 503
+    assert headers[b'retry-after'] == b'1'
+    assert b'Server busy' in body
+
+    # Other routes use the request pool and are still served
+    assert call(application, '/echo', 'POST', chunks=(b'ok',))[0] == 200
+    application.inference.release()
+    assert call(application, '/count', query=b'n=1')[0] == 200
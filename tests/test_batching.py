@@ -0,0 +1,92 @@
+import threading
+
+import numpy as np
+import pytest
+
+from models.batching import MicroBatcher
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(batch_fn, **options):
+        options.setdefault('max_wait_ms', 50)
+        batcher = MicroBatcher(batch_fn, **options)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.stop()
+
+
+def submit_together(batcher, rows):
+    """Submit rows from separate threads at once so they land in one batch"""
+    futures = [None] * len(rows)
+    barrier = threading.Barrier(len(rows))
+
+    def submit(i):
+        barrier.wait()
+        futures[i] = batcher.submit(rows[i])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(rows))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return futures
+
+
+def test_coalesces_rows_and_returns_each_result(make_batcher):
+    sizes = []
+
+    def batch_fn(rows):
+        sizes.append(len(rows))
+        return rows.sum(axis=1)
+
+    batcher = make_batcher(batch_fn)
+    futures = submit_together(batcher, [[i, 1.0, 1.0] for i in range(8)])
+    assert [future.result(5) for future in futures] == [i + 2.0 for i in range(8)]
+    assert sum(sizes) == 8 and len(sizes) < 8
+    assert batcher.stats()['requests'] == 8
+
+
+@pytest.mark.parametrize('row', [[1.0, float('nan'), 2.0], [float('inf'), 1.0, 1.0], [[1.0, 2.0]]])
+def test_rejects_non_finite_and_malformed_rows(make_batcher, row):
+    batcher = make_batcher(lambda rows: rows.sum(axis=1))
+    with pytest.raises(ValueError):
+        batcher.submit(row)
+
+
+def test_a_failing_row_fails_only_its_own_caller(make_batcher):
+    calls = []
+
+    def batch_fn(rows):
+        calls.append(len(rows))
+        if (rows[:, 0] < 0).any():
+            raise RuntimeError('bad row')
+        return rows.sum(axis=1)
+
+    batcher = make_batcher(batch_fn)
+    futures = submit_together(batcher, [[1.0, 1.0, 1.0], [-1.0, 1.0, 1.0], [2.0, 1.0, 1.0]])
+    assert futures[0].result(5) == 3.0
+    with pytest.raises(RuntimeError, match='bad row'):
+        futures[1].result(5)
+    assert futures[2].result(5) == 4.0
+
+
+def test_short_result_never_leaves_a_caller_waiting(make_batcher):
+    # Drops the last row of every batch; a batch of one gets nothing back
+    batcher = make_batcher(lambda rows: rows.sum(axis=1)[:-1])
+    futures = submit_together(batcher, [[float(i), 1.0, 1.0] for i in range(4)])
+    for future in futures:
+        with pytest.raises(ValueError, match='results for'):
+            future.result(5)
+
+
+def test_stop_drains_the_queue(make_batcher):
+    batcher = make_batcher(lambda rows: rows[:, 0], max_wait_ms=1)
+    futures = [batcher.submit([float(i), 0.0, 0.0]) for i in range(20)]
+    batcher.stop()
+    assert [future.result(1) for future in futures] == [float(i) for i in range(20)]
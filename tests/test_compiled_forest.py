@@ -0,0 +1,61 @@
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from models.export_forest import load_verification_inputs
+from models.prediction_models import CompiledForest
+
+MODEL_PATH = os.path.join(ROOT, 'models', 'disease_prediction_model.pkl')
+SCALER_PATH = os.path.join(ROOT, 'models', 'disease_scaler.pkl')
+
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason='disease model is not trained')
+
+
+@pytest.fixture(scope='module')
+def model():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        scaler = joblib.load(SCALER_PATH)
+    return load_verification_inputs(scaler, os.path.join(ROOT, 'dataset', 'yield_df.csv'), n_random=5000)
+
+
+def from_sklearn(model, tmp_path):
+    return CompiledForest.from_sklearn(model)
+
+
+def from_npz(model, tmp_path):
+    path = str(tmp_path / 'forest.npz')
+    CompiledForest.from_sklearn(model).save(path)
+    return CompiledForest.load(path)
+
+
+def from_bundle(model, tmp_path):
+    directory = str(tmp_path / 'forest')
+    CompiledForest.from_sklearn(model).save_bundle(directory)
+    return CompiledForest.load_bundle(directory)
+
+
+@pytest.mark.parametrize('load', [from_sklearn, from_npz, from_bundle])
+def test_matches_pickle_exactly(model, inputs, tmp_path, load):
+    compiled = load(model, tmp_path)
+    np.testing.assert_array_equal(compiled.predict_proba(inputs), model.predict_proba(inputs))
+    np.testing.assert_array_equal(compiled.predict(inputs), model.predict(inputs))
+    # apply gives global node ids per tree; sklearn gives per-tree ids per sample
+    np.testing.assert_array_equal(compiled.apply(inputs) - compiled.roots[:, np.newaxis], model.apply(inputs).T)
+
+
+def test_bundle_is_memory_mapped(model, tmp_path):
+    compiled = from_bundle(model, tmp_path)
+    assert isinstance(compiled.threshold, np.memmap)
+    assert not compiled.threshold.flags.writeable
@@ -0,0 +1,42 @@
+import json
+
+PLOT = {'rainfall': 900, 'temperature': 25, 'soil_type': 'loamy'}
+
+
+def post_ndjson(client, body):
+    response = client.post('/api/recommend-crop/batch?top_k=1', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_bad_plots_get_error_records_and_the_stream_completes(client):
+    lines = [
+        json.dumps(PLOT),
+        '{"rainfall": 900, "temperature": ',
+        json.dumps(dict(PLOT, soil_type=['loamy'])),
+        json.dumps(dict(PLOT, rainfall='nan')),
+        '[1, 2, 3]',
+        json.dumps(dict(PLOT, plot_id='last'))
+    ]
+    records = post_ndjson(client, '\n'.join(lines) + '\n')
+    assert len(records) == 7
+    assert 'recommendations' in records[0]
+    assert 'not valid JSON' in records[1]['error']
+    assert 'soil_type must be text' in records[2]['error']
+    assert 'finite' in records[3]['error']
+    assert 'expected an object' in records[4]['error']
+    assert records[5]['plot'] == 'last' and 'recommendations' in records[5]
+    assert records[6] == {'summary': {'success': True, 'total_plots': 6, 'errors': 4}}
+
+
+def test_unreadable_body_ends_with_an_error_and_a_summary(client):
+    body = (json.dumps(PLOT) + '\n').encode() + b'\xff\xfe\n'
+    response = client.post('/api/recommend-crop/batch', data=body, content_type='application/x-ndjson')
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert 'Could not read plots' in records[-2]['error']
+    assert records[-1]['summary']['success'] is False
+
+
+def test_output_is_valid_json_for_every_line(client):
+    records = post_ndjson(client, '\n'.join(json.dumps(dict(PLOT, temperature=t)) for t in ('inf', 20, '-inf')))
+    assert [('error' in record) for record in records[:-1]] == [True, False, True]
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from models.crop_suitability import score_crops
+
+PLOT = dict(rainfall=900.0, temperature=25.0, soil_type='loamy', ph_level=6.5, season='kharif',
+            water_availability='moderate', experience_level='intermediate', market_preference='food_grain')
+
+
+@pytest.mark.parametrize('soil_type', [5, None, {'a': 1}, 'no such soil'])
+def test_non_matching_soil_scores_like_an_unknown_soil(soil_type):
+    unknown = score_crops(**dict(PLOT, soil_type=(soil_type,)))
+    np.testing.assert_array_equal(unknown, score_crops(**dict(PLOT, soil_type=('clay-ish',))))
+    assert (unknown <= score_crops(**dict(PLOT))).all()
+
+
+def test_batch_columns_match_single_plots():
+    soils = ['loamy', 'sandy', ['loamy'], None]
+    batch = score_crops(np.full(4, PLOT['rainfall']), PLOT['temperature'], soils, PLOT['ph_level'], PLOT['season'],
+                        PLOT['water_availability'], PLOT['experience_level'], PLOT['market_preference'])
+    for row, soil in zip(batch, soils):
+        np.testing.assert_array_equal(row, score_crops(**dict(PLOT, soil_type=(soil,)))[0])
@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.mark.parametrize('path, kwargs, status', [
+    ('/api/recommend-crop/batch', {'json': {'rows': []}}, 400),
+    ('/api/recommend-crop/batch', {'json': 5}, 400),
+    ('/api/recommend-crop/batch', {'data': '{not json', 'content_type': 'application/json'}, 400),
+    ('/api/recommend-crop/batch?top_k=many', {'json': []}, 400),
+    ('/api/predict-yield/batch', {'json': {'plots': []}}, 400),
+    ('/api/post-question', {'json': {'farmer_name': 'Asha'}}, 400),
+    ('/api/post-question', {'json': ['not', 'an', 'object']}, 400),
+    ('/api/post-question', {'data': 'farmer_name=Asha'}, 415),
+    ('/api/submit-listing', {'json': {'farmer_name': 'Asha'}}, 400),
+    ('/api/answer-question', {'json': ['Q1']}, 400),
+    ('/api/mark-helpful', {'json': {}}, 400),
+])
+def test_client_errors_are_400_with_json(client, path, kwargs, status):
+    response = client.post(path, **kwargs)
+    assert response.status_code == status
+    body = response.get_json()
+    assert body['success'] is False
+    assert body['error']
+
+
+@pytest.mark.parametrize('path', [
+    '/api/get-answers',
+    '/api/get-forum-posts?limit=lots',
+    '/api/get-listings?cursor=garbage',
+    '/api/history?area=India',
+])
+def test_bad_queries_are_400(client, path):
+    response = client.get(path)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
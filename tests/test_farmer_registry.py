@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from benchmarks.farmer_search import brute_force
+from models.farmer_registry import CROPS, PLACES, FarmerRegistry
+
+
+@pytest.fixture(scope='module')
+def registry():
+    return FarmerRegistry.synthetic(20000, seed=3)
+
+
+def queries(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        _, _, lat, lon = PLACES[rng.integers(len(PLACES))]
+        crop = None if i % 3 == 0 else CROPS[rng.integers(len(CROPS))]
+        yield lat + rng.normal(0, 1.0), lon + rng.normal(0, 1.0), crop, (5, 25, 50, 200)[i % 4]
+
+
+def test_nearest_matches_a_full_scan(registry):
+    for lat, lon, crop, radius_km in queries(300):
+        found = registry.nearest(lat, lon, k=6, radius_km=radius_km, crop=crop)
+        expected = brute_force(registry, lat, lon, 6, radius_km, crop)
+        assert [distance for _, distance in found] == pytest.approx(expected, abs=1e-9)
+        assert all(distance <= radius_km for _, distance in found)
+
+
+def test_results_have_the_requested_crop(registry):
+    bit = CROPS.index('Cotton')
+    for row, _ in registry.nearest(30.9, 75.86, k=20, radius_km=200, crop='Cotton'):
+        assert registry.columns['crops'][row] >> bit & 1
+
+
+def test_query_outside_the_grid(registry):
+    # The registry covers India; nothing lies within 50 km of the Atlantic
+    assert registry.nearest(0.0, -30.0, radius_km=50) == []
+    far = registry.nearest(60.0, 0.0, k=1, radius_km=20000)
+    assert far == [(row, distance) for row, distance in far if distance > 3000]
+    assert len(far) == 1
+
+
+def test_rejects_bad_coordinates(registry):
+    for lat, lon in ((91, 0), (0, 181), (float('nan'), 0)):
+        with pytest.raises(ValueError):
+            registry.nearest(lat, lon)
+
+
+def test_bundle_round_trip(registry, tmp_path):
+    directory = str(tmp_path / 'farmers')
+    registry.save(directory)
+    loaded = FarmerRegistry.load(directory)
+    assert loaded.nearest(28.6, 77.2, k=10, radius_km=50) == registry.nearest(28.6, 77.2, k=10, radius_km=50)
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from models.community_store import CommunityStore
+from models.forum_events import ForumBroadcaster
+
+
+def question(question_id):
+    return {'id': question_id, 'farmer_name': 'Asha', 'location': 'Punjab', 'crop_type': 'Wheat',
+            'category': 'Disease Management', 'question': f'Question {question_id}'}
+
+
+def frames(events):
+    """(event kind, data) of each SSE frame"""
+    parsed = []
+    for _, frame in events:
+        fields = dict(line.split(': ', 1) for line in frame.decode().strip().splitlines())
+        parsed.append((fields['event'], json.loads(fields['data'])))
+    return parsed
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CommunityStore(str(tmp_path / 'community.db'))
+    yield store
+    store.close()
+
+
+def test_answers_and_votes_are_published(store):
+    store.add_question(question('Q1'))
+    broadcaster = ForumBroadcaster(store)
+    cursor = broadcaster.last_id
+    received = []
+    broadcaster.subscribe(lambda event_id, frame: received.append((event_id, frame)))
+
+    store.add_question(question('Q2'))
+    store.add_answer({'id': 'A1', 'question_id': 'Q1', 'farmer_name': 'Ravi', 'answer': 'Spray propiconazole'})
+    assert store.mark_helpful('Q1') == 1
+    broadcaster.poll()
+
+    events = frames(received)
+    assert [kind for kind, _ in events] == ['question', 'update', 'answer', 'update']
+    assert events[0][1]['id'] == 'Q2'
+    assert events[1][1]['id'] == 'Q1'
+    assert events[2][1] == dict(events[2][1], id='A1', question_id='Q1', answer='Spray propiconazole')
+    # Updates carry the post as it is now
+    assert events[3][1]['responses'] == 1
+    assert events[3][1]['status'] == 'answered'
+    assert events[3][1]['helpful_count'] == 1
+
+    # A reconnecting client gets the same frames back, from the backlog or the database
+    assert broadcaster.since(cursor) == received
+    assert ForumBroadcaster(store).since(cursor) == received
+
+
+def test_unknown_question_is_rejected(store):
+    with pytest.raises(LookupError):
+        store.add_answer({'id': 'A1', 'question_id': 'nope', 'farmer_name': 'Ravi', 'answer': 'Hi'})
+    with pytest.raises(LookupError):
+        store.mark_helpful('nope')
+    assert store.events(0) == []
+
+
+def test_answer_routes(client):
+    posted = client.post('/api/post-question', json=question('ignored')).get_json()
+    question_id = posted['question_id']
+
+    answered = client.post('/api/answer-question', json={'question_id': question_id, 'farmer_name': 'Ravi',
+                                                          'answer': 'Rotate crops'})
+    assert answered.status_code == 200
+    assert client.post('/api/mark-helpful', json={'question_id': question_id}).get_json()['helpful_count'] == 1
+
+    answers = client.get(f'/api/get-answers?question_id={question_id}').get_json()['answers']
+    assert [answer['answer'] for answer in answers] == ['Rotate crops']
+
+    assert client.post('/api/answer-question', json={'question_id': question_id}).status_code == 400
+    assert client.post('/api/answer-question', json={'question_id': 'nope', 'farmer_name': 'Ravi',
+                                                     'answer': 'Hi'}).status_code == 404
+    assert client.post('/api/mark-helpful', json={'question_id': 'nope'}).status_code == 404
+
+
+def test_stream_cap_leaves_threads_for_other_requests(app):
+    assert app.config['FORUM_STREAM_MAX_THREADS'] == max(1, app.config['REQUEST_THREADS'] - 2)
@@ -0,0 +1,57 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from conftest import ROOT
+
+MARKUP = '<img src=x onerror="alert(1)">Blight?'
+
+
+def js_function(path, name):
+    with open(os.path.join(ROOT, path)) as f:
+        source = f.read()
+    match = re.search(rf'^function {name}\(.*?^\}}$', source, re.S | re.M)
+    assert match, f'{name} not found in {path}'
+    return match.group(0)
+
+
+def post_question(client, **fields):
+    question = {'farmer_name': MARKUP, 'location': 'Pune', 'category': 'Disease Management',
+                'crop_type': 'Wheat', 'question': MARKUP, **fields}
+    response = client.post('/api/post-question', json=question)
+    assert response.get_json()['success']
+    return response.get_json()['question_id']
+
+
+def test_markup_is_stored_verbatim(client):
+    question_id = post_question(client)
+    posts = client.get('/api/get-forum-posts').get_json()['posts']
+    post = next(post for post in posts if post['id'] == question_id)
+    assert post['question'] == MARKUP
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_rendered_posts_are_inert(client):
+    question_id = post_question(client)
+    posts = client.get('/api/get-forum-posts').get_json()['posts']
+    post = next(post for post in posts if post['id'] == question_id)
+    # The same renderers build the page on load and for each streamed event
+    script = '\n'.join([
+        'const element = {};',
+        'const document = {getElementById: () => element};',
+        js_function('static/js/main.js', 'escapeHtml'),
+        js_function('templates/farmer_forum.html', 'renderForumPost'),
+        js_function('templates/farmer_connect.html', 'displayRecentPosts'),
+        'const post = JSON.parse(process.argv[1]);',
+        'displayRecentPosts([post]);',
+        'console.log(JSON.stringify([renderForumPost(post), element.innerHTML]));'
+    ])
+    result = subprocess.run(['node', '-e', script, json.dumps(post)], capture_output=True, text=True, check=True)
+    for html in json.loads(result.stdout):
+        assert '<img' not in html
+        assert 'onerror="' not in html
+        assert '&lt;img src=x onerror=&quot;alert(1)&quot;&gt;' in html
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from models.data_store import DataTable
+from models.history_index import HistoryIndex, METRICS, pack_key
+
+
+@pytest.fixture(scope='module')
+def table():
+    rng = np.random.default_rng(0)
+    areas, items, years = np.meshgrid(np.arange(4), np.arange(3), np.arange(1990, 2000), indexing='ij')
+    n = areas.size
+    # Shuffled, so the index has to sort the rows itself
+    order = rng.permutation(n)
+    arrays = {
+        'area': areas.ravel()[order].astype(np.int16),
+        'item': items.ravel()[order].astype(np.int16),
+        'year': years.ravel()[order].astype(np.int16)
+    }
+    for metric in METRICS:
+        values = rng.uniform(0, 1000, n)
+        values[rng.random(n) < 0.1] = np.nan
+        arrays[metric] = values
+    metadata = {
+        'columns': ['area', 'item', 'year', *METRICS],
+        'categories': {'area': ['Brazil', 'India', 'Kenya', 'Peru'], 'item': ['Maize', 'Rice', 'Wheat']}
+    }
+    return DataTable(arrays, metadata)
+
+
+@pytest.fixture(scope='module')
+def index(table):
+    return HistoryIndex(table)
+
+
+@pytest.fixture(scope='module')
+def frame(table):
+    return table.to_frame()
+
+
+def expected_records(frame, mask):
+    rows = frame[mask].sort_values('year')
+    return [
+        {'area': row.area, 'item': row.item, 'year': int(row.year),
+         **{metric: None if np.isnan(getattr(row, metric)) else float(getattr(row, metric)) for metric in METRICS}}
+        for row in rows.itertuples()
+    ]
+
+
+def test_lookup_matches_a_scan(index, frame):
+    for area in ('Brazil', 'Peru'):
+        for year in (1990, 1995, 1999):
+            mask = (frame.area == area) & (frame.item == 'Rice') & (frame.year == year)
+            assert index.lookup(area, 'Rice', year) == expected_records(frame, mask)[0]
+
+
+def test_lookup_misses(index):
+    assert index.lookup('Chile', 'Rice', 1995) is None
+    assert index.lookup('India', 'Barley', 1995) is None
+    assert index.lookup('India', 'Rice', 1989) is None
+    assert index.lookup('India', 'Rice', 2000) is None
+
+
+def test_year_range_matches_a_scan(index, frame):
+    mask = (frame.area == 'Kenya') & (frame.item == 'Wheat') & frame.year.between(1992, 1996)
+    assert index.year_range('Kenya', 'Wheat', 1992, 1996) == expected_records(frame, mask)
+    assert len(index.year_range('Kenya', 'Wheat')) == 10
+    assert index.year_range('Kenya', 'Wheat', 1996, 1992) == []
+
+
+def test_year_range_never_spills_into_the_next_item(index):
+    # Years past the table's end must not reach the (Kenya, Wheat + 1) keys
+    records = index.year_range('Kenya', 'Rice', 1998, 60000)
+    assert [(record['item'], record['year']) for record in records] == [('Rice', 1998), ('Rice', 1999)]
+    with pytest.raises(ValueError):
+        pack_key(0, 0, 1 << 16)
+
+
+def test_top_k_matches_a_scan(index, frame):
+    for metric in ('yield_hg_ha', 'avg_temp'):
+        rows = frame[(frame.item == 'Maize') & (frame.year == 1993)].dropna(subset=[metric])
+        expected = sorted(rows[metric], reverse=True)[:3]
+        assert [record[metric] for record in index.top_k('Maize', 1993, 3, metric)] == expected
+    assert index.top_k('Maize', 2010, 3) == []
+    with pytest.raises(ValueError):
+        index.top_k('Maize', 1993, 3, 'profit')
+
+
+def test_check_year(index):
+    index.check_year(1990)
+    index.check_year(None)
+    for year in (1989, 2000):
+        with pytest.raises(ValueError):
+            index.check_year(year)
+
+
+def test_api_rejects_years_outside_the_table(client):
+    import app
+    if app.history_index is None:
+        pytest.skip('historical data store is not built')
+    first, last = app.history_index.years
+    response = client.get(f'/api/history?area=India&item=Wheat&start_year={first - 100}')
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+    response = client.get(f'/api/history?area=India&item=Wheat&start_year={first}&end_year={first + 2}')
+    assert [record['year'] for record in response.get_json()['records']] == [first, first + 1, first + 2]
@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.fixture
+def admin_config(app):
+    saved = {key: app.config[key] for key in ('MODEL_ADMIN_TOKEN', 'MODEL_ADMIN_ALLOW_LOCAL')}
+    yield app.config
+    app.config.update(saved)
+
+
+def test_local_requests_denied_without_token(client, admin_config):
+    admin_config.update(MODEL_ADMIN_TOKEN='', MODEL_ADMIN_ALLOW_LOCAL=False)
+    response = client.post('/api/models/rollback?group=weather', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    assert response.status_code == 403
+
+
+def test_local_requests_allowed_when_opted_in(client, admin_config):
+    admin_config.update(MODEL_ADMIN_TOKEN='', MODEL_ADMIN_ALLOW_LOCAL=True)
+    local = client.post('/api/models/rollback?group=nope', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    remote = client.post('/api/models/rollback?group=nope', environ_base={'REMOTE_ADDR': '203.0.113.5'})
+    assert local.status_code != 403
+    assert remote.status_code == 403
+
+
+def test_token_required_when_set(client, admin_config):
+    admin_config.update(MODEL_ADMIN_TOKEN='secret', MODEL_ADMIN_ALLOW_LOCAL=True)
+    local = client.post('/api/models/rollback?group=nope', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    assert local.status_code == 403
+    authorized = client.post('/api/models/rollback?group=nope', headers={'X-Admin-Token': 'secret'})
+    assert authorized.status_code != 403
@@ -0,0 +1,110 @@
+import threading
+
+from models.prediction_cache import PredictionCache, cached_prediction
+from models.prediction_models import PredictionModels
+
+
+class Models:
+    """Stand-in for PredictionModels: counts calls and records the inputs it was given"""
+
+    def __init__(self, **cache_options):
+        self.caches = {'disease': PredictionCache(**cache_options)}
+        self.calls = []
+
+    @cached_prediction('disease')
+    def predict(self, rainfall, temperature):
+        self.calls.append((rainfall, temperature))
+        return rainfall + temperature
+
+
+def test_quantize_snaps_to_grid_per_argument():
+    cache = PredictionCache(resolution=(10, 0.5))
+    assert cache.quantize((1234.0, 21.3)) == (1230.0, 21.5)
+    assert cache.quantize((1236.0, 21.2)) == (1240.0, 21.0)
+    # Floating point error never splits one grid point into two keys
+    assert cache.quantize((0.1 + 0.2, 0.7)) == PredictionCache(resolution=(10, 0.5)).quantize((0.3, 0.7))
+
+
+def test_quantize_without_resolution_is_identity():
+    assert PredictionCache().quantize((1.23, 'loamy')) == (1.23, 'loamy')
+
+
+def test_nearby_inputs_share_an_entry_and_see_the_snapped_value():
+    models = Models(resolution=10)
+    first = models.predict(1234.0, 21.0)
+    second = models.predict(1232.0, 19.0)
+    assert first == second == 1250.0
+    # The model ran once, on the snapped inputs, so a cold call returns the same answer
+    assert models.calls == [(1230.0, 20.0)]
+    assert models.caches['disease'].stats()['hits'] == 1
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = PredictionCache(max_size=2)
+    cache.put(('a',), 1)
+    cache.put(('b',), 2)
+    assert cache.get(('a',)) == (True, 1)
+    cache.put(('c',), 3)
+    assert cache.get(('b',)) == (False, None)
+    assert cache.get(('a',)) == (True, 1)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('models.prediction_cache.time.monotonic', lambda: now[0])
+    cache = PredictionCache(ttl_seconds=5)
+    cache.put(('a',), 1)
+    now[0] += 4
+    assert cache.get(('a',)) == (True, 1)
+    now[0] += 2
+    assert cache.get(('a',)) == (False, None)
+    assert cache.stats()['expirations'] == 1
+
+
+def test_clear_invalidates_and_drops_values_from_the_old_generation():
+    cache = PredictionCache()
+    cache.put(('a',), 1)
+    generation = cache.generation
+    cache.clear()
+    assert cache.get(('a',)) == (False, None)
+    # A value computed by the swapped-out model finishes after the clear
+    cache.put(('b',), 2, generation)
+    assert cache.get(('b',)) == (False, None)
+    cache.put(('b',), 3, cache.generation)
+    assert cache.get(('b',)) == (True, 3)
+
+
+def test_clear_during_a_cold_call_does_not_store_its_result():
+    models = Models()
+    started, release = threading.Event(), threading.Event()
+    original = Models.predict.__wrapped__
+
+    def slow(self, rainfall, temperature):
+        started.set()
+        release.wait(5)
+        return original(self, rainfall, temperature)
+
+    cached = cached_prediction('disease')(slow)
+    thread = threading.Thread(target=cached, args=(models, 1.0, 2.0))
+    thread.start()
+    started.wait(5)
+    models.caches['disease'].clear()
+    release.set()
+    thread.join(5)
+    assert models.caches['disease'].get((1.0, 2.0)) == (False, None)
+
+
+def test_none_results_are_not_cached():
+    models = Models()
+    models.predict_missing = cached_prediction('disease')(lambda self, *args: None).__get__(models)
+    assert models.predict_missing(1.0, 2.0) is None
+    assert models.caches['disease'].stats()['size'] == 0
+
+
+def test_swapping_a_model_version_clears_its_cache():
+    models = PredictionModels(lazy=True)
+    cache = models.enable_cache('disease')
+    cache.put((1.0, 2.0, 3.0), 'High')
+    models._swap('disease', object())
+    assert cache.get((1.0, 2.0, 3.0)) == (False, None)
@@ -0,0 +1,107 @@
+import math
+
+import pytest
+
+from models.community_store import CommunityStore
+from models.search_index import SearchIndex, tokenize
+
+QUESTIONS = [
+    {'id': 'Q1', 'question': 'Yellow rust on wheat leaves', 'category': 'Disease Management', 'crop_type': 'Wheat'},
+    {'id': 'Q2', 'question': 'Best time for wheat sowing in Punjab', 'category': 'Seeds and Varieties',
+     'crop_type': 'Wheat'},
+    {'id': 'Q3', 'question': 'Drip irrigation for tomato', 'category': 'Water Management', 'crop_type': 'Tomato'},
+    {'id': 'Q4', 'question': 'Whitefly on cotton, which pesticide?', 'category': 'Pest Control',
+     'crop_type': 'Cotton'}
+]
+LISTINGS = [
+    {'id': 'L1', 'item_name': 'Wheat seeds', 'description': 'Certified rust resistant variety', 'listing_type': 'sell'},
+    {'id': 'L2', 'item_name': 'Tractor', 'description': 'Rotavator included', 'listing_type': 'rent'}
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    for question in QUESTIONS:
+        index.add_question(question)
+    for listing in LISTINGS:
+        index.add_listing(listing)
+    return index
+
+
+def bm25(index, query_terms, document_tokens, corpus_tokens):
+    average = sum(len(tokens) for tokens in corpus_tokens) / len(corpus_tokens)
+    score = 0.0
+    for term in query_terms:
+        df = sum(term in tokens for tokens in corpus_tokens)
+        if not df:
+            continue
+        tf = document_tokens.count(term)
+        idf = math.log(1 + (len(corpus_tokens) - df + 0.5) / (df + 0.5))
+        score += idf * tf * (index.k1 + 1) / (tf + index.k1 * (1 - index.b + index.b * len(document_tokens) / average))
+    return score
+
+
+def document_tokens():
+    texts = [f"{q['question']} {q['category']} {q['crop_type']}" for q in QUESTIONS]
+    texts += [f"{l['item_name']} {l['description']} {l['listing_type']}" for l in LISTINGS]
+    return [tokenize(text) for text in texts]
+
+
+def test_scores_match_bm25(index):
+    corpus = document_tokens()
+    results, _ = index.search('wheat rust', limit=10, prefix=False)
+    ids = [q['id'] for q in QUESTIONS] + [l['id'] for l in LISTINGS]
+    expected = sorted(((bm25(index, ['wheat', 'rust'], tokens, corpus), ids[i]) for i, tokens in enumerate(corpus)),
+                      key=lambda item: -item[0])
+    expected = [(doc_id, round(score, 4)) for score, doc_id in expected if score > 0]
+    assert [(result['id'], result['score']) for result in results] == pytest.approx(expected, abs=1e-3)
+    assert results[0]['id'] == 'Q1'
+
+
+def test_kind_filter_and_limit(index):
+    results, _ = index.search('wheat', kind='listing', prefix=False)
+    assert [result['id'] for result in results] == ['L1']
+    assert all(result['type'] == 'listing' for result in results)
+    assert len(index.search('wheat', limit=1, prefix=False)[0]) == 1
+
+
+def test_prefix_expands_the_last_word(index):
+    results, suggestions = index.search('whit')
+    assert suggestions == ['whitefly']
+    assert [result['id'] for result in results] == ['Q4']
+    assert index.search('whit', prefix=False)[0] == []
+
+
+def test_no_match_and_stopwords(index):
+    assert index.search('banana', prefix=False) == ([], [])
+    assert index.search('the and of') == ([], [])
+
+
+def test_ties_go_to_the_newest_document():
+    index = SearchIndex()
+    for i in range(5):
+        index.add_question({'id': f'Q{i}', 'question': 'mandi prices', 'category': '', 'crop_type': ''})
+    assert [result['id'] for result in index.search('mandi', limit=3, prefix=False)[0]] == ['Q4', 'Q3', 'Q2']
+
+
+def test_catch_up_follows_writes_from_other_store_handles(tmp_path):
+    path = str(tmp_path / 'community.db')
+    store = CommunityStore(path)
+    store.add_question(dict(QUESTIONS[0], farmer_name='Asha', location='Pune', timestamp='2024-01-01T00:00:00'))
+    index = SearchIndex.from_store(store)
+    assert len(index) == 1
+
+    # Another worker process writes through its own connection
+    other = CommunityStore(path)
+    for question in QUESTIONS[1:]:
+        other.add_question(dict(question, farmer_name='Ravi', location='Nagpur', timestamp='2024-01-02T00:00:00'))
+    other.add_listing(dict(LISTINGS[0], farmer_name='Ravi', contact='000', location='Nagpur', price=1, quantity='1'))
+    assert [result['id'] for result in index.search('whitefly', prefix=False)[0]] == []
+
+    assert index.catch_up(batch=2) == 4
+    assert [result['id'] for result in index.search('whitefly', prefix=False)[0]] == ['Q4']
+    assert [result['id'] for result in index.search('certified', prefix=False)[0]] == ['L1']
+    # Nothing is indexed twice
+    assert index.catch_up() == 0
+    assert len(index) == 5
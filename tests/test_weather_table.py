@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from models.prediction_models import PredictionModels
+from models.weather_table import FIRST_YEAR, MAX_YEAR, MIN_YEAR, VARIABLES, WeatherTable
+
+
+@pytest.fixture
+def table():
+    grid = np.arange(FIRST_YEAR, FIRST_YEAR + 3, dtype=float)
+    coefficients = {'rainfall_mm': np.array([[2.0, -3000.0]]), 'avg_temp': np.array([[0.01, 5.0]])}
+    values = {v: (coefficients[v][0, 0] * grid + coefficients[v][0, 1])[np.newaxis, :].astype(np.float32)
+              for v in VARIABLES}
+    return WeatherTable(['India'], values, coefficients, ['hash'])
+
+
+def test_lookup_reads_table_then_trend(table):
+    assert table.lookup('North India', FIRST_YEAR + 1)['rainfall_mm'] == pytest.approx(2 * (FIRST_YEAR + 1) - 3000)
+    assert table.lookup('India', 2080)['rainfall_mm'] == pytest.approx(2 * 2080 - 3000)
+    assert table.lookup('Atlantis', 2000) is None
+
+
+@pytest.mark.parametrize('year', [MIN_YEAR - 1, MAX_YEAR + 1, 99999999])
+def test_lookup_rejects_years_outside_horizon(table, year):
+    with pytest.raises(ValueError, match='outside the forecast range'):
+        table.lookup('India', year)
+
+
+def test_api_rejects_years_outside_horizon(client):
+    response = client.get('/api/predict-weather?year=99999999&location=India')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+    assert client.get(f'/api/predict-weather?year={MAX_YEAR}&location=India').status_code == 200
+
+
+def test_serving_loads_table_read_only(tmp_path):
+    # A table whose recorded sources no longer match the CSVs would be refitted by a refresh
+    shutil.copytree(os.path.join(ROOT, 'models', 'weather_table'), tmp_path / 'weather_table')
+    meta_path = tmp_path / 'weather_table' / 'meta.json'
+    meta = json.loads(meta_path.read_text())
+    meta['sources'] = {'rainfall.csv': 'stale'}
+    meta_path.write_text(json.dumps(meta))
+    before = {path.name: path.read_bytes() for path in (tmp_path / 'weather_table').iterdir()}
+
+    models = PredictionModels(lazy=True)
+    models.models_dir = f'{tmp_path}/'
+    artifacts = models._load_weather()
+
+    assert artifacts['weather_table'].lookup('India', 2025) is not None
+    assert {path.name: path.read_bytes() for path in (tmp_path / 'weather_table').iterdir()} == before
@@ -0,0 +1,53 @@
+import io
+import json
+
+import pytest
+
+URL = '/api/predict-yield/batch'
+ROW = {'rainfall': 900, 'pesticide': 100, 'temperature': 25}
+
+
+def test_json_and_csv_rows(client):
+    response = client.post(URL, json={'rows': [ROW, [900, 100, 25]]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == 2 and body['predictions'][0] == body['predictions'][1]
+    csv_text = 'rainfall,pesticide,temperature\n900,100,25\n'
+    assert client.post(URL, data=csv_text, content_type='text/csv').get_json()['count'] == 1
+    upload = {'file': (io.BytesIO(csv_text.encode()), 'rows.csv')}
+    assert client.post(URL, data=upload).get_json()['count'] == 1
+
+
+@pytest.mark.parametrize('rows, message', [
+    ([ROW, [900, float('nan'), 25]], 'Row 1: values must be finite'),
+    ([ROW, ROW, [900, 100]], 'Row 2: expected 3 values'),
+    ([dict(ROW, rainfall='lots')], 'Row 0: values must be numbers'),
+    ([{'rainfall': 900, 'pesticide': 100}], 'Row 0: missing temperature'),
+    ([5], 'Row 0: expected an object or a list'),
+    ([], 'No rows supplied')
+])
+def test_bad_rows_are_rejected_with_their_index(client, rows, message):
+    response = client.post(URL, data=json.dumps({'rows': rows}), content_type='application/json')
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
+
+
+def test_infinite_csv_value(client):
+    response = client.post(URL, data='rainfall,pesticide,temperature\n900,100,25\ninf,100,25\n',
+                           content_type='text/csv')
+    assert response.status_code == 400
+    assert 'Row 1' in response.get_json()['error']
+
+
+def test_object_without_rows(client):
+    response = client.post(URL, json={'data': [ROW]})
+    assert response.status_code == 400
+    assert '"rows"' in response.get_json()['error']
+
+
+def test_row_and_byte_caps(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'YIELD_BATCH_MAX_ROWS', 3)
+    monkeypatch.setitem(app.config, 'YIELD_BATCH_MAX_BYTES', 10000)
+    assert client.post(URL, json={'rows': [ROW] * 4}).status_code == 413
+    assert client.post(URL, json={'rows': [ROW] * 300}).status_code == 413
+    assert client.post(URL, json={'rows': [ROW] * 3}).status_code == 200
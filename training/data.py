@@ -0,0 +1,45 @@
+"""Loading and merging the datasets the models are trained on."""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+YIELD_FEATURES = ['average_rain_fall_mm_per_year', 'pesticide_usage', 'avg_temp']
+DISEASE_FEATURES = ['average_rain_fall_mm_per_year', 'avg_temp', 'pesticide_usage']
+YIELD_TARGET = 'hg/ha_yield'
+
+
+def load_training_sources(dataset_dir='dataset'):
+    """yield_df.csv and pesticides.csv, with numeric columns coerced"""
+    yield_df = pd.read_csv(os.path.join(dataset_dir, 'yield_df.csv'))
+    pesticides = pd.read_csv(os.path.join(dataset_dir, 'pesticides.csv'))
+    pesticides['Value'] = pd.to_numeric(pesticides['Value'], errors='coerce')
+    return yield_df, pesticides
+
+
+def prepare_modeling_data(yield_df, pesticides):
+    """
+    Merge yield_df with pesticide use on (Area, Year), falling back to the
+    pesticides_tonnes column already in yield_df, and drop incomplete rows
+    """
+    pest_data = pesticides[['Area', 'Year', 'Value']].rename(columns={'Value': 'pesticide_usage'})
+    modeling_data = pd.merge(yield_df, pest_data, on=['Area', 'Year'], how='left')
+    modeling_data['pesticide_usage'] = modeling_data['pesticide_usage'].fillna(modeling_data['pesticides_tonnes'])
+    return modeling_data.dropna()
+
+
+def disease_risk_labels(data):
+    """
+    Synthetic risk labels: wet seasons, moderate temperatures and low
+    pesticide use raise the risk score
+    """
+    rainfall = data['average_rain_fall_mm_per_year'].to_numpy()
+    temp = data['avg_temp'].to_numpy()
+    pesticide = data['pesticide_usage'].to_numpy()
+
+    risk_score = np.select([rainfall > 1000, rainfall > 500], [2, 1], 0)
+    risk_score += np.select([(temp >= 15) & (temp <= 25), (temp >= 10) & (temp <= 30)], [2, 1], 0)
+    risk_score += (pesticide < 100).astype(int)
+
+    return pd.Series(np.select([risk_score >= 4, risk_score >= 2], ['High', 'Medium'], 'Low'), index=data.index)
@@ -0,0 +1,67 @@
+"""
+Dependency graph between dataset files, derived tables and model groups.
+
+Every node gets a key: a hash of the content hashes of what it depends on
+plus the parameters that shape it. The manifest records the key each
+artifact was built with, so a node is rebuilt only when its key changes or
+one of its artifacts is missing or was modified.
+
+    pesticides.csv, rainfall.csv, temp.csv, yield.csv -> store
+    yield_df.csv, pesticides.csv -> modeling_data -> yield, disease
+    rainfall.csv, temp.csv -> weather
+    fertilizer rules -> fertilizer
+"""
+
+import hashlib
+import json
+import os
+
+from models.fertilizer_rules import FERTILIZER_RULES
+
+from .manifest import path_sha256
+
+DERIVED_INPUTS = {
+    'store': ('pesticides.csv', 'rainfall.csv', 'temp.csv', 'yield.csv'),
+    'modeling_data': ('yield_df.csv', 'pesticides.csv'),
+}
+
+TASK_DEPENDENCIES = {
+    'yield': ('modeling_data',),
+    'disease': ('modeling_data',),
+    'fertilizer': (),
+    'weather': ('rainfall.csv', 'temp.csv'),
+}
+
+
+def combine_hash(parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def task_parameters(name, seed, n_estimators):
+    if name in ('yield', 'disease'):
+        return {'seed': seed, 'n_estimators': n_estimators}
+    if name == 'fertilizer':
+        return {'rules': combine_hash(FERTILIZER_RULES)}
+    return {}
+
+
+def node_keys(input_hashes, seed, n_estimators):
+    """Key for every derived table and model group, from the input file hashes"""
+    keys = {name: combine_hash({f: input_hashes[f] for f in files}) for name, files in DERIVED_INPUTS.items()}
+    for name, dependencies in TASK_DEPENDENCIES.items():
+        keys[name] = combine_hash({
+            'dependencies': {dep: keys.get(dep, input_hashes.get(dep)) for dep in dependencies},
+            'parameters': task_parameters(name, seed, n_estimators)
+        })
+    return keys
+
+
+def is_up_to_date(record, key, output_dir):
+    """True when ``record`` was built with ``key`` and its artifacts are on disk unchanged"""
+    if not record or record.get('key') != key:
+        return False
+    for filename, entry in record.get('artifacts', {}).items():
+        path = os.path.join(output_dir, filename)
+        if not os.path.exists(path) or path_sha256(path) != entry['sha256']:
+            return False
+    return True
@@ -0,0 +1,71 @@
+"""Artifact writing and the training manifest (content hashes and timings)."""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import joblib
+
+MANIFEST_FILE = 'training_manifest.json'
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def path_sha256(path):
+    """Hash of a file, or of every file (by relative name) in a directory"""
+    if not os.path.isdir(path):
+        return file_sha256(path)
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(path)):
+        digest.update(name.encode())
+        digest.update(file_sha256(os.path.join(path, name)).encode())
+    return digest.hexdigest()
+
+
+def artifact_entry(path):
+    if os.path.isdir(path):
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    else:
+        size = os.path.getsize(path)
+    return {'sha256': path_sha256(path), 'bytes': size}
+
+
+def save_artifact(obj, output_dir, filename):
+    """joblib.dump to a temporary file, then rename over ``filename`` so readers never see a partial file"""
+    path = os.path.join(output_dir, filename)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, staging = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', dir=directory)
+    os.close(fd)
+    try:
+        joblib.dump(obj, staging)
+        os.chmod(staging, 0o644)
+        os.replace(staging, path)
+    except Exception:
+        os.unlink(staging)
+        raise
+    return artifact_entry(path)
+
+
+def read_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    staging = path + '.tmp'
+    with open(staging, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(staging, path)
+    return path
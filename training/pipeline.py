@@ -0,0 +1,181 @@
+"""
+Command-line training pipeline for every model the app serves.
+
+Usage:
+    python -m training [--output-dir models] [--tasks yield,disease,fertilizer,weather]
+                       [--workers 4] [--n-jobs N] [--seed 42] [--plots]
+                       [--force] [--warm-start-trees N]
+
+The modeling table is prepared once in the parent process; each model group
+is then trained in its own worker process, and the random forests fit
+their trees on ``--n-jobs`` threads. Artifacts are written atomically
+into the output directory together with training_manifest.json, which
+records the hash of every input and artifact and how long each step took.
+Plots are only drawn with --plots (into <output-dir>/plots).
+
+Runs are incremental: the manifest stores a dependency key per derived
+table and model group (see dependencies), and only nodes whose key changed
+or whose artifacts are missing are rebuilt; --force rebuilds everything.
+With --warm-start-trees N, a forest whose data changed keeps its previous
+trees and scaler and fits N additional trees on the current data instead of
+being retrained from scratch.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import joblib
+import sklearn
+
+from models.data_store import DATASET_DIR, STORE_DIR
+from models.ingest_data import ensure_store
+
+from .data import load_training_sources, prepare_modeling_data
+from .dependencies import TASK_DEPENDENCIES, is_up_to_date, node_keys
+from .manifest import file_sha256, read_manifest, save_artifact, write_manifest
+from .tasks import TASKS
+
+INPUT_FILES = ('yield_df.csv', 'pesticides.csv', 'rainfall.csv', 'temp.csv', 'yield.csv')
+MODELING_DATA_FILE = 'features/modeling_data.pkl'
+
+
+def default_n_jobs(workers):
+    """Threads per forest so that the two forest tasks together use every core"""
+    concurrent_forests = min(workers, 2)
+    return max(1, (os.cpu_count() or 1) // concurrent_forests)
+
+
+def run_task(name, model_data, context):
+    warnings.filterwarnings('ignore')
+    started = time.perf_counter()
+    result = TASKS[name](model_data, context)
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return name, result
+
+
+def load_modeling_data(output_dir, dataset_dir, key, previous):
+    """The merged modeling table, from the cached copy when its inputs are unchanged"""
+    if is_up_to_date(previous, key, output_dir):
+        return joblib.load(os.path.join(output_dir, MODELING_DATA_FILE)), previous, False
+    model_data = prepare_modeling_data(*load_training_sources(dataset_dir))
+    record = {
+        'key': key,
+        'rows': len(model_data),
+        'artifacts': {MODELING_DATA_FILE: save_artifact(model_data, output_dir, MODELING_DATA_FILE)}
+    }
+    return model_data, record, True
+
+
+def run_pipeline(output_dir='models', dataset_dir=DATASET_DIR, store_dir=STORE_DIR, tasks=None,
+                 workers=None, n_jobs=None, seed=42, n_estimators=100, plots=False,
+                 force=False, warm_start_trees=0):
+    """Rebuild the selected model groups whose inputs changed and update the manifest"""
+    tasks = list(tasks or TASKS)
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+    timings = {}
+
+    input_hashes = {name: file_sha256(os.path.join(dataset_dir, name)) for name in INPUT_FILES}
+    keys = node_keys(input_hashes, seed, n_estimators)
+    previous = (None if force else read_manifest(output_dir)) or {}
+    previous_tasks = previous.get('tasks', {})
+    previous_derived = previous.get('derived', {})
+
+    stale = [name for name in tasks if not is_up_to_date(previous_tasks.get(name), keys[name], output_dir)]
+    workers = workers or max(1, min(len(stale), os.cpu_count() or 1))
+
+    step = time.perf_counter()
+    derived = {'store': {'key': keys['store'], 'rebuilt': ensure_store(dataset_dir, store_dir)}}
+    timings['ingest'] = round(time.perf_counter() - step, 3)
+
+    model_data = None
+    if any('modeling_data' in TASK_DEPENDENCIES[name] for name in stale):
+        step = time.perf_counter()
+        model_data, record, rebuilt = load_modeling_data(
+            output_dir, dataset_dir, keys['modeling_data'], previous_derived.get('modeling_data')
+        )
+        derived['modeling_data'] = dict(record, rebuilt=rebuilt)
+        timings['prepare_modeling_data'] = round(time.perf_counter() - step, 3)
+    elif 'modeling_data' in previous_derived:
+        derived['modeling_data'] = dict(previous_derived['modeling_data'], rebuilt=False)
+
+    context = {
+        'output_dir': output_dir,
+        'dataset_dir': dataset_dir,
+        'store_dir': store_dir,
+        'plots_dir': os.path.join(output_dir, 'plots'),
+        'plots': plots,
+        'seed': seed,
+        'n_estimators': n_estimators,
+        'n_jobs': n_jobs or default_n_jobs(workers),
+        'warm_start_trees': warm_start_trees
+    }
+
+    if workers > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_task, name, model_data, context) for name in stale]
+            results = dict(future.result() for future in futures)
+    else:
+        results = dict(run_task(name, model_data, context) for name in stale)
+
+    task_records = {name: dict(record, status='unchanged') for name, record in previous_tasks.items()}
+    for name, result in results.items():
+        status = 'warm_started' if result['metrics'].get('warm_started') else 'trained'
+        task_records[name] = dict(result, key=keys[name], status=status)
+
+    manifest = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'sklearn_version': sklearn.__version__,
+        'parameters': {'seed': seed, 'n_estimators': n_estimators, 'n_jobs': context['n_jobs'], 'workers': workers,
+                       'warm_start_trees': warm_start_trees},
+        'inputs': input_hashes,
+        'derived': derived,
+        'timings': timings,
+        'tasks': task_records
+    }
+    manifest['timings']['total'] = round(time.perf_counter() - started, 3)
+    write_manifest(output_dir, manifest)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output-dir', default='models')
+    parser.add_argument('--dataset-dir', default=DATASET_DIR)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument('--tasks', default=','.join(TASKS), help='Comma-separated model groups to train')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per task, up to the core count)')
+    parser.add_argument('--n-jobs', type=int, default=None, help='Threads per random forest fit')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--plots', action='store_true', help='Write diagnostic plots to <output-dir>/plots')
+    parser.add_argument('--force', action='store_true', help='Rebuild every model group even if its inputs are unchanged')
+    parser.add_argument('--warm-start-trees', type=int, default=0,
+                        help='Add this many trees to an existing forest instead of retraining it')
+    args = parser.parse_args(argv)
+
+    tasks = [name.strip() for name in args.tasks.split(',') if name.strip()]
+    unknown = sorted(set(tasks) - set(TASKS))
+    if unknown:
+        parser.error(f"unknown tasks: {', '.join(unknown)}")
+
+    manifest = run_pipeline(args.output_dir, args.dataset_dir, args.store_dir, tasks, args.workers,
+                            args.n_jobs, args.seed, args.n_estimators, args.plots,
+                            args.force, args.warm_start_trees)
+
+    print(f"{'task':12}{'status':>14}{'seconds':>10}  metrics")
+    for name, result in sorted(manifest['tasks'].items()):
+        print(f"{name:12}{result['status']:>14}{result['seconds']:>10.2f}  {result['metrics']}")
+    rebuilt = sum(result['status'] != 'unchanged' for result in manifest['tasks'].values())
+    print(f"✓ Rebuilt {rebuilt} of {len(manifest['tasks'])} model groups in {manifest['timings']['total']:.2f}s, "
+          f"manifest written to {args.output_dir}/")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Optional diagnostic plots, written as PNG files. Only imported with --plots."""
+
+import os
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+
+def _save(figure, plots_dir, filename):
+    os.makedirs(plots_dir, exist_ok=True)
+    figure.tight_layout()
+    figure.savefig(os.path.join(plots_dir, filename))
+    plt.close(figure)
+
+
+def plot_feature_importance(features, importances, plots_dir):
+    figure = plt.figure(figsize=(10, 6))
+    importance = pd.DataFrame({'feature': features, 'importance': importances}).sort_values('importance', ascending=False)
+    sns.barplot(data=importance, x='importance', y='feature')
+    plt.title('Feature Importance for Crop Yield Prediction')
+    plt.xlabel('Importance Score')
+    _save(figure, plots_dir, 'yield_feature_importance.png')
+
+
+def plot_risk_distribution(labels, plots_dir):
+    figure = plt.figure(figsize=(10, 6))
+    risk_counts = labels.value_counts()
+    sns.barplot(x=risk_counts.index, y=risk_counts.values)
+    plt.title('Distribution of Disease Risk Levels')
+    plt.xlabel('Risk Level')
+    plt.ylabel('Count')
+    _save(figure, plots_dir, 'disease_risk_distribution.png')
+
+
+def plot_fertilizer_samples(recommender, sample, plots_dir):
+    rows = []
+    for crop, rainfall in zip(sample['Item'], sample['average_rain_fall_mm_per_year']):
+        npk, matched_crop = recommender(crop, rainfall)
+        rows.append({'Matched_Crop': matched_crop, 'N_kg_ha': npk['N'], 'P_kg_ha': npk['P'], 'K_kg_ha': npk['K']})
+    recommendations = pd.DataFrame(rows)
+
+    figure = plt.figure(figsize=(12, 5))
+    for position, (column, title) in enumerate((('N_kg_ha', 'Nitrogen'), ('P_kg_ha', 'Phosphorus'),
+                                                ('K_kg_ha', 'Potassium')), start=1):
+        plt.subplot(1, 3, position)
+        sns.barplot(data=recommendations, x='Matched_Crop', y=column)
+        plt.title(f'{title} Recommendations')
+        plt.xticks(rotation=45)
+    _save(figure, plots_dir, 'fertilizer_recommendations.png')
+
+
+def plot_rainfall_trend(years, rainfall, model, plots_dir):
+    figure = plt.figure(figsize=(10, 6))
+    yearly = pd.Series(rainfall).groupby(years).mean()
+    sns.lineplot(x=yearly.index, y=yearly.values, label='Mean observed rainfall')
+    plt.plot(yearly.index, model.predict(yearly.index.to_numpy().reshape(-1, 1)), label='Linear trend')
+    plt.title('Average Annual Rainfall')
+    plt.xlabel('Year')
+    plt.ylabel('Rainfall (mm)')
+    plt.legend()
+    _save(figure, plots_dir, 'rainfall_trend.png')
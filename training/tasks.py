@@ -0,0 +1,217 @@
+"""
+One function per model group. Each runs in its own worker process, writes
+its artifacts to ``context['output_dir']`` and returns their manifest
+entries plus evaluation metrics. Forests are fitted with
+``context['n_jobs']`` threads and saved with n_jobs reset to None, since
+serving predicts a row at a time.
+
+With ``context['warm_start_trees']`` set, the forest tasks load the
+previous model from the output directory and grow it by that many trees
+on the current data, keeping its scaler (and encoder) so the old trees
+still see features on the scale they were trained on.
+"""
+
+import os
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import accuracy_score, mean_squared_error
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from models.data_store import load_table
+from models.export_forest import load_verification_inputs, verify_compiled_forest
+from models.fertilizer_rules import FertilizerRecommender
+from models.prediction_models import CompiledForest
+from models.weather_table import refresh_weather_table
+
+from .data import DISEASE_FEATURES, YIELD_FEATURES, YIELD_TARGET, disease_risk_labels
+from .manifest import artifact_entry, save_artifact
+
+
+def zero_tree_padding(forest):
+    """
+    Zero the bytes sklearn leaves uninitialized in each tree's node array:
+    struct padding, and missing_go_to_left on leaves (which never read it).
+    Otherwise two identical fits pickle to different bytes and get
+    different manifest hashes.
+    """
+    for estimator in forest.estimators_:
+        state = estimator.tree_.__getstate__()
+        nodes = np.zeros(state['nodes'].shape, dtype=state['nodes'].dtype)
+        for field in nodes.dtype.names:
+            nodes[field] = state['nodes'][field]
+        if 'missing_go_to_left' in nodes.dtype.names:
+            nodes['missing_go_to_left'][nodes['left_child'] == -1] = 0
+        state['nodes'] = nodes
+        estimator.tree_.__setstate__(state)
+    return forest
+
+
+def load_previous(context, *filenames):
+    """Previously saved artifacts to warm-start from, or None when any is missing or warm start is off"""
+    if not context.get('warm_start_trees'):
+        return None
+    paths = [os.path.join(context['output_dir'], filename) for filename in filenames]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    try:
+        return [joblib.load(path) for path in paths]
+    except Exception as e:
+        print(f"Error loading previous artifacts, training from scratch: {e}")
+        return None
+
+
+def fit_forest(model, X, y, context, warm_start):
+    """Fit ``model``, or add ``warm_start_trees`` trees to it when warm starting"""
+    if warm_start:
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + context['warm_start_trees'],
+                         n_jobs=context['n_jobs'])
+    model.fit(X, y)
+    model.set_params(warm_start=False, n_jobs=None)
+    return zero_tree_padding(model)
+
+
+def train_yield(model_data, context):
+    """Random forest regressor on rainfall, pesticide use and temperature"""
+    X = model_data[YIELD_FEATURES]
+    y = model_data[YIELD_TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=context['seed'])
+
+    previous = load_previous(context, 'yield_prediction_model.pkl', 'yield_scaler.pkl')
+    if previous:
+        model, scaler = previous
+        X_train_scaled = scaler.transform(X_train)
+    else:
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        model = RandomForestRegressor(n_estimators=context['n_estimators'], random_state=context['seed'])
+    X_test_scaled = scaler.transform(X_test)
+
+    fit_forest(model, X_train_scaled, y_train, context, warm_start=bool(previous))
+    rmse = float(np.sqrt(mean_squared_error(y_test, model.predict(X_test_scaled))))
+
+    if context['plots']:
+        from .plots import plot_feature_importance
+        plot_feature_importance(YIELD_FEATURES, model.feature_importances_, context['plots_dir'])
+
+    output_dir = context['output_dir']
+    return {
+        'artifacts': {
+            'yield_prediction_model.pkl': save_artifact(model, output_dir, 'yield_prediction_model.pkl'),
+            'yield_scaler.pkl': save_artifact(scaler, output_dir, 'yield_scaler.pkl')
+        },
+        'metrics': {'rmse': round(rmse, 2), 'train_rows': len(X_train), 'test_rows': len(X_test),
+                    'trees': len(model.estimators_), 'warm_started': bool(previous)}
+    }
+
+
+def train_disease(model_data, context):
+    """Random forest classifier on synthetic risk labels, plus its compiled array export"""
+    X = model_data[DISEASE_FEATURES]
+    labels = disease_risk_labels(model_data)
+
+    previous = load_previous(context, 'disease_prediction_model.pkl', 'disease_scaler.pkl', 'disease_encoder.pkl')
+    if previous and not set(labels.unique()) <= set(previous[2].classes_):
+        print("New disease risk classes since the last run, training from scratch")
+        previous = None
+    if previous:
+        model, scaler, encoder = previous
+        y = encoder.transform(labels)
+    else:
+        encoder = LabelEncoder()
+        y = encoder.fit_transform(labels)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=context['seed'])
+
+    if previous:
+        X_train_scaled = scaler.transform(X_train)
+    else:
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        model = RandomForestClassifier(n_estimators=context['n_estimators'], random_state=context['seed'])
+    X_test_scaled = scaler.transform(X_test)
+
+    fit_forest(model, X_train_scaled, y_train, context, warm_start=bool(previous))
+    accuracy = float(accuracy_score(y_test, model.predict(X_test_scaled)))
+
+    if context['plots']:
+        from .plots import plot_risk_distribution
+        plot_risk_distribution(labels, context['plots_dir'])
+
+    output_dir = context['output_dir']
+    artifacts = {
+        'disease_prediction_model.pkl': save_artifact(model, output_dir, 'disease_prediction_model.pkl'),
+        'disease_scaler.pkl': save_artifact(scaler, output_dir, 'disease_scaler.pkl'),
+        'disease_encoder.pkl': save_artifact(encoder, output_dir, 'disease_encoder.pkl')
+    }
+
+    compiled = CompiledForest.from_sklearn(model)
+    verification_inputs = load_verification_inputs(scaler, os.path.join(context['dataset_dir'], 'yield_df.csv'))
+    mismatches = verify_compiled_forest(model, compiled, verification_inputs)
+    if mismatches:
+        print(f"Compiled disease forest disagrees with sklearn on {mismatches} rows, not exporting it")
+    else:
+        compiled.save(os.path.join(output_dir, 'disease_forest.npz'))
+        compiled.save_bundle(os.path.join(output_dir, 'disease_forest'))
+        for name in ('disease_forest.npz', 'disease_forest'):
+            artifacts[name] = artifact_entry(os.path.join(output_dir, name))
+
+    return {
+        'artifacts': artifacts,
+        'metrics': {'accuracy': round(accuracy, 4), 'classes': encoder.classes_.tolist(),
+                    'compiled_mismatches': mismatches, 'trees': len(model.estimators_),
+                    'warm_started': bool(previous)}
+    }
+
+
+def build_fertilizer(model_data, context):
+    """Rule-based NPK recommender"""
+    recommender = FertilizerRecommender()
+
+    if context['plots'] and model_data is not None:
+        from .plots import plot_fertilizer_samples
+        plot_fertilizer_samples(recommender, model_data.head(10), context['plots_dir'])
+
+    return {
+        'artifacts': {
+            'fertilizer_recommender.pkl': save_artifact(recommender, context['output_dir'], 'fertilizer_recommender.pkl')
+        },
+        'metrics': {'crops': sorted(recommender.rules)}
+    }
+
+
+def train_weather(model_data, context):
+    """Global rainfall-on-year regression and the per-country trend table"""
+    climate = load_table('climate', context['store_dir'])
+    years = np.asarray(climate['year'], dtype=float)
+    rainfall = np.asarray(climate['rainfall_mm'])
+    observed = ~np.isnan(rainfall)
+
+    model = LinearRegression()
+    model.fit(years[observed].reshape(-1, 1), rainfall[observed])
+
+    table_dir = os.path.join(context['output_dir'], 'weather_table')
+    table, refitted = refresh_weather_table(table_dir, context['dataset_dir'], context['store_dir'])
+
+    if context['plots']:
+        from .plots import plot_rainfall_trend
+        plot_rainfall_trend(years[observed], rainfall[observed], model, context['plots_dir'])
+
+    return {
+        'artifacts': {
+            'weather_model.pkl': save_artifact(model, context['output_dir'], 'weather_model.pkl'),
+            'weather_table': artifact_entry(table_dir)
+        },
+        'metrics': {'slope_mm_per_year': round(float(model.coef_[0]), 4),
+                    'countries': len(table.countries), 'countries_refitted': refitted}
+    }
+
+
+TASKS = {
+    'yield': train_yield,
+    'disease': train_disease,
+    'fertilizer': build_fertilizer,
+    'weather': train_weather
+}